@@ -2,352 +2,616 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import re, os
+import re, os, hashlib, functools, inspect
 import logging
 
-# Setup logging
+from instrumentasi import NULL_TRACER, Tracer
+from pipeline import (
+    COL_OPD, COL_ESELON, COL_JAB, COL_GOL, COL_JJENIS, UNIT_COLUMNS, order_map, prepare_df, read_table,
+)
+from cube import build_cube
+from filter_index import FilterIndex
+from treemap import TREEMAP2_MAX_LEAVES, TREEMAP2_TOP_N, count_leaves, figure_payload_bytes, treemap_figure
+import tampilan
+from snapshot import SNAPSHOT_DIR, list_snapshots, load_snapshot, write_snapshot
+from compact import compact_frame, process_rss_bytes
+from backend import BACKENDS, DuckDBBackend, PandasBackend, duckdb_available
+from seksi import Sections
+from cache_bersama import SHARED_CACHE
+from delta import DeltaDataset, read_delta
+from kanonik import ALIAS_PATH, ALIAS_STATUSES, AliasMap, canonicalize_frame, save_review
+from perbandingan import DIMENSIONS as MOVE_DIMENSIONS, SANKEY_TOP_N, Comparison, load_period, sankey_figure
+from ekspor import FORMATS as EXPORT_FORMATS, export_key, export_opener
+
+# Setup logging. Level logger tetap DEBUG untuk semua sesi; log debug hanya ditulis
+# dari sesi yang mode diagnostiknya aktif (dicek dengan `if diagnostics:` sebelum logging)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
 
 st.set_page_config(page_title="Treemap Kepegawaian", layout="wide")
 
 st.title("📊 Treemap Kepegawaian — OPD → Eselon → Jabatan → Golongan")
 
+# ======================
+# 0. Mode diagnostik
+# ======================
+# Off secara default: expander debug, treemap uji dan log detail tidak dihitung sama sekali.
+# Aktifkan lewat sidebar atau env KEPEGAWAIAN_DIAGNOSTICS=1.
+DIAGNOSTICS_DEFAULT = os.environ.get("KEPEGAWAIAN_DIAGNOSTICS", "").lower() in ("1", "true", "yes", "on")
+diagnostics = st.sidebar.toggle("🩺 Mode diagnostik", value=DIAGNOSTICS_DEFAULT,
+                                help="Tampilkan informasi debug, treemap uji dan log detail")
+
+# ======================
+# 0.5. Instrumentasi per tahap
+# ======================
+# Panel timing: waktu, baris in/out dan (opsional) puncak memori tiap tahap rerun.
+# Set env KEPEGAWAIAN_TRACE_DIR untuk menyimpan trace setiap rerun ke <dir>/app_trace.csv.
+TRACE_DIR = os.environ.get("KEPEGAWAIAN_TRACE_DIR")
+show_timing = st.sidebar.toggle("⏱️ Panel timing", value=False,
+                                help="Catat waktu, jumlah baris dan memori per tahap pipeline")
+track_memory = st.sidebar.toggle("Lacak memori (tracemalloc)", value=False, disabled=not show_timing,
+                                 help="Menambah overhead; aktifkan hanya saat mengukur")
+tracer = Tracer("app", track_memory=show_timing and track_memory)
+
+# ======================
+# 0.6. Mode hemat memori
+# ======================
+# DataFrame ringkas (NIP Int64, kode category dengan kamus bersama, tanpa kolom yang tidak
+# ditampilkan) menggantikan data lengkap; keduanya dibagi semua sesi lewat cache bersama.
+# Default bisa diset lewat env KEPEGAWAIAN_COMPACT=1.
+COMPACT_DEFAULT = os.environ.get("KEPEGAWAIAN_COMPACT", "").lower() in ("1", "true", "yes", "on")
+compact_mode = st.sidebar.toggle("🗜️ Mode hemat memori", value=COMPACT_DEFAULT,
+                                 help="Data ringkas lebih kecil di cache bersama; export tanpa kolom nama pegawai")
+
+# ======================
+# 0.7. Backend query
+# ======================
+# pandas (default): cube + indeks filter di memori. duckdb: data/snapshot Arrow didaftarkan
+# ke DuckDB in-process, filter & agregasi dijalankan sebagai SQL (multi-core, bisa out-of-core).
+# Dipilih saat startup lewat env KEPEGAWAIAN_BACKEND=pandas|duckdb.
+BACKEND = os.environ.get("KEPEGAWAIAN_BACKEND", "pandas").lower()
+if BACKEND not in BACKENDS:
+    st.warning(f"Backend '{BACKEND}' tidak dikenal (pilihan: {', '.join(BACKENDS)}); memakai pandas.")
+    BACKEND = "pandas"
+elif BACKEND == "duckdb" and not duckdb_available():
+    st.warning("Backend duckdb dipilih tapi paket duckdb belum terpasang (pip install duckdb); memakai pandas.")
+    BACKEND = "pandas"
+use_duckdb = BACKEND == "duckdb"
+st.sidebar.caption(f"Backend query: {BACKEND}")
+
+# ======================
+# 0.8. Nama kanonik OPD/jabatan
+# ======================
+# Varian penulisan ("Dinas Pend.", "DINAS PENDIDIKAN ") digabung lewat peta alias yang bisa
+# direview (kanonik.py, file KEPEGAWAIAN_ALIAS_PATH). Default bisa diset lewat env KEPEGAWAIAN_CANONICAL=1.
+CANONICAL_DEFAULT = os.environ.get("KEPEGAWAIAN_CANONICAL", "").lower() in ("1", "true", "yes", "on")
+canonical_mode = st.sidebar.toggle("🔗 Gabungkan nama OPD/jabatan mirip", value=CANONICAL_DEFAULT,
+                                   help=f"Pakai/perbarui peta alias {ALIAS_PATH}; edit peta lalu 'Muat ulang data'")
+
 # Add info about debugging
-with st.expander("ℹ️ Cara Debugging"):
-    st.write("""
-    **Jika ada error di console browser:**
-    1. Buka Developer Tools (F12)
-    2. Lihat tab Console untuk error details
-    3. Cek tab Debug Information di bawah untuk data info
-    4. Pastikan semua kolom yang diperlukan ada di data
+if diagnostics:
+    with st.expander("ℹ️ Cara Debugging"):
+        st.write("""
+        **Jika ada error di console browser:**
+        1. Buka Developer Tools (F12)
+        2. Lihat tab Console untuk error details
+        3. Cek tab Debug Information di bawah untuk data info
+        4. Pastikan semua kolom yang diperlukan ada di data
     
-    **Error yang sering muncul:**
-    - `customdata[0]` not found: Masalah hovertemplate
-    - `label` not found: Masalah dengan data aggregation
-    - Column not found: Periksa nama kolom di data
-    """)
+        **Error yang sering muncul:**
+        - `customdata[0]` not found: Masalah hovertemplate
+        - `label` not found: Masalah dengan data aggregation
+        - Column not found: Periksa nama kolom di data
+        """)
+
 
 # ======================
-# 1. Upload / Load Data
+# 1. Konfigurasi kolom
 # ======================
-uploaded_file = st.file_uploader("Upload file (CSV/Excel)", type=["csv", "xlsx"])
+# COL_*, UNIT_COLUMNS dan order_map didefinisikan di pipeline.py
 
-if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-    else:
-        df = pd.read_excel(uploaded_file)
-    st.success(f"Loaded {uploaded_file.name} | Rows: {len(df)}")
-    logger.info(f"Data loaded: {len(df)} rows, columns: {list(df.columns)}")
-else:
-    st.warning("Silakan upload file CSV/Excel terlebih dahulu")
-    st.stop()
+# Level-of-detail Treemap 2: default widget TREEMAP2_TOP_N / TREEMAP2_MAX_LEAVES di treemap.py
+
+# Batas cache Streamlit yang tersisa (perbandingan snapshot); dataset & agregat ada di
+# cache bersama (cache_bersama.py, batas memori lewat env KEPEGAWAIAN_CACHE_MB).
+CACHE_MAX_ENTRIES = 8
+CACHE_TTL_SECONDS = 60 * 60
 
 # ======================
-# 2. Konfigurasi kolom
+# 2. Upload / Load Data (cached)
 # ======================
-COL_OPD    = "satuan_kerja_nama"
-COL_ESELON = "eselon"
-COL_JAB    = "jabatan_nama"
-COL_GOL    = "golongan"
+def shared_cached(spinner):
+    """Seperti st.cache_resource, tapi hasilnya di SHARED_CACHE (LRU dengan batas memori, dibagi semua sesi).
+
+    Key = nama fungsi + argumen; argumen berawalan '_' tidak ikut key (konvensi Streamlit).
+    """
+    def decorate(fn):
+        params = list(inspect.signature(fn).parameters)
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = (fn.__name__,) + tuple(a for p, a in zip(params, args) if not p.startswith("_"))
+            if key in SHARED_CACHE:
+                return SHARED_CACHE.get_or_build(key, lambda: fn(*args))
+            with st.spinner(spinner):
+                return SHARED_CACHE.get_or_build(key, lambda: fn(*args))
+        return wrapper
+    return decorate
+
+def prepare_upload(file_name, unit_columns, eselon_order, canonical, file_bytes, tracer=None):
+    """Parse + normalisasi file upload tanpa cache (dipakai loader yang menyimpan hasil turunannya saja)."""
+    with (tracer or NULL_TRACER).stage("parse") as stage:
+        df = read_table(file_bytes, file_name, unit_columns)
+        stage.rows_out = len(df)
+    logger.info("Data parsed: %d rows, %d columns", len(df), len(df.columns))
+    return prepare_df(df, unit_columns, dict(eselon_order), tracer=tracer, canonical=canonical)
+
+def open_snapshot(path, canonical):
+    """Buka snapshot Arrow (memory-mapped) tanpa cache."""
+    df, info = load_snapshot(path)
+    if canonical:
+        canonicalize_frame(df)
+    return df, info.unit_cols_std, info.source
+
+@shared_cached("Memproses data...")
+def load_prepared(file_hash, file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer=None):
+    """Parse + normalisasi file upload. Key cache: hash isi file + opsi normalisasi.
+
+    `_file_bytes` tidak ikut key cache; identitasnya diwakili `file_hash`.
+    `_tracer` hanya mencatat tahap parse/normalisasi saat cache miss.
+    """
+    return prepare_upload(file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer)
+
+@shared_cached("Membuka snapshot...")
+def load_prepared_snapshot(path, mtime, canonical):
+    """Buka snapshot Arrow (memory-mapped); `mtime` ikut key supaya snapshot yang ditimpa dibaca ulang."""
+    return open_snapshot(path, canonical)
+
+# Loader ringkas/DuckDB membangun dari prepare tanpa cache: kalau lewat load_prepared*,
+# frame penuh ikut tinggal di SHARED_CACHE di samping hasilnya.
+@shared_cached("Menyusun data ringkas...")
+def load_compact(file_hash, file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer=None):
+    """Varian hemat memori load_prepared: satu objek read-only untuk semua sesi."""
+    df, unit_cols_std = prepare_upload(file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer)
+    return compact_frame(df, unit_cols_std), unit_cols_std
+
+@shared_cached("Menyusun data ringkas...")
+def load_compact_snapshot(path, mtime, canonical):
+    df, unit_cols_std, source = open_snapshot(path, canonical)
+    return compact_frame(df, unit_cols_std), unit_cols_std, source
+
+@shared_cached("Mendaftarkan data ke DuckDB...")
+def load_duckdb(file_hash, file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer=None):
+    """Backend DuckDB dari file upload (tabel Arrow dibagi semua sesi)."""
+    df, unit_cols_std = prepare_upload(file_name, unit_columns, eselon_order, canonical, _file_bytes, _tracer)
+    return DuckDBBackend.from_frame(df), unit_cols_std
+
+@shared_cached("Membuka snapshot di DuckDB...")
+def load_duckdb_snapshot(path, mtime, canonical):
+    """Backend DuckDB langsung di atas snapshot Arrow memory-mapped, tanpa DataFrame pandas.
+
+    Dengan nama kanonik, nama di snapshot perlu dipetakan dulu, jadi lewat DataFrame.
+    """
+    if canonical:
+        df, unit_cols_std, source = open_snapshot(path, canonical)
+        return DuckDBBackend.from_frame(df), unit_cols_std, source
+    backend, info = DuckDBBackend.from_snapshot(path)
+    return backend, info.unit_cols_std, info.source
+
+# Perbandingan snapshot (seksi 9.5): tiap periode di-cache sendiri, jadi menambah/mengurangi
+# satu snapshot tidak memuat ulang snapshot lain.
+COMPARISON_MAX_PERIODS = 24
+
+@st.cache_resource(max_entries=COMPARISON_MAX_PERIODS, ttl=CACHE_TTL_SECONDS, show_spinner="Memuat periode snapshot...")
+def load_period_cached(path, mtime, canonical):
+    return load_period(path, canonical=canonical)
+
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def load_comparison(periods, canonical):
+    """`periods` = tuple (path, mtime) berurutan; hasilnya read-only dan dibagi semua sesi."""
+    return Comparison([load_period_cached(path, mtime, canonical) for path, mtime in periods])
+
+source_mode = st.radio("Sumber data", ["Upload file", "Snapshot tersimpan"], horizontal=True)
+
+if st.button("🔄 Muat ulang data", help="Kosongkan cache dan proses ulang file dari awal"):
+    SHARED_CACHE.clear()
+    load_period_cached.clear()
+    load_comparison.clear()
+
+if source_mode == "Snapshot tersimpan":
+    snapshots = list_snapshots()
+    if not snapshots:
+        st.warning(f"Belum ada snapshot di folder '{SNAPSHOT_DIR}'. Upload file lalu simpan sebagai snapshot.")
+        st.stop()
+    snap = st.selectbox("Pilih snapshot", snapshots, format_func=lambda i: i.label)
+    snap_mtime = os.path.getmtime(snap.path)
+    with tracer.stage("load") as stage:
+        if use_duckdb:
+            backend, unit_cols_std, source_name = load_duckdb_snapshot(snap.path, snap_mtime, canonical_mode)
+            n_rows = backend.n_rows
+        else:
+            load_snap = load_compact_snapshot if compact_mode else load_prepared_snapshot
+            df, unit_cols_std, source_name = load_snap(snap.path, snap_mtime, canonical_mode)
+            n_rows = len(df)
+        stage.rows_out = n_rows
+    dataset_key = f"{snap.path}:{snap_mtime}:{int(compact_mode)}:{int(canonical_mode)}"
+    st.success(f"Loaded snapshot {source_name} | Rows: {n_rows}")
+    logger.info("Snapshot loaded: %s (%d rows)", snap.path, n_rows)
+else:
+    uploaded_file = st.file_uploader("Upload file (CSV/Excel)", type=["csv", "xlsx"])
 
-UNIT_COLUMNS = []  # bisa ditambah kalau ada bidang/seksi
+    if uploaded_file:
+        file_bytes = uploaded_file.getvalue()
+        file_hash = hashlib.sha256(file_bytes).hexdigest()
+        try:
+            with tracer.stage("load") as stage:
+                if use_duckdb:
+                    loader = load_duckdb
+                else:
+                    loader = load_compact if compact_mode else load_prepared
+                loaded, unit_cols_std = loader(
+                    file_hash, uploaded_file.name, tuple(UNIT_COLUMNS),
+                    tuple(sorted(order_map.items())), canonical_mode, file_bytes, tracer
+                )
+                if use_duckdb:
+                    backend, n_rows = loaded, loaded.n_rows
+                else:
+                    df, n_rows = loaded, len(loaded)
+                stage.rows_out = n_rows
+        except KeyError as e:
+            st.error(f"Kolom '{e.args[0]}' tidak ditemukan di data.")
+            st.stop()
+        dataset_key = f"{file_hash}:{int(compact_mode)}:{int(canonical_mode)}"
+        source_name = uploaded_file.name
+        st.success(f"Loaded {uploaded_file.name} | Rows: {n_rows}")
+        logger.info("Data loaded: %d rows (hash=%s)", n_rows, file_hash[:12])
+
+        if st.button("💾 Simpan sebagai snapshot", help="Simpan data yang sudah dinormalisasi ke format Arrow agar sesi berikutnya tidak parse ulang"):
+            # snapshot selalu berisi data lengkap dengan nama asli (bukan versi ringkas/kanonik);
+            # peta alias diterapkan lagi saat snapshot dibuka
+            # (sekali tulis, jadi tidak disimpan di SHARED_CACHE)
+            full_df = df if loader is load_prepared and not canonical_mode else prepare_upload(
+                uploaded_file.name, tuple(UNIT_COLUMNS), tuple(sorted(order_map.items())), False, file_bytes
+            )[0]
+            path = write_snapshot(full_df, unit_cols_std, uploaded_file.name, file_hash)
+            st.success(f"Snapshot disimpan: {path}")
+    else:
+        st.warning("Silakan upload file CSV/Excel terlebih dahulu")
+        st.stop()
 
 # ======================
-# 3. Normalisasi teks
+# 3. Cube agregat (sumber semua treemap, tabel & pivot; hanya backend pandas)
 # ======================
-def norm_space(x):
-    if pd.isna(x): return None
-    x = str(x).strip()
-    x = re.sub(r"\s+", " ", x)
-    return x if x else None
+@shared_cached("Menyusun cube agregat...")
+def get_cube(dataset_key, unit_cols_std, _df):
+    """Cube OPD × Eselon × (Unit) × Jabatan × Golongan; key = identitas dataset."""
+    return build_cube(_df, unit_cols_std)
 
-for c in [COL_OPD, COL_ESELON, COL_JAB, COL_GOL]:
-    if c not in df.columns:
-        st.error(f"Kolom '{c}' tidak ditemukan di data.")
-        st.stop()
-    df[c] = df[c].map(norm_space)
+@shared_cached("Menyusun indeks filter...")
+def get_filter_index(dataset_key, columns, _df):
+    """Indeks bitmap baris per nilai filter; read-only, jadi dibagi tanpa copy."""
+    return FilterIndex(_df, columns)
 
-unit_cols_std = []
-for i, col in enumerate(UNIT_COLUMNS):
-    if col in df.columns:
-        std_name = f"unit_l{i+1}"
-        df[std_name] = df[col].map(norm_space).fillna(f"Unit L{i+1} Tidak Diketahui")
-        unit_cols_std.append(std_name)
+if not use_duckdb:
+    with tracer.stage("cube", rows_in=len(df)) as stage:
+        cube = get_cube(dataset_key, tuple(unit_cols_std), df)
+        stage.rows_out = len(cube)
 
-order_map = {"I":1,"II":2,"III":3,"III/IV":3.5,"IV":4,"NON-ESELON":9}
-df["__eselon_ord__"] = df[COL_ESELON].str.upper().map(order_map).fillna(99)
+    with tracer.stage("filter_index", rows_in=len(df)):
+        filter_index = get_filter_index(dataset_key, tuple([COL_ESELON, COL_OPD, COL_GOL, COL_JJENIS] + unit_cols_std), df)
+    logger.info("Cube: %d kombinasi dari %d baris", len(cube), len(df))
+
+# ======================
+# 3.2. Update delta per NIP
+# ======================
+# File perubahan (tambah/ubah/hapus per peg_nip) diterapkan ke salinan dataset milik sesi ini:
+# hanya baris delta yang dinormalisasi/diklasifikasi, cube dan indeks filter diperbarui per baris.
+delta_state = st.session_state.get("_delta")
+if delta_state is not None and delta_state["base"] != dataset_key:
+    delta_state = st.session_state["_delta"] = None
+
+with st.expander("🔁 Update delta per NIP"):
+    if use_duckdb:
+        st.info("Update delta hanya tersedia untuk backend pandas.")
+    else:
+        st.caption("Kolom: peg_nip, aksi (tambah/ubah/hapus, kosong = tambah atau ubah) dan kolom yang berubah. "
+                   "Sel kosong pada baris ubah = nilai lama dipakai.")
+        delta_file = st.file_uploader("File perubahan (CSV/Excel)", type=["csv", "xlsx"], key="delta_file")
+        if delta_file and st.button("Terapkan perubahan"):
+            delta_bytes = delta_file.getvalue()
+            delta_hash = hashlib.sha256(delta_bytes).hexdigest()
+            if delta_state is not None and delta_hash in delta_state["applied"]:
+                st.info("File perubahan ini sudah diterapkan.")
+            else:
+                try:
+                    if delta_state is None:
+                        # salinan sekali per sesi; data dari cache tidak diubah
+                        dataset = DeltaDataset(df.copy(), unit_cols_std, cube.copy(), filter_index.copy(),
+                                               canonical=canonical_mode)
+                        delta_state = {"base": dataset_key, "dataset": dataset, "applied": []}
+                    stats = delta_state["dataset"].apply(read_delta(delta_bytes, delta_file.name), tracer)
+                except (KeyError, ValueError) as e:
+                    st.error(f"Delta tidak bisa diterapkan: {e}")
+                else:
+                    delta_state["applied"].append(delta_hash)
+                    st.session_state["_delta"] = delta_state
+                    st.success(f"{delta_file.name}: {stats.summary()}")
+        if delta_state is not None:
+            st.dataframe(pd.DataFrame([vars(h) for h in delta_state["dataset"].history]), hide_index=True)
+            delta_col1, delta_col2 = st.columns(2)
+            with delta_col1:
+                if st.button("↩️ Batalkan semua delta"):
+                    st.session_state.pop("_delta", None)
+                    st.rerun()
+            with delta_col2:
+                if st.button("💾 Simpan hasil delta sebagai snapshot", disabled=compact_mode,
+                             help="Nonaktif di mode hemat memori (data ringkas tidak lengkap)"):
+                    path = write_snapshot(delta_state["dataset"].df, unit_cols_std, source_name,
+                                          hashlib.sha256(dataset_key.encode() + "".join(delta_state["applied"]).encode()).hexdigest())
+                    st.success(f"Snapshot disimpan: {path}")
+
+if not use_duckdb:
+    if delta_state is not None:
+        dataset = delta_state["dataset"]
+        df, cube, filter_index = dataset.df, dataset.cube, dataset.filter_index
+        dataset_key = f"{dataset_key}+" + "+".join(h[:12] for h in delta_state["applied"])
+    backend = PandasBackend(df, cube, filter_index, shared=delta_state is None)
+
+# ======================
+# 3.3. Review peta alias nama
+# ======================
+if canonical_mode:
+    with st.expander("🔗 Review peta alias OPD/jabatan"):
+        alias_rows = AliasMap.load(ALIAS_PATH).aliases()
+        if alias_rows.empty:
+            st.caption(f"Belum ada nama yang digabung ({ALIAS_PATH}).")
+        else:
+            st.caption("Baris 'usulan' (nama dengan kata tambahan) baru digabung setelah diubah jadi 'disetujui'; "
+                       "ubah status jadi 'ditolak' untuk memisahkan nama, atau ganti kanonik. "
+                       "Perubahan berlaku setelah 'Muat ulang data'.")
+            reviewed = st.data_editor(
+                alias_rows,
+                column_config={"status": st.column_config.SelectboxColumn("status", options=ALIAS_STATUSES)},
+                disabled=["kolom", "alias", "skor"], hide_index=True, width="stretch", key="alias_review",
+            )
+            if st.button("💾 Simpan review alias"):
+                save_review(reviewed, ALIAS_PATH)
+                st.success(f"Peta alias disimpan: {ALIAS_PATH}")
+
+# ======================
+# 3.5. Seksi halaman
+# ======================
+# Tiap seksi dihitung ulang hanya kalau input (deps) berubah; hasil lain dipakai lagi dari
+# rerun sebelumnya atau dari sesi lain dengan dataset + filter yang sama (cache bersama). Seksi berat (agg2, treemap 3) dihitung di thread pool sementara treemap 1
+# dirender; widget treemap 2 dan pivot ada di st.fragment sehingga hanya seksinya yang rerun.
+# Saat "Lacak memori" aktif semua seksi dihitung berurutan agar puncak memori per tahap valid.
+# Sesi dengan delta menyimpan hasil seksi di session state saja: view-nya menunjuk salinan data
+# milik sesi itu, yang tidak boleh ikut tertahan (dan tidak terhitung) di cache bersama.
+sections = Sections(st.session_state, parallel=not (show_timing and track_memory),
+                    shared=SHARED_CACHE if delta_state is None else None)
 
 # ======================
 # 4. Audit data ringkas
 # ======================
+def build_audit():
+    with tracer.stage("audit", rows_in=backend.n_rows):
+        return {
+            "eselon": backend.value_counts(COL_ESELON),
+            "golongan": backend.value_counts(COL_GOL),
+            "opd": backend.value_counts(COL_OPD).head(10),
+            "sample": backend.head(10, [COL_OPD, COL_ESELON, COL_GOL, COL_JAB]),
+        }
+
+audit = sections.get("audit", (dataset_key,), build_audit)
 with st.expander("📋 Audit Data"):
     st.subheader("Distribusi Eselon (Global)")
-    st.dataframe(df[COL_ESELON].value_counts().reset_index().rename(columns={"index":"Eselon","eselon":"Jumlah"}))
+    st.dataframe(audit["eselon"].reset_index().rename(columns={"index":"Eselon","eselon":"Jumlah"}))
 
     st.subheader("Distribusi Golongan (Global)")
-    st.dataframe(df[COL_GOL].value_counts().reset_index().rename(columns={"index":"Golongan","golongan":"Jumlah"}))
+    st.dataframe(audit["golongan"].reset_index().rename(columns={"index":"Golongan","golongan":"Jumlah"}))
 
     st.subheader("Top 10 OPD (berdasarkan jumlah pegawai)")
-    st.dataframe(df[COL_OPD].value_counts().head(10).reset_index().rename(columns={"index":"OPD","satuan_kerja_nama":"Jumlah"}))
+    st.dataframe(audit["opd"].reset_index().rename(columns={"index":"OPD","satuan_kerja_nama":"Jumlah"}))
 
     st.subheader("Contoh 10 Baris Data")
-    st.dataframe(df[[COL_OPD, COL_ESELON, COL_GOL, COL_JAB]].head(10))
+    st.dataframe(audit["sample"])
 
 # ======================
 # 4.5. Debug Information
 # ======================
-with st.expander("🔍 Debug Information"):
-    st.subheader("Data Info")
-    st.write(f"**Total Rows:** {len(df)}")
-    st.write(f"**Columns:** {list(df.columns)}")
-    st.write(f"**Data Types:**")
-    st.write(df.dtypes)
-    
-    st.subheader("Sample Data for Treemap")
-    st.write("**First 5 rows of aggregated data:**")
-    if 'agg1' in locals():
-        st.write("Treemap 1 (OPD → Eselon):")
-        st.dataframe(agg1.head())
-        st.write(f"**Jumlah values sample:** {agg1['jumlah'].tolist()[:10]}")
-        st.write(f"**Jumlah min/max:** {agg1['jumlah'].min()}/{agg1['jumlah'].max()}")
-    if 'agg2' in locals():
-        st.write("Treemap 2 (OPD → Eselon → Jabatan):")
-        st.dataframe(agg2.head())
-        st.write(f"**Jumlah values sample:** {agg2['jumlah'].tolist()[:10]}")
-    if 'agg3' in locals():
-        st.write("Treemap 3 (OPD → Golongan):")
-        st.dataframe(agg3.head())
-        st.write(f"**Jumlah values sample:** {agg3['jumlah'].tolist()[:10]}")
+if diagnostics:
+    with st.expander("🔍 Debug Information"):
+        st.subheader("Data Info")
+        st.write(f"**Backend:** {backend.name}")
+        st.write(f"**Total Rows:** {backend.n_rows}")
+        st.write(f"**Columns:** {backend.columns}")
+        st.write(f"**Data Types:**")
+        st.write(backend.dtypes())
+        st.write("**Contoh data agregat:** lihat expander \"🔍 Debug Treemap 1 Data\" dan tabel detail tiap treemap")
     
-    st.subheader("Console Logs")
-    st.write("**Check browser console (F12) for detailed logs**")
-    st.write("**Common issues:**")
-    st.write("- Hovertemplate variables not found: %{parent}, %{label}, %{value}")
-    st.write("- Data aggregation issues: Check if columns exist")
-    st.write("- Plotly version compatibility: Try updating plotly")
+        st.subheader("Console Logs")
+        st.write("**Check browser console (F12) for detailed logs**")
+        st.write("**Common issues:**")
+        st.write("- Hovertemplate variables not found: %{parent}, %{label}, %{value}")
+        st.write("- Data aggregation issues: Check if columns exist")
+        st.write("- Plotly version compatibility: Try updating plotly")
+
 
 # ======================
 # 5. Filter dropdown & multiselect
 # ======================
-eselon_options = ["[SEMUA]"] + sorted(df[COL_ESELON].dropna().unique().tolist())
+eselon_options = ["[SEMUA]"] + backend.options(COL_ESELON)
 eselon_filter = st.selectbox("Filter Eselon:", eselon_options)
 
-opd_options = sorted(df[COL_OPD].dropna().unique().tolist())
+opd_options = backend.options(COL_OPD)
 opd_filter = st.multiselect("Filter OPD:", opd_options, default=opd_options)
 
-golongan_options = sorted(df[COL_GOL].dropna().unique().tolist())
+golongan_options = backend.options(COL_GOL)
 gol_filter = st.multiselect("Filter Golongan:", golongan_options, default=golongan_options)
 
-# Apply filter
-dff = df.copy()
-if eselon_filter != "[SEMUA]":
-    dff = dff[dff[COL_ESELON] == eselon_filter]
-if opd_filter:
-    dff = dff[dff[COL_OPD].isin(opd_filter)]
-if gol_filter:
-    dff = dff[dff[COL_GOL].isin(gol_filter)]
+# Apply filter: treemap/tabel/pivot memakai view backend, baris mentah hanya diambil saat export
+eselon_selected = None if eselon_filter == "[SEMUA]" else eselon_filter
+filter_state = (dataset_key, eselon_selected, tuple(opd_filter), tuple(gol_filter))
 
-# Export tombol
+def build_view():
+    with tracer.stage("filter", rows_in=backend.n_rows) as stage:
+        view = backend.filter(**{COL_ESELON: eselon_selected, COL_OPD: opd_filter, COL_GOL: gol_filter})
+        stage.rows_out = view.n_rows
+    return view
+
+view = sections.get("filter", filter_state, build_view)
+
+# Export: file baru dibuat saat tombol diklik, lalu di-cache per dataset + filter + format
+export_fmt = st.selectbox("Format export", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0])
 st.download_button(
-    label="💾 Download Data Filter (CSV)",
-    data=dff.to_csv(index=False).encode("utf-8"),
-    file_name=f"data_filter_{eselon_filter.replace('/','-')}.csv",
-    mime="text/csv"
+    label=f"💾 Download Data Filter ({EXPORT_FORMATS[export_fmt][0]})",
+    data=export_opener(export_key("data", *filter_state, export_fmt), export_fmt,
+                       lambda v=view: v.frame()),
+    file_name=f"data_filter_{eselon_filter.replace('/','-')}.{export_fmt}",
+    mime=EXPORT_FORMATS[export_fmt][1],
+    on_click="ignore",
 )
 
+# ======================
+# 5.5. Seksi berat: mulai dihitung di thread pool
+# ======================
+# Agregat, figure dan tabel detail dibentuk di tampilan.py (sama dengan laporan.py)
+def build_agg2(view, path_hierarchy):
+    with tracer.stage("agg2", rows_in=view.grain) as stage:
+        agg2 = tampilan.opd_eselon_jabatan(view.rollup(path_hierarchy), path_hierarchy)
+        stage.rows_out = len(agg2)
+    return agg2
+
+def build_treemap3(view):
+    with tracer.stage("agg3", rows_in=view.grain) as stage:
+        agg3 = tampilan.opd_golongan(view.rollup(tampilan.DIMS_OPD_GOLONGAN))
+        stage.rows_out = len(agg3)
+
+    with tracer.stage("figure3", rows_in=len(agg3)):
+        fig3 = tampilan.figure_opd_golongan(agg3)
+    return agg3, fig3
+
+path_hierarchy = tampilan.jabatan_path(unit_cols_std)
+sections.submit("agg2", filter_state, lambda: build_agg2(view, path_hierarchy))
+sections.submit("treemap3", filter_state, lambda: build_treemap3(view))
+
 # ======================
 # 6. Treemap Tingkat Tinggi: OPD → Eselon
 # ======================
 st.subheader("Treemap 1: OPD → Eselon")
-agg1 = (dff.groupby([COL_OPD, COL_ESELON], dropna=False).size().reset_index(name="jumlah"))
-agg1["__ord"] = agg1[COL_ESELON].str.upper().map(order_map).fillna(99)
-agg1 = agg1.sort_values(["__ord", COL_OPD]).drop(columns=["__ord"])
-
-logger.info(f"Treemap 1 data shape: {agg1.shape}")
-logger.info(f"Treemap 1 columns: {list(agg1.columns)}")
-logger.info(f"Sample data:\n{agg1.head()}")
-logger.info(f"Jumlah values: {agg1['jumlah'].tolist()[:10]}")
-logger.info(f"Jumlah min/max: {agg1['jumlah'].min()}/{agg1['jumlah'].max()}")
-
-# Create treemap with simple approach first
-fig1 = px.treemap(
-    agg1,
-    path=[COL_OPD, COL_ESELON],
-    values="jumlah",
-    title="Treemap — OPD → Eselon"
-)
-fig1.update_layout(margin=dict(t=40,l=0,r=0,b=0))
-
-# Alternative 1: Show values directly on the treemap
-fig1.update_traces(
-    textinfo="label+value",
-    texttemplate="%{label}<br>%{value}",
-    textfont_size=12,
-    textposition="middle center"
-)
+def build_treemap1():
+    with tracer.stage("agg1", rows_in=view.grain) as stage:
+        agg1 = tampilan.opd_eselon(view.rollup(tampilan.DIMS_OPD_ESELON))
+        stage.rows_out = len(agg1)
+
+    with tracer.stage("figure1", rows_in=len(agg1)):
+        fig1 = tampilan.figure_opd_eselon(agg1)
+    return agg1, fig1
+
+agg1, fig1 = sections.get("treemap1", filter_state, build_treemap1)
+
+logger.info("Treemap 1 data shape: %s", agg1.shape)
+if diagnostics:
+    logger.debug("Treemap 1 columns: %s", list(agg1.columns))
+    logger.debug("Sample data:\n%s", agg1.head())
+    logger.debug("Jumlah values: %s", agg1['jumlah'].tolist()[:10])
+    logger.debug("Jumlah min/max: %s/%s", agg1['jumlah'].min(), agg1['jumlah'].max())
+
+if diagnostics and len(fig1.data) > 0:
+    trace1 = fig1.data[0]
+    logger.debug("Treemap 1 trace type: %s, nodes: %d", type(trace1).__name__, len(trace1.ids))
+    logger.debug("Treemap 1 hovertemplate: %s", trace1.hovertemplate)
+    logger.debug("Treemap 1 customdata sample: %s", trace1.customdata[:5])
 
-# Try different hovertemplate approaches
-try:
-    # Method 1: Try with customdata (current working approach)
-    fig1.data[0].customdata = agg1[['jumlah']].values
-    fig1.update_traces(
-        textinfo="label+value",
-        hovertemplate="<b>%{label}</b><br>Jumlah: %{customdata[0]:,}<extra></extra>"
-    )
-    logger.info("Treemap 1 hovertemplate with customdata added successfully")
+# Debug: Show data before plotting
+if diagnostics:
+    with st.expander("🔍 Debug Treemap 1 Data"):
+        st.write("**Aggregated Data:**")
+        st.dataframe(agg1.head(10))
+        st.write(f"**Total rows:** {len(agg1)}")
+        st.write(f"**Sample values:** {agg1['jumlah'].tolist()[:10]}")
+        st.write(f"**OPD unique count:** {agg1[COL_OPD].nunique()}")
+        st.write(f"**Eselon unique count:** {agg1[COL_ESELON].nunique()}")
+        st.write("**Sample OPD names:**")
+        st.write(agg1[COL_OPD].unique()[:5].tolist())
+        st.write("**Sample Eselon values:**")
+        st.write(agg1[COL_ESELON].unique()[:5].tolist())
     
-    # Test if hovertemplate is working by checking the actual values
-    logger.info(f"Sample customdata values: {fig1.data[0].customdata[:5].flatten()}")
-    logger.info(f"Sample labels: {fig1.data[0].labels[:5]}")
+        # Test with simple data
+        st.write("**Test with simple data:**")
+        test_data = agg1.head(5).copy()
+        st.dataframe(test_data)
     
-    # Try alternative hovertemplate formats
-    try:
-        # Alternative 1: Without formatting
-        fig1.data[0].hovertemplate = "<b>%{label}</b><br>Jumlah: %{customdata[0]}<extra></extra>"
-        logger.info("Alternative hovertemplate 1 applied")
-    except Exception as e:
-        logger.error(f"Error with alternative 1: {e}")
-        
-    try:
-        # Alternative 2: With different customdata access
-        fig1.data[0].hovertemplate = "<b>%{label}</b><br>Jumlah: %{customdata}<extra></extra>"
-        logger.info("Alternative hovertemplate 2 applied")
-    except Exception as e:
-        logger.error(f"Error with alternative 2: {e}")
+        # Create test treemap with different hovertemplate approaches
+        st.write("**Test 1: Basic treemap**")
+        try:
+            test_fig1 = px.treemap(
+                test_data,
+                path=[COL_OPD, COL_ESELON],
+                values="jumlah",
+                title="Test 1: Basic"
+            )
+            st.plotly_chart(test_fig1, use_container_width=True)
+            st.success("Test 1: Basic treemap created successfully!")
+        except Exception as e:
+            st.error(f"Error creating test 1: {e}")
     
-except Exception as e:
-    logger.error(f"Error with customdata hovertemplate: {e}")
-    try:
-        # Method 2: Try with direct value
-        fig1.update_traces(
-            textinfo="label+value",
-            hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<extra></extra>"
-        )
-        logger.info("Treemap 1 hovertemplate with direct value added successfully")
-    except Exception as e2:
-        logger.error(f"Error with direct value hovertemplate: {e2}")
+        st.write("**Test 2: With hover_data**")
         try:
-            # Method 3: Try with hover_data
-            fig1 = px.treemap(
-                agg1,
+            test_fig2 = px.treemap(
+                test_data,
                 path=[COL_OPD, COL_ESELON],
                 values="jumlah",
                 hover_data={"jumlah": True},
-                title="Treemap — OPD → Eselon"
+                title="Test 2: With hover_data"
             )
-            fig1.update_layout(margin=dict(t=40,l=0,r=0,b=0))
-            fig1.update_traces(
+            test_fig2.update_traces(
                 textinfo="label+value",
                 hovertemplate="<b>%{label}</b><br>Jumlah: %{customdata[0]:,}<extra></extra>"
             )
-            logger.info("Treemap 1 recreated with hover_data approach")
-        except Exception as e3:
-            logger.error(f"Error with hover_data approach: {e3}")
-            # Final fallback: just textinfo
-            fig1.update_traces(textinfo="label+value")
-            logger.info("Treemap 1 created with textinfo only")
-
-logger.info(f"Treemap 1 data count: {len(fig1.data)}")
-if len(fig1.data) > 0:
-    logger.info(f"Treemap 1 trace type: {type(fig1.data[0])}")
-    logger.info(f"Treemap 1 trace name: {fig1.data[0].name}")
-    logger.info(f"Treemap 1 values count: {len(fig1.data[0].values) if hasattr(fig1.data[0], 'values') else 'N/A'}")
-    logger.info(f"Treemap 1 hovertemplate: {fig1.data[0].hovertemplate}")
-    logger.info(f"Treemap 1 textinfo: {fig1.data[0].textinfo}")
-    if hasattr(fig1.data[0], 'customdata') and fig1.data[0].customdata is not None:
-        logger.info(f"Treemap 1 customdata shape: {fig1.data[0].customdata.shape if hasattr(fig1.data[0].customdata, 'shape') else 'N/A'}")
-        logger.info(f"Treemap 1 customdata sample: {fig1.data[0].customdata[:5] if hasattr(fig1.data[0].customdata, '__getitem__') else 'N/A'}")
-    else:
-        logger.info("Treemap 1 has no customdata")
-
-# Debug: Show data before plotting
-with st.expander("🔍 Debug Treemap 1 Data"):
-    st.write("**Aggregated Data:**")
-    st.dataframe(agg1.head(10))
-    st.write(f"**Total rows:** {len(agg1)}")
-    st.write(f"**Sample values:** {agg1['jumlah'].tolist()[:10]}")
-    st.write(f"**OPD unique count:** {agg1[COL_OPD].nunique()}")
-    st.write(f"**Eselon unique count:** {agg1[COL_ESELON].nunique()}")
-    st.write("**Sample OPD names:**")
-    st.write(agg1[COL_OPD].unique()[:5].tolist())
-    st.write("**Sample Eselon values:**")
-    st.write(agg1[COL_ESELON].unique()[:5].tolist())
-    
-    # Test with simple data
-    st.write("**Test with simple data:**")
-    test_data = agg1.head(5).copy()
-    st.dataframe(test_data)
-    
-    # Create test treemap with different hovertemplate approaches
-    st.write("**Test 1: Basic treemap**")
-    try:
-        test_fig1 = px.treemap(
-            test_data,
-            path=[COL_OPD, COL_ESELON],
-            values="jumlah",
-            title="Test 1: Basic"
-        )
-        st.plotly_chart(test_fig1, use_container_width=True)
-        st.success("Test 1: Basic treemap created successfully!")
-    except Exception as e:
-        st.error(f"Error creating test 1: {e}")
-    
-    st.write("**Test 2: With hover_data**")
-    try:
-        test_fig2 = px.treemap(
-            test_data,
-            path=[COL_OPD, COL_ESELON],
-            values="jumlah",
-            hover_data={"jumlah": True},
-            title="Test 2: With hover_data"
-        )
-        test_fig2.update_traces(
-            textinfo="label+value",
-            hovertemplate="<b>%{label}</b><br>Jumlah: %{customdata[0]:,}<extra></extra>"
-        )
-        st.plotly_chart(test_fig2, use_container_width=True)
-        st.success("Test 2: With hover_data created successfully!")
-    except Exception as e:
-        st.error(f"Error creating test 2: {e}")
+            st.plotly_chart(test_fig2, use_container_width=True)
+            st.success("Test 2: With hover_data created successfully!")
+        except Exception as e:
+            st.error(f"Error creating test 2: {e}")
     
-    st.write("**Test 3: With direct value**")
-    try:
-        test_fig3 = px.treemap(
-            test_data,
-            path=[COL_OPD, COL_ESELON],
-            values="jumlah",
-            title="Test 3: Direct value"
-        )
-        test_fig3.update_traces(
-            textinfo="label+value",
-            hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<extra></extra>"
-        )
-        st.plotly_chart(test_fig3, use_container_width=True)
-        st.success("Test 3: Direct value created successfully!")
-    except Exception as e:
-        st.error(f"Error creating test 3: {e}")
+        st.write("**Test 3: With direct value**")
+        try:
+            test_fig3 = px.treemap(
+                test_data,
+                path=[COL_OPD, COL_ESELON],
+                values="jumlah",
+                title="Test 3: Direct value"
+            )
+            test_fig3.update_traces(
+                textinfo="label+value",
+                hovertemplate="<b>%{label}</b><br>Jumlah: %{value}<extra></extra>"
+            )
+            st.plotly_chart(test_fig3, use_container_width=True)
+            st.success("Test 3: Direct value created successfully!")
+        except Exception as e:
+            st.error(f"Error creating test 3: {e}")
     
-    st.write("**Test 4: With customdata (same as main)**")
-    try:
-        test_fig4 = px.treemap(
-            test_data,
-            path=[COL_OPD, COL_ESELON],
-            values="jumlah",
-            title="Test 4: Customdata"
-        )
-        test_fig4.data[0].customdata = test_data[['jumlah']].values
-        test_fig4.update_traces(
-            textinfo="label+value",
-            hovertemplate="<b>%{label}</b><br>Jumlah: %{customdata[0]:,}<extra></extra>"
-        )
-        st.plotly_chart(test_fig4, use_container_width=True)
-        st.success("Test 4: Customdata created successfully!")
-        st.write(f"**Customdata shape:** {test_fig4.data[0].customdata.shape}")
-        st.write(f"**Customdata sample:** {test_fig4.data[0].customdata[:3].flatten()}")
-    except Exception as e:
-        st.error(f"Error creating test 4: {e}")
+        st.write("**Test 4: With customdata (same as main)**")
+        try:
+            test_fig4 = px.treemap(
+                test_data,
+                path=[COL_OPD, COL_ESELON],
+                values="jumlah",
+                title="Test 4: Customdata"
+            )
+            test_fig4.data[0].customdata = test_data[['jumlah']].values
+            test_fig4.update_traces(
+                textinfo="label+value",
+                hovertemplate="<b>%{label}</b><br>Jumlah: %{customdata[0]:,}<extra></extra>"
+            )
+            st.plotly_chart(test_fig4, use_container_width=True)
+            st.success("Test 4: Customdata created successfully!")
+            st.write(f"**Customdata shape:** {test_fig4.data[0].customdata.shape}")
+            st.write(f"**Customdata sample:** {test_fig4.data[0].customdata[:3].flatten()}")
+        except Exception as e:
+            st.error(f"Error creating test 4: {e}")
+
 
 st.plotly_chart(fig1, use_container_width=True)
 
@@ -356,15 +620,7 @@ st.subheader("📊 Data Detail - OPD → Eselon")
 st.info("💡 **Tips**: Jika nilai tidak muncul di treemap, gunakan tabel detail di bawah untuk melihat data lengkap dengan jumlah dan persentase.")
 with st.expander("Lihat Data Detail", expanded=False):
     # Show aggregated data in table format
-    display_data = agg1.copy()
-    display_data = display_data.sort_values('jumlah', ascending=False)
-    display_data['persentase'] = (display_data['jumlah'] / display_data['jumlah'].sum() * 100).round(2)
-    display_data = display_data.rename(columns={
-        COL_OPD: 'OPD',
-        COL_ESELON: 'Eselon',
-        'jumlah': 'Jumlah',
-        'persentase': 'Persentase (%)'
-    })
+    display_data = tampilan.detail_table(agg1)
     
     st.dataframe(display_data, use_container_width=True)
     
@@ -382,101 +638,82 @@ with st.expander("Lihat Data Detail", expanded=False):
 # ======================
 # 7. Treemap Detail: OPD → Eselon → (Unit …) → Jabatan
 # ======================
-st.subheader("Treemap 2: OPD → Eselon → Jabatan")
-path_hierarchy = [COL_OPD, COL_ESELON] + unit_cols_std + [COL_JAB]
+# Fragment: widget level-of-detail/drill-down hanya merender ulang seksi ini
+@st.fragment
+def treemap2_section(sections, view, filter_state, path_hierarchy):
+    st.subheader("Treemap 2: OPD → Eselon → Jabatan")
+    agg2 = sections.get("agg2", filter_state, lambda: build_agg2(view, path_hierarchy))
+
+    logger.info("Treemap 2 data shape: %s", agg2.shape)
+    if diagnostics:
+        logger.debug("Path hierarchy: %s", path_hierarchy)
+
+    # Level-of-detail: batasi jumlah daun jabatan yang dikirim ke browser
+    lod_col1, lod_col2, lod_col3 = st.columns(3)
+    with lod_col1:
+        lod_mode = st.toggle("Mode ringkas (level-of-detail)", value=True,
+                             help="Tampilkan top-N jabatan per eselon, sisanya digabung ke 'Lainnya'")
+    with lod_col2:
+        top_n = st.number_input("Top-N jabatan per eselon", min_value=1, max_value=500,
+                                value=TREEMAP2_TOP_N, disabled=not lod_mode)
+    with lod_col3:
+        max_leaves = st.number_input("Batas daun treemap", min_value=50, max_value=50000,
+                                     value=TREEMAP2_MAX_LEAVES, step=50, disabled=not lod_mode)
+    drill_opd = None
+    if lod_mode:
+        drill_opd = st.selectbox("Drill-down OPD", ["[SEMUA OPD]"] + sorted(agg2[COL_OPD].unique().tolist()))
+
+    def build_figure2():
+        plot_agg2, plot_path2, jabatan_hidden = agg2, path_hierarchy, False
+        if lod_mode:
+            src2 = agg2 if drill_opd == "[SEMUA OPD]" else agg2[agg2[COL_OPD] == drill_opd]
+            # top-N jabatan per induk; kalau induk sudah terlalu banyak, berhenti di level eselon/unit
+            plot_agg2, plot_path2, jabatan_hidden = tampilan.jabatan_leaves(src2, path_hierarchy, top_n, max_leaves)
+
+        with tracer.stage("figure2", rows_in=len(plot_agg2)):
+            fig2 = tampilan.figure_opd_eselon_jabatan(plot_agg2, plot_path2)
+        caption = (f"Treemap 2: {count_leaves(plot_agg2, plot_path2):,} daun dari {len(agg2):,} kombinasi jabatan | "
+                   f"payload ≈ {figure_payload_bytes(fig2) / 1024:,.0f} KB")
+        return fig2, caption, jabatan_hidden
+
+    fig2, caption, jabatan_hidden = sections.get(
+        "figure2", filter_state + (lod_mode, int(top_n), int(max_leaves), drill_opd), build_figure2
+    )
+    if jabatan_hidden:
+        st.caption("Level jabatan disembunyikan agar treemap tetap ringan — pilih OPD di 'Drill-down OPD' untuk melihat jabatan.")
 
-agg2 = (dff.groupby(path_hierarchy, dropna=False).size().reset_index(name="jumlah"))
+    logger.info("Treemap 2 created")
 
-for col in path_hierarchy:
-    agg2[col] = agg2[col].fillna("Tidak Diketahui")
-    agg2[col] = agg2[col].replace("", "Tidak Diketahui")
+    st.plotly_chart(fig2, use_container_width=True)
+    st.caption(caption)
 
-if COL_ESELON in path_hierarchy:
-    ord_map_df = df[[COL_ESELON, "__eselon_ord__"]].drop_duplicates().rename(columns={"__eselon_ord__":"__ord"})
-    agg2 = agg2.merge(ord_map_df, on=COL_ESELON, how="left").sort_values(["__ord"]).drop(columns=["__ord"])
+    # Data table for Treemap 2
+    st.subheader("📊 Data Detail - OPD → Eselon → Jabatan")
+    st.info("💡 **Tips**: Tabel ini menampilkan data jabatan lengkap dengan jumlah pegawai dan persentase.")
+    with st.expander("Lihat Data Detail Jabatan", expanded=False):
+        display_data2 = tampilan.detail_table(agg2, tampilan.unit_labels(unit_cols_std))
 
-logger.info(f"Treemap 2 data shape: {agg2.shape}")
-logger.info(f"Treemap 2 columns: {list(agg2.columns)}")
-logger.info(f"Path hierarchy: {path_hierarchy}")
+        st.dataframe(display_data2.head(20), use_container_width=True)
 
-# Create treemap with simple approach
-fig2 = px.treemap(
-    agg2,
-    path=path_hierarchy,
-    values="jumlah",
-    title="Treemap — OPD → Eselon → Jabatan"
-)
-fig2.update_layout(margin=dict(t=40,l=0,r=0,b=0))
-
-# Show values directly on treemap
-fig2.update_traces(
-    textinfo="label+value",
-    texttemplate="%{label}<br>%{value}",
-    textfont_size=10,
-    textposition="middle center"
-)
+        # Summary for Treemap 2
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total Jabatan", f"{display_data2['Jumlah'].sum():,}")
+        with col2:
+            st.metric("Jumlah Jabatan Unik", f"{display_data2['Jabatan'].nunique():,}")
+        with col3:
+            st.metric("Rata-rata per Jabatan", f"{display_data2['Jumlah'].mean():.1f}")
 
-logger.info("Treemap 2 created with simple approach")
-
-st.plotly_chart(fig2, use_container_width=True)
-
-# Data table for Treemap 2
-st.subheader("📊 Data Detail - OPD → Eselon → Jabatan")
-st.info("💡 **Tips**: Tabel ini menampilkan data jabatan lengkap dengan jumlah pegawai dan persentase.")
-with st.expander("Lihat Data Detail Jabatan", expanded=False):
-    display_data2 = agg2.copy()
-    display_data2 = display_data2.sort_values('jumlah', ascending=False)
-    display_data2['persentase'] = (display_data2['jumlah'] / display_data2['jumlah'].sum() * 100).round(2)
-    display_data2 = display_data2.rename(columns={
-        COL_OPD: 'OPD',
-        COL_ESELON: 'Eselon',
-        COL_JAB: 'Jabatan',
-        'jumlah': 'Jumlah',
-        'persentase': 'Persentase (%)'
-    })
-    
-    st.dataframe(display_data2.head(20), use_container_width=True)
-    
-    # Summary for Treemap 2
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Total Jabatan", f"{display_data2['Jumlah'].sum():,}")
-    with col2:
-        st.metric("Jumlah Jabatan Unik", f"{display_data2['Jabatan'].nunique():,}")
-    with col3:
-        st.metric("Rata-rata per Jabatan", f"{display_data2['Jumlah'].mean():.1f}")
+treemap2_section(sections, view, filter_state, path_hierarchy)
 
 # ======================
 # 8. Treemap Tambahan: OPD → Golongan
 # ======================
 st.subheader("Treemap 3: OPD → Golongan")
-agg3 = (dff.groupby([COL_OPD, COL_GOL], dropna=False).size().reset_index(name="jumlah"))
-
-for col in [COL_OPD, COL_GOL]:
-    agg3[col] = agg3[col].fillna("Tidak Diketahui")
-    agg3[col] = agg3[col].replace("", "Tidak Diketahui")
+agg3, fig3 = sections.get("treemap3", filter_state, lambda: build_treemap3(view))
 
-logger.info(f"Treemap 3 data shape: {agg3.shape}")
-logger.info(f"Treemap 3 columns: {list(agg3.columns)}")
-
-# Create treemap with simple approach
-fig3 = px.treemap(
-    agg3,
-    path=[COL_OPD, COL_GOL],
-    values="jumlah",
-    title="Treemap — OPD → Golongan"
-)
-fig3.update_layout(margin=dict(t=40,l=0,r=0,b=0))
-
-# Show values directly on treemap
-fig3.update_traces(
-    textinfo="label+value",
-    texttemplate="%{label}<br>%{value}",
-    textfont_size=12,
-    textposition="middle center"
-)
-
-logger.info("Treemap 3 created with simple approach")
+logger.info("Treemap 3 data shape: %s", agg3.shape)
+logger.info("Treemap 3 created")
 
 st.plotly_chart(fig3, use_container_width=True)
 
@@ -484,15 +721,7 @@ st.plotly_chart(fig3, use_container_width=True)
 st.subheader("📊 Data Detail - OPD → Golongan")
 st.info("💡 **Tips**: Tabel ini menampilkan distribusi pegawai berdasarkan OPD dan golongan dengan persentase.")
 with st.expander("Lihat Data Detail Golongan", expanded=False):
-    display_data3 = agg3.copy()
-    display_data3 = display_data3.sort_values('jumlah', ascending=False)
-    display_data3['persentase'] = (display_data3['jumlah'] / display_data3['jumlah'].sum() * 100).round(2)
-    display_data3 = display_data3.rename(columns={
-        COL_OPD: 'OPD',
-        COL_GOL: 'Golongan',
-        'jumlah': 'Jumlah',
-        'persentase': 'Persentase (%)'
-    })
+    display_data3 = tampilan.detail_table(agg3)
     
     st.dataframe(display_data3, use_container_width=True)
     
@@ -506,23 +735,149 @@ with st.expander("Lihat Data Detail Golongan", expanded=False):
         st.metric("Rata-rata per Golongan", f"{display_data3['Jumlah'].mean():.1f}")
 
 # ======================
-# 9. Pivot Table: OPD × Golongan
+# 9. Pivot Table (default OPD × Golongan)
 # ======================
-st.subheader("📑 Ringkasan Tabel Pivot — OPD × Golongan")
-pivot = pd.pivot_table(dff, 
-                       index=COL_OPD, 
-                       columns=COL_GOL, 
-                       values=COL_JAB, 
-                       aggfunc="count", 
-                       fill_value=0,
-                       margins=True, 
-                       margins_name="Total")
-st.dataframe(pivot)
+# pandas: kode category baris terfilter (bincount 2-D); duckdb: GROUP BY lalu dibentuk
+# jadi tabel. Golongan urut I/a … IV/e
+pivot_dims = {COL_OPD: "OPD", COL_GOL: "Golongan", COL_ESELON: "Eselon", COL_JJENIS: "Jenis Jabatan"}
+pivot_dims.update(tampilan.unit_labels(unit_cols_std))
+pivot_dims = {col: label for col, label in pivot_dims.items() if col in backend.columns}
+
+# Fragment: ganti dimensi pivot hanya merender ulang seksi ini
+@st.fragment
+def pivot_section(sections, view, filter_state, pivot_dims, export_fmt):
+    pv_col1, pv_col2 = st.columns(2)
+    with pv_col1:
+        pivot_index = st.selectbox("Baris pivot", list(pivot_dims), format_func=pivot_dims.get)
+    with pv_col2:
+        column_choices = [c for c in pivot_dims if c != pivot_index]
+        pivot_columns = st.selectbox("Kolom pivot", column_choices, format_func=pivot_dims.get,
+                                     index=column_choices.index(COL_GOL) if COL_GOL in column_choices else 0)
+    pivot_title = f"{pivot_dims[pivot_index]} × {pivot_dims[pivot_columns]}"
+
+    def build_pivot():
+        with tracer.stage("pivot", rows_in=view.n_rows) as stage:
+            pivot = view.pivot(pivot_index, pivot_columns, margins_name="Total")
+            stage.rows_out = len(pivot)
+        return pivot
+
+    st.subheader(f"📑 Ringkasan Tabel Pivot — {pivot_title}")
+    pivot = sections.get("pivot", filter_state + (pivot_index, pivot_columns), build_pivot)
+    st.dataframe(pivot)
+
+    # Export pivot (format sama dengan export data)
+    st.download_button(
+        label=f"💾 Download Pivot {pivot_title} ({EXPORT_FORMATS[export_fmt][0]})",
+        data=export_opener(export_key("pivot", *filter_state, pivot_index, pivot_columns, export_fmt), export_fmt,
+                           lambda table=pivot: table, index=True),
+        file_name=f"pivot_{pivot_index}_{pivot_columns}.{export_fmt}",
+        mime=EXPORT_FORMATS[export_fmt][1],
+        on_click="ignore",
+    )
 
-# Export pivot
-st.download_button(
-    label="💾 Download Pivot OPD × Golongan (CSV)",
-    data=pivot.to_csv().encode("utf-8"),
-    file_name="pivot_opd_golongan.csv",
-    mime="text/csv"
-)
+pivot_section(sections, view, filter_state, pivot_dims, export_fmt)
+
+# ======================
+# 9.5. Perbandingan antar snapshot
+# ======================
+# Tiap snapshot dimuat sekali per proses (hanya NIP + OPD/golongan/eselon sebagai kode integer);
+# perpindahan antar periode = hash join pada peg_nip + histogram kode, bukan merge DataFrame.
+@st.fragment
+def comparison_section():
+    st.subheader("🔀 Perbandingan Antar Snapshot")
+    snapshots = sorted(list_snapshots(), key=lambda i: i.created)
+    if len(snapshots) < 2:
+        st.info(f"Butuh minimal 2 snapshot di folder '{SNAPSHOT_DIR}' untuk membandingkan periode.")
+        return
+    chosen = st.multiselect("Snapshot (urut per periode)", snapshots, default=snapshots[-2:],
+                            format_func=lambda i: i.label)
+    if len(chosen) < 2:
+        st.info("Pilih minimal 2 snapshot.")
+        return
+    chosen = sorted(chosen, key=lambda i: i.created)
+    with tracer.stage("comparison_load"):
+        try:
+            comparison = load_comparison(tuple((i.path, os.path.getmtime(i.path)) for i in chosen), canonical_mode)
+        except (KeyError, ValueError) as e:
+            st.error(f"Snapshot tidak bisa dibandingkan: {e}")
+            return
+
+    st.markdown("**Ringkasan per periode berurutan**")
+    st.dataframe(comparison.summary(), hide_index=True, use_container_width=True)
+    dropped = {p.label: p.dropped for p in comparison.periods if p.dropped}
+    if dropped:
+        st.caption("Baris tanpa NIP valid/duplikat dilewati: " + ", ".join(f"{k}: {v:,}" for k, v in dropped.items()))
+
+    labels = [p.label for p in comparison.periods]
+    cmp_col1, cmp_col2, cmp_col3 = st.columns(3)
+    with cmp_col1:
+        a = st.selectbox("Dari periode", range(len(labels)), format_func=labels.__getitem__)
+    with cmp_col2:
+        b = st.selectbox("Ke periode", range(len(labels)), index=len(labels) - 1, format_func=labels.__getitem__)
+    with cmp_col3:
+        dim = st.selectbox("Dimensi", comparison.dims, format_func=MOVE_DIMENSIONS.get)
+    if a == b:
+        st.info("Pilih dua periode yang berbeda.")
+        return
+    turnover = st.toggle("Ikutkan pegawai masuk/keluar", value=False)
+
+    with tracer.stage("comparison", rows_in=len(comparison.periods[a].nip)) as stage:
+        matrix = comparison.matrix(a, b, dim)
+        flows = comparison.flows(a, b, dim, moved_only=True, turnover=turnover)
+        stage.rows_out = len(flows)
+
+    title = f"Perpindahan {MOVE_DIMENSIONS[dim]}: {labels[a]} → {labels[b]}"
+    if flows.empty:
+        st.info("Tidak ada perpindahan pada dimensi ini.")
+    else:
+        st.plotly_chart(sankey_figure(flows, title), use_container_width=True)
+        if len(flows) > SANKEY_TOP_N:
+            st.caption(f"Sankey: {SANKEY_TOP_N} aliran terbesar dari {len(flows):,} "
+                       f"({flows['jumlah'].head(SANKEY_TOP_N).sum():,} dari {flows['jumlah'].sum():,} pegawai)")
+        st.plotly_chart(treemap_figure(flows, ["dari", "ke"], f"Treemap — {title}"), use_container_width=True)
+    with st.expander("Matriks perpindahan (baris = asal, kolom = tujuan)"):
+        st.dataframe(matrix.loc[matrix.sum(axis=1) > 0, matrix.sum(axis=0) > 0], use_container_width=True)
+
+comparison_section()
+
+# ======================
+# 10. Panel timing per tahap
+# ======================
+if TRACE_DIR:
+    tracer.dump(os.path.join(TRACE_DIR, "app_trace.csv"))
+
+if show_timing:
+    st.sidebar.subheader("⏱️ Timing rerun ini")
+    trace_df = tracer.to_frame()
+    st.sidebar.metric("Total (detik)", f"{trace_df['seconds'].sum():.3f}")
+    section_stats = sections.stats()
+    st.sidebar.caption(f"Seksi dipakai ulang: {section_stats['hits']} | dihitung: {section_stats['misses']}")
+    st.sidebar.dataframe(trace_df[["stage", "seconds", "rows_in", "rows_out", "mem_peak_mb"]],
+                         hide_index=True, use_container_width=True)
+    st.sidebar.download_button("Download trace (JSON)", tracer.to_json().encode("utf-8"),
+                               file_name=f"trace_{tracer.run_id}.json", mime="application/json")
+    st.sidebar.download_button("Download trace (CSV)", trace_df.to_csv(index=False).encode("utf-8"),
+                               file_name=f"trace_{tracer.run_id}.csv", mime="text/csv")
+
+# ======================
+# 11. Memori per sesi
+# ======================
+# Objek yang dipegang rerun ini; data, cube, indeks filter dan hasil seksi dibagi antar sesi lewat
+# cache bersama (kecuali salinan delta milik sesi).
+session_mem = pd.DataFrame(backend.memory_usage() + [dict(row, dibagi=True) for row in view.memory_usage()])
+per_session_mb = session_mem.loc[~session_mem["dibagi"], "MB"].sum()
+rss = process_rss_bytes()
+st.sidebar.subheader("🧠 Memori")
+st.sidebar.metric("Per sesi (MB)", f"{per_session_mb:,.1f}",
+                  help="Objek yang disalin per sesi; yang 'dibagi' hanya dihitung sekali per proses")
+if rss is not None:
+    st.sidebar.caption(f"RSS proses server: {rss / 2**20:,.0f} MB")
+cache_stats = SHARED_CACHE.stats()
+st.sidebar.caption(f"Cache bersama: {cache_stats['MB']:,.0f} / {cache_stats['batas_MB']:,.0f} MB, "
+                   f"{cache_stats['entri']} entri | hit {cache_stats['hit']:,}, miss {cache_stats['miss']:,}, "
+                   f"eviction {cache_stats['eviction']:,}")
+with st.sidebar.expander("Rincian memori"):
+    st.dataframe(session_mem.round({"MB": 2}), hide_index=True, use_container_width=True)
+    st.dataframe(backend.column_report(), hide_index=True, use_container_width=True)
+    st.dataframe(SHARED_CACHE.report().groupby("jenis", sort=False)["MB"].agg(["count", "sum"]).round(2),
+                 use_container_width=True)
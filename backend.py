@@ -0,0 +1,247 @@
+"""Backend query untuk filter + agregasi di app.py.
+
+- `PandasBackend` (default): cube agregat + indeks bitmap di memori.
+- `DuckDBBackend` (opsional, `pip install duckdb`): data (DataFrame atau snapshot
+  Arrow memory-mapped) didaftarkan ke DuckDB in-process; filter dan semua agregasi
+  (treemap, pivot, audit) dijalankan sebagai SQL multi-core, dan hanya hasil
+  agregat kecil yang kembali ke pandas/Plotly.
+
+Keduanya punya antarmuka sama: `backend.filter(**seleksi)` menghasilkan view dengan
+`rollup(dims)`, `pivot(index, columns)` dan `frame()` (baris mentah untuk export).
+Dipilih saat startup lewat env KEPEGAWAIAN_BACKEND=pandas|duckdb.
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+from compact import memory_report
+from cube import COUNT_COL, filter_cube, rollup, value_counts
+from pipeline import COL_OPD, COL_ESELON, COL_GOL
+from pivot import pivot_codes, pivot_from_counts
+
+BACKENDS = ("pandas", "duckdb")
+DUCKDB_THREADS = os.environ.get("KEPEGAWAIAN_DUCKDB_THREADS")   # default: semua core
+DUCKDB_MEMORY_LIMIT = os.environ.get("KEPEGAWAIAN_DUCKDB_MEMORY_LIMIT")  # mis. "4GB"
+
+
+def _active(selected):
+    """Seleksi yang benar-benar memfilter (None/list kosong = semua)."""
+    return selected is not None and (isinstance(selected, str) or len(selected) > 0)
+
+
+# ======================
+# pandas: cube + FilterIndex
+# ======================
+class PandasBackend:
+    name = "pandas"
+
+    def __init__(self, df, cube, filter_index, shared=False):
+        self.df = df
+        self.cube = cube
+        self.filter_index = filter_index
+        self.shared = shared   # df, cube & indeks berasal dari cache bersama (dibagi antar sesi)
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    @property
+    def n_rows(self):
+        return len(self.df)
+
+    def dtypes(self):
+        return self.df.dtypes.astype(str)
+
+    def head(self, n, columns):
+        return self.df[columns].head(n)
+
+    def options(self, col):
+        present = self.cube.loc[self.cube[COUNT_COL] > 0, col]
+        return sorted(present.dropna().unique().tolist())
+
+    def value_counts(self, col):
+        return value_counts(self.cube, col)
+
+    def filter(self, **selections):
+        cube_f = filter_cube(self.cube, eselon=selections.get(COL_ESELON),
+                             opd=selections.get(COL_OPD), golongan=selections.get(COL_GOL))
+        return PandasView(self.df, cube_f, self.filter_index.select(**selections))
+
+    def memory_usage(self):
+        return [
+            {"objek": "data (df)", "MB": memory_report(self.df)["total_bytes"].sum() / 2**20, "dibagi": self.shared},
+            {"objek": "cube", "MB": memory_report(self.cube)["total_bytes"].sum() / 2**20, "dibagi": self.shared},
+            {"objek": "indeks filter", "MB": self.filter_index.nbytes / 2**20, "dibagi": self.shared},
+        ]
+
+    def column_report(self):
+        return memory_report(self.df)
+
+
+class PandasView:
+    def __init__(self, df, cube_f, rows):
+        self.df = df
+        self.cube_f = cube_f
+        self.rows = rows
+        self.n_rows = len(rows)
+        self.grain = len(cube_f)   # baris yang dipindai agregasi (kombinasi cube)
+
+    def rollup(self, dims):
+        return rollup(self.cube_f, dims)
+
+    def pivot(self, index, columns, margins_name="Total"):
+        return pivot_codes(self.df, index, columns, rows=self.rows, margins_name=margins_name)
+
+    def frame(self):
+        return self.df.iloc[self.rows]
+
+    @property
+    def nbytes(self):
+        """Memori milik view saja (df dibagi dengan backend)."""
+        return self.rows.nbytes + int(self.cube_f.memory_usage(deep=True).sum())
+
+    def memory_usage(self):
+        return [{"objek": "posisi baris terfilter", "MB": self.rows.nbytes / 2**20, "dibagi": False}]
+
+
+# ======================
+# DuckDB (opsional)
+# ======================
+def duckdb_available():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _q(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+class DuckDBBackend:
+    """Tabel Arrow terdaftar di DuckDB in-process; satu cursor per query (aman dipakai banyak sesi)."""
+
+    name = "duckdb"
+    TABLE = "pegawai"
+
+    def __init__(self, table):
+        import duckdb
+        self.table = table   # pyarrow.Table (boleh memory-mapped dari snapshot)
+        self.con = duckdb.connect()
+        if DUCKDB_THREADS:
+            self.con.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+        if DUCKDB_MEMORY_LIMIT:
+            self.con.execute("SET memory_limit = ?", [DUCKDB_MEMORY_LIMIT])
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        import pyarrow as pa
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    @classmethod
+    def from_snapshot(cls, path):
+        from snapshot import load_snapshot_table
+        table, info = load_snapshot_table(path)
+        return cls(table), info
+
+    def query(self, sql, params=None):
+        with self._lock:
+            cur = self.con.cursor()
+        try:
+            cur.register(self.TABLE, self.table)
+            return cur.execute(sql, params or []).df()
+        finally:
+            cur.close()
+
+    @property
+    def columns(self):
+        return list(self.table.column_names)
+
+    @property
+    def n_rows(self):
+        return self.table.num_rows
+
+    def dtypes(self):
+        return pd.Series({f.name: str(f.type) for f in self.table.schema}, name="dtype")
+
+    def head(self, n, columns):
+        cols = ", ".join(map(_q, columns))
+        return self.query(f"SELECT {cols} FROM {self.TABLE} LIMIT {int(n)}")
+
+    def options(self, col):
+        values = self.query(f"SELECT DISTINCT {_q(col)}::VARCHAR AS v FROM {self.TABLE} WHERE {_q(col)} IS NOT NULL")
+        return sorted(values["v"].tolist())
+
+    def value_counts(self, col):
+        counts = self.query(
+            f"SELECT {_q(col)}::VARCHAR AS {_q(col)}, count(*) AS count FROM {self.TABLE}"
+            f" WHERE {_q(col)} IS NOT NULL GROUP BY 1 ORDER BY count DESC"
+        )
+        return counts.set_index(col)["count"]
+
+    def filter(self, **selections):
+        clauses, params = [], []
+        for col, selected in selections.items():
+            if not _active(selected):
+                continue
+            if isinstance(selected, str):
+                clauses.append(f"{_q(col)}::VARCHAR = ?")
+                params.append(selected)
+            else:
+                clauses.append(f"{_q(col)}::VARCHAR IN (SELECT unnest(?::VARCHAR[]))")
+                params.append(list(selected))
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return DuckDBView(self, where, params)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def memory_usage(self):
+        return [{"objek": "tabel Arrow (DuckDB)", "MB": self.table.nbytes / 2**20, "dibagi": True}]
+
+    def column_report(self):
+        rows = [{"kolom": name, "dtype": str(col.type), "total_bytes": col.nbytes}
+                for name, col in zip(self.table.column_names, self.table.columns)]
+        return pd.DataFrame(rows)
+
+
+class DuckDBView:
+    def __init__(self, backend, where, params):
+        self.backend = backend
+        self.where = where
+        self.params = params
+        self._n_rows = None
+
+    @property
+    def n_rows(self):
+        if self._n_rows is None:
+            result = self.backend.query(f"SELECT count(*) AS n FROM {self.backend.TABLE}{self.where}", self.params)
+            self._n_rows = int(result["n"].iloc[0])
+        return self._n_rows
+
+    @property
+    def grain(self):
+        return self.n_rows
+
+    def rollup(self, dims):
+        cols = ", ".join(map(_q, dims))
+        return self.backend.query(
+            f"SELECT {cols}, count(*) AS {COUNT_COL} FROM {self.backend.TABLE}{self.where}"
+            f" GROUP BY ALL ORDER BY {cols}",
+            self.params,
+        )
+
+    def pivot(self, index, columns, margins_name="Total"):
+        agg = self.rollup([index, columns])
+        return pivot_from_counts(agg, index, columns, COUNT_COL, margins_name)
+
+    def frame(self):
+        return self.backend.query(f"SELECT * FROM {self.backend.TABLE}{self.where}", self.params)
+
+    def memory_usage(self):
+        return []   # hasil filter tidak disimpan; tiap agregasi query ulang
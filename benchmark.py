@@ -0,0 +1,246 @@
+"""Benchmark pipeline di atas data sintetis (data_sintetis.py).
+
+Tahap yang diukur per ukuran data: load (CSV, snapshot Arrow), normalisasi,
+klasifikasi eselon, filter, agregasi (cube/rollup), pivot dan pembuatan figure
+treemap. Tiap tahap diulang `--repeat` kali lewat instrumentasi.Tracer; yang
+dilaporkan median dan minimum. Dengan `--legacy`, implementasi lama (map/apply
+per baris, df.copy + isin, pivot_table, px.treemap) ikut diukur sebagai acuan.
+
+Hasil disimpan ke bench_results/<commit>.json supaya bisa dibandingkan antar commit:
+    python benchmark.py --sizes 10000 100000 1000000 --repeat 3
+    python benchmark.py --compare bench_results/a4b39be.json bench_results/HEAD.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+from cube import build_cube, filter_cube, pivot_counts, rollup
+from data_sintetis import generate, write
+from delta import DeltaDataset
+from filter_index import FilterIndex
+from instrumentasi import Tracer
+from kanonik import AliasMap
+from laporan import plan_tasks, render_scope
+from klasifikasi_eselon import classify_eselon, infer_eselon
+from normalisasi import norm_space, normalize_column
+from perbandingan import Comparison, load_period
+from pipeline import COL_OPD, COL_ESELON, COL_JAB, COL_GOL, COL_JJENIS, COL_NIP, order_map, prepare_df, read_table
+from pivot import pivot_codes
+from snapshot import load_snapshot, write_snapshot
+from treemap import TREEMAP2_TOP_N, collapse_top_n, treemap_figure
+
+BENCH_DIR = "bench_results"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+LEGACY_MAX_ROWS = 200_000   # apply/px.treemap per baris terlalu lambat di atas ini
+
+
+def git_commit():
+    """Hash commit pendek; diberi akhiran -dirty kalau ada perubahan yang belum di-commit."""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "-uno"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return sha + ("-dirty" if dirty else "")
+
+
+def _bench(tracer, name, fn, repeat, rows_in=None):
+    out = None
+    for _ in range(repeat):
+        with tracer.stage(name, rows_in=rows_in) as rec:
+            out = fn()
+            result = out[0] if isinstance(out, tuple) else out
+            rec.rows_out = len(result) if hasattr(result, "__len__") else None
+    return out
+
+
+def _sort_eselon(agg):
+    return agg.sort_values(COL_ESELON, key=lambda s: s.astype(object).str.upper().map(order_map).fillna(99),
+                           kind="stable")
+
+
+def run_size(n_rows, repeat, work_dir, legacy=False, seed=0, track_memory=False):
+    """Jalankan semua tahap untuk satu ukuran data; return Tracer berisi semua pengulangan."""
+    tracer = Tracer(f"bench-{n_rows}", track_memory=track_memory, meta={"rows": n_rows})
+    legacy = legacy and n_rows <= LEGACY_MAX_ROWS
+
+    csv_path = write(generate(n_rows, seed=seed), os.path.join(work_dir, f"sintetis_{n_rows}.csv"))
+
+    # Load
+    raw = _bench(tracer, "load_csv", lambda: read_table(csv_path, csv_path), repeat)
+    df, unit_cols_std = _bench(tracer, "prepare_df", lambda: prepare_df(raw.copy()), repeat, n_rows)
+    snap = write_snapshot(df, unit_cols_std, os.path.basename(csv_path), str(n_rows), snapshot_dir=work_dir)
+    _bench(tracer, "load_snapshot", lambda: load_snapshot(snap)[0], repeat)
+
+    # Normalisasi
+    _bench(tracer, "normalize_column", lambda: normalize_column(raw[COL_JAB], upper=True), repeat, n_rows)
+    if legacy:
+        _bench(tracer, "legacy_norm_space_map", lambda: raw[COL_JAB].map(lambda x: norm_space(x, upper=True)),
+               repeat, n_rows)
+
+    # Kanonikalisasi nama jabatan (peta alias baru, tanpa file)
+    jab = normalize_column(raw[COL_JAB])
+    _bench(tracer, "canonicalize_jabatan", lambda: AliasMap().apply(jab, COL_JAB), repeat, len(jab.cat.categories))
+
+    # Klasifikasi
+    keys = pd.DataFrame({c: normalize_column(raw[c], upper=True) for c in [COL_JAB, COL_JJENIS]})
+    _bench(tracer, "classify_eselon", lambda: classify_eselon(keys), repeat, n_rows)
+    if legacy:
+        ref = keys.astype(object)
+        ref = ref.where(ref.notna(), None)
+        _bench(tracer, "legacy_infer_eselon_apply",
+               lambda: ref.apply(lambda r: infer_eselon(r[COL_JAB], r[COL_JJENIS]), axis=1), repeat, n_rows)
+
+    # Filter: 5 OPD terbesar, golongan III
+    opd = df[COL_OPD].value_counts().index[:5].tolist()
+    gol = [g for g in df[COL_GOL].cat.categories if str(g).startswith("III/")]
+    fidx = _bench(tracer, "filter_index_build", lambda: FilterIndex(df, [COL_ESELON, COL_OPD, COL_GOL]),
+                  repeat, n_rows)
+    _bench(tracer, "filter_select", lambda: df.iloc[fidx.select(**{COL_OPD: opd, COL_GOL: gol})],
+           repeat, n_rows)
+    if legacy:
+        def isin_chain():
+            dff = df.copy()
+            dff = dff[dff[COL_OPD].isin(opd)]
+            return dff[dff[COL_GOL].isin(gol)]
+        _bench(tracer, "legacy_filter_isin", isin_chain, repeat, n_rows)
+
+    # Agregasi
+    cube = _bench(tracer, "build_cube", lambda: build_cube(df, unit_cols_std), repeat, n_rows)
+    _bench(tracer, "filter_cube", lambda: filter_cube(cube, opd=opd, golongan=gol), repeat, len(cube))
+    path2 = [COL_OPD, COL_ESELON] + unit_cols_std + [COL_JAB]
+    agg1 = _bench(tracer, "rollup_agg1", lambda: rollup(cube, [COL_OPD, COL_ESELON]), repeat, len(cube))
+    agg2 = _bench(tracer, "rollup_agg2", lambda: rollup(cube, path2), repeat, len(cube))
+    if legacy:
+        _bench(tracer, "legacy_groupby_agg2",
+               lambda: df.groupby(path2, dropna=False, observed=True).size().reset_index(name="jumlah"),
+               repeat, n_rows)
+
+    # Pivot
+    _bench(tracer, "pivot_counts", lambda: pivot_counts(cube), repeat, len(cube))
+    _bench(tracer, "pivot_codes", lambda: pivot_codes(df, COL_OPD, COL_GOL), repeat, n_rows)
+    if legacy:
+        _bench(tracer, "legacy_pivot_table",
+               lambda: pd.pivot_table(df, index=COL_OPD, columns=COL_GOL, values=COL_JAB, aggfunc="count",
+                                      fill_value=0, margins=True, observed=True),
+               repeat, n_rows)
+
+    # Delta: 0,1% pegawai pindah golongan, diterapkan ke dataset + cube + indeks yang sudah ada
+    if COL_NIP in df.columns and gol:
+        changes = pd.DataFrame({COL_NIP: df[COL_NIP].dropna().sample(max(1, n_rows // 1000), random_state=seed)
+                                .astype(str).to_numpy(), COL_GOL: gol[0]})
+        dataset = DeltaDataset(df.copy(), unit_cols_std, cube.copy(), fidx.copy())
+        _bench(tracer, "delta_apply", lambda: dataset.apply(changes), repeat, len(changes))
+
+        # Perbandingan periode: snapshot awal vs hasil delta
+        snap2 = write_snapshot(dataset.df, unit_cols_std, "periode2.csv", f"{n_rows}-2", snapshot_dir=work_dir)
+        periods = _bench(tracer, "period_load", lambda: [load_period(snap), load_period(snap2)], repeat, 2 * n_rows)
+        _bench(tracer, "comparison_matrix", lambda: Comparison(periods).matrix(0, 1, COL_GOL), repeat, n_rows)
+
+    # Figure
+    agg1 = _sort_eselon(agg1)
+    _bench(tracer, "figure1", lambda: treemap_figure(agg1, [COL_OPD, COL_ESELON], "Treemap 1"),
+           repeat, len(agg1))
+    agg2 = _sort_eselon(agg2)
+    lod = _bench(tracer, "collapse_top_n", lambda: collapse_top_n(agg2, path2[:-1], COL_JAB, TREEMAP2_TOP_N),
+                 repeat, len(agg2))
+    fig2 = _bench(tracer, "figure2_lod", lambda: treemap_figure(_sort_eselon(lod), path2, "Treemap 2"),
+                  repeat, len(lod))
+    _bench(tracer, "figure2_to_json", lambda: fig2.to_json(), repeat, len(lod))
+    # Laporan headless: agregat + potongan per OPD sekali, lalu render OPD terbesar
+    tasks = _bench(tracer, "report_plan", lambda: plan_tasks(df, unit_cols_std, os.path.join(work_dir, "laporan")),
+                   repeat, n_rows)
+    _bench(tracer, "report_render_opd", lambda: render_scope(tasks[1]), repeat, len(tasks[1]["r2"]))
+    if legacy:
+        import plotly.express as px
+        _bench(tracer, "legacy_px_treemap_agg1",
+               lambda: px.treemap(agg1.astype({COL_OPD: object, COL_ESELON: object}).dropna(),
+                                  path=[COL_OPD, COL_ESELON], values="jumlah"),
+               repeat, len(agg1))
+    return tracer
+
+
+def summarize(tracers):
+    """Ringkas semua pengulangan: median/min detik per (rows, stage)."""
+    frames = []
+    for tracer in tracers:
+        frame = tracer.to_frame()
+        frame["rows"] = tracer.meta["rows"]
+        frames.append(frame)
+    data = pd.concat(frames, ignore_index=True)
+    return (data.groupby(["rows", "stage"], sort=False)
+                .agg(median_s=("seconds", "median"), min_s=("seconds", "min"),
+                     rows_in=("rows_in", "first"), rows_out=("rows_out", "first"),
+                     mem_peak_mb=("mem_peak_mb", "max"))
+                .reset_index())
+
+
+def save_results(summary, out_path, args):
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    payload = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": summary.astype(object).where(summary.notna(), None).to_dict(orient="records"),
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, default=str)
+    return out_path
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    frame = pd.DataFrame(payload["results"])
+    frame["commit"] = payload["commit"]
+    return frame
+
+
+def compare(base_path, new_path):
+    """Tabel median detik base vs new per (rows, stage) dengan rasio percepatan."""
+    base, new = load_results(base_path), load_results(new_path)
+    table = base.merge(new, on=["rows", "stage"], how="outer", suffixes=("_base", "_new"), sort=False)
+    table["speedup"] = (table["median_s_base"] / table["median_s_new"]).round(2)
+    return table[["rows", "stage", "median_s_base", "median_s_new", "speedup"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline analisa kepegawaian di data sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="jumlah baris (10k – 5M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", action="store_true",
+                        help=f"ukur juga implementasi lama (hanya untuk ≤ {LEGACY_MAX_ROWS:,} baris)")
+    parser.add_argument("--track-memory", action="store_true", help="ukur puncak memori per tahap (tracemalloc)")
+    parser.add_argument("--out", help=f"path hasil JSON (default: {BENCH_DIR}/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="bandingkan dua file hasil")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(*args.compare).to_string(index=False))
+        sys.exit(0)
+
+    tracers = []
+    with tempfile.TemporaryDirectory(prefix="bench_") as work_dir:
+        for n in args.sizes:
+            print(f"== {n:,} baris", flush=True)
+            tracers.append(run_size(n, args.repeat, work_dir, legacy=args.legacy, seed=args.seed,
+                                    track_memory=args.track_memory))
+    summary = summarize(tracers)
+    print(summary.to_string(index=False))
+    out = save_results(summary, args.out or os.path.join(BENCH_DIR, f"{git_commit()}.json"), args)
+    print(f"Hasil disimpan ke {out}")
@@ -0,0 +1,168 @@
+"""Cache bersama satu proses server: dataset siap pakai dan agregatnya.
+
+Semua sesi Streamlit berjalan sebagai thread di proses yang sama, jadi satu
+objek `SHARED_CACHE` di modul ini dipakai bersama: file rekap yang sama (hash
+isi) hanya di-parse sekali, dan cube, indeks filter serta hasil seksi untuk
+state filter yang sama dihitung sekali untuk semua analis. Per sesi hanya
+tersisa pilihan widget/filter.
+
+Kapasitas dibatasi dalam byte (env KEPEGAWAIAN_CACHE_MB); kalau lewat batas,
+entri yang paling lama tidak dipakai dibuang (LRU). Entri yang dibuang baru
+benar-benar lepas dari memori setelah tidak ada sesi yang sedang memakainya.
+Nilai di cache dibagi tanpa copy: pemakai tidak boleh mengubahnya in-place.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CACHE_MB = float(os.environ.get("KEPEGAWAIAN_CACHE_MB", 2048))
+
+
+def _plotly_nbytes(value):
+    """Ukuran properti plotly (dict/array/list hasil `_props`, tanpa deepcopy/serialisasi JSON)."""
+    if isinstance(value, dict):
+        return sum(_plotly_nbytes(v) for v in value.values())
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(map(sys.getsizeof, value.ravel()))
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (str, int, float)):
+            return sys.getsizeof(value) + sum(map(sys.getsizeof, value))
+        return sys.getsizeof(value) + sum(_plotly_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def figure_nbytes(fig):
+    """Perkiraan memori figure plotly dari array di trace + layout (to_json menyerialisasi semuanya)."""
+    return sum(_plotly_nbytes(trace._props) for trace in fig.data) + _plotly_nbytes(fig.layout._props)
+
+
+def object_nbytes(obj, _seen=None):
+    """Perkiraan memori objek cache (DataFrame/array/figure/tuple/dict, atau atribut `nbytes`)."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(object_nbytes(v, seen) for v in obj)
+    if isinstance(obj, dict):
+        return sum(object_nbytes(v, seen) for v in obj.values())
+    if hasattr(obj, "to_plotly_json"):
+        return figure_nbytes(obj)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    return sys.getsizeof(obj)
+
+
+class SharedCache:
+    """LRU thread-safe dengan batas byte; `get_or_build` membangun tiap key sekali walau diminta bersamaan."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (nilai, byte)
+        self._building = {}             # key -> Event, sedang dibangun oleh thread lain
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        """Simpan `value`; entri terlama dibuang sampai total di bawah batas.
+
+        Nilai yang sendirian lebih besar dari batas tidak disimpan (dihitung sebagai eviction).
+        """
+        size = object_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.max_bytes:
+                self.evictions += 1
+                return value
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return value
+
+    def get_or_build(self, key, build, nbytes=None):
+        """Nilai `key` dari cache, atau `build()` lalu simpan. Thread lain yang minta key sama menunggu hasilnya."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                pending = self._building.get(key)
+                if pending is None:
+                    pending = self._building[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # dibangun thread lain; kalau gagal atau langsung terbuang, coba sendiri
+            pending.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+        try:
+            return self.put(key, build(), nbytes)
+        finally:
+            with self._lock:
+                del self._building[key]
+            pending.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {"entri": len(self._entries), "MB": self.nbytes / 2**20, "batas_MB": self.max_bytes / 2**20,
+                "hit": self.hits, "miss": self.misses, "eviction": self.evictions}
+
+    def report(self):
+        """Isi cache, terbaru dipakai dulu: jenis entri (elemen pertama key) dan ukurannya."""
+        with self._lock:
+            items = list(self._entries.items())
+        return pd.DataFrame([{"jenis": key[0] if isinstance(key, tuple) else str(key), "MB": size / 2**20}
+                             for key, (_, size) in reversed(items)], columns=["jenis", "MB"])
+
+
+SHARED_CACHE = SharedCache(int(CACHE_MB * 2**20))
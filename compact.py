@@ -0,0 +1,106 @@
+"""Representasi ringkas DataFrame untuk banyak sesi Streamlit sekaligus.
+
+- `peg_nip` disimpan sebagai Int64 (8 byte per baris, bukan string 18 karakter);
+- kolom dimensi disimpan sebagai kode category (int8/int16) dengan kamus
+  (CategoricalDtype) yang dibagi: dataset berbeda dengan kategori sama, mis.
+  golongan atau OPD dari file bulan berikutnya, memakai objek kamus yang sama;
+- kolom yang tidak dipakai tampilan mana pun (nama pegawai, alasan eselon,
+  kolom bantu) dibuang.
+"""
+
+import hashlib
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from pipeline import COL_OPD, COL_ESELON, COL_JAB, COL_GOL, COL_JJENIS, COL_NIP
+
+VIEW_COLUMNS = [COL_NIP, COL_OPD, COL_ESELON, COL_JAB, COL_GOL, COL_JJENIS]
+
+# kunci = hash isi kategori; nilai hilang sendiri kalau tidak ada kolom yang memakainya lagi
+_DICTIONARIES = weakref.WeakValueDictionary()
+
+
+def shared_dtype(categories):
+    """CategoricalDtype untuk `categories`, memakai objek yang sama kalau isinya sama."""
+    categories = pd.Index(categories)
+    key = hashlib.sha1("\x1f".join(map(str, categories)).encode("utf-8")).hexdigest()
+    dtype = _DICTIONARIES.get(key)
+    if dtype is None:
+        dtype = pd.CategoricalDtype(categories)
+        _DICTIONARIES[key] = dtype
+    return dtype
+
+
+def share_categories(s):
+    """Kolom category yang kamusnya dibagi lewat `shared_dtype`; kode tetap int terkecil."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype("category")
+    s = s.cat.remove_unused_categories()
+    return pd.Series(pd.Categorical.from_codes(s.cat.codes.to_numpy(), dtype=shared_dtype(s.cat.categories)),
+                     index=s.index, name=s.name)
+
+
+def nip_to_int64(s):
+    """NIP -> Int64 (nullable). Spasi/titik/strip dibuang; nilai tak valid jadi NA.
+
+    NIP dari Excel yang sudah jadi notasi ilmiah (mis. 1.98e+17) tetap dikonversi,
+    tapi digit belakangnya sudah hilang sejak di file sumber.
+    """
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.astype("Int64")
+    if pd.api.types.is_float_dtype(s.dtype):
+        return s.round().astype("Int64")
+    text = s.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    digits = text.str.replace(r"[\s.'-]", "", regex=True)
+    valid = digits.str.fullmatch(r"\d{1,18}").fillna(False).to_numpy(dtype=bool)
+    values = np.zeros(len(s), dtype=np.int64)
+    values[valid] = digits[valid].to_numpy(dtype=str).astype(np.int64)
+    sci = pd.to_numeric(text.where(~valid & text.str.contains("e", case=False).fillna(False)),
+                        errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    has_sci = ~np.isnan(sci)
+    values[has_sci] = np.round(sci[has_sci]).astype(np.int64)
+    return pd.Series(pd.arrays.IntegerArray(values, ~(valid | has_sci)), index=s.index, name=s.name)
+
+
+def compact_frame(df, unit_cols_std=()):
+    """DataFrame baru berisi hanya kolom tampilan, dengan NIP Int64 dan kamus category bersama."""
+    columns = [c for c in VIEW_COLUMNS + list(unit_cols_std) if c in df.columns]
+    out = {}
+    for c in columns:
+        out[c] = nip_to_int64(df[c]) if c == COL_NIP else share_categories(df[c])
+    return pd.DataFrame(out, index=pd.RangeIndex(len(df)))
+
+
+def memory_report(df):
+    """Pemakaian memori per kolom: data/kode vs kamus kategori (bisa dibagi antar sesi)."""
+    rows = []
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            data = s.cat.codes.nbytes
+            dictionary = s.cat.categories.memory_usage(deep=True)
+        else:
+            data = s.memory_usage(deep=True, index=False)
+            dictionary = 0
+        rows.append({"kolom": c, "dtype": str(s.dtype) if dictionary == 0 else f"category[{s.cat.codes.dtype}]",
+                     "data_bytes": data, "kamus_bytes": dictionary})
+    report = pd.DataFrame(rows, columns=["kolom", "dtype", "data_bytes", "kamus_bytes"])
+    report["total_bytes"] = report["data_bytes"] + report["kamus_bytes"]
+    return report
+
+
+def process_rss_bytes():
+    """RSS proses saat ini (Linux /proc), fallback ke puncak RSS dari `resource`; None kalau tidak ada."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -0,0 +1,68 @@
+"""Cube jumlah pegawai: OPD × Eselon × (Unit …) × Jabatan × Golongan.
+
+Dibangun sekali per dataset pada grain terkecil. Filter diterapkan ke baris
+cube (jumlah kombinasi unik, bukan jumlah pegawai) dan semua treemap, tabel
+detail, metrik dan pivot di app.py adalah roll-up dari cube yang sudah difilter.
+
+Setelah delta (delta.py) jumlah sebuah kombinasi bisa menjadi 0; baris itu
+dibiarkan di cube (supaya update tetap sebanding ukuran delta) dan tidak ikut
+di hasil roll-up.
+"""
+
+import pandas as pd
+
+from pipeline import COL_OPD, COL_ESELON, COL_JAB, COL_GOL
+
+COUNT_COL = "jumlah"
+
+
+def cube_dims(unit_cols_std=()):
+    return [COL_OPD, COL_ESELON] + list(unit_cols_std) + [COL_JAB, COL_GOL]
+
+
+def build_cube(df, unit_cols_std=()):
+    """Hitung jumlah baris per kombinasi dimensi (NA ikut dihitung sebagai grup sendiri)."""
+    return (df.groupby(cube_dims(unit_cols_std), dropna=False, observed=True)
+              .size().reset_index(name=COUNT_COL))
+
+
+def filter_cube(cube, eselon=None, opd=None, golongan=None):
+    """Filter cube dengan semantik sama seperti filter baris di app.py.
+
+    `eselon`: satu nilai (None = semua); `opd`/`golongan`: list (kosong/None = semua).
+    """
+    mask = pd.Series(True, index=cube.index)
+    if eselon is not None:
+        mask &= cube[COL_ESELON] == eselon
+    if opd:
+        mask &= cube[COL_OPD].isin(opd)
+    if golongan:
+        mask &= cube[COL_GOL].isin(golongan)
+    return cube[mask]
+
+
+def rollup(cube, dims):
+    """Jumlahkan cube ke dimensi `dims`; hanya kombinasi yang ada yang muncul."""
+    agg = (cube.groupby(list(dims), dropna=False, observed=True)[COUNT_COL]
+               .sum().reset_index())
+    return agg[agg[COUNT_COL] > 0].reset_index(drop=True)
+
+
+def value_counts(cube, dim):
+    """Pengganti `df[dim].value_counts()` dari cube (NA dibuang, urut menurun)."""
+    s = cube.groupby(dim, observed=True)[COUNT_COL].sum()
+    return s[s > 0].sort_values(ascending=False).rename("count")
+
+
+def pivot_counts(cube, index=COL_OPD, columns=COL_GOL, margins_name="Total"):
+    """Tabel pivot index × columns dari cube, dengan baris/kolom total.
+
+    Seperti pd.pivot_table, baris dengan index/columns kosong (NA) tidak ikut.
+    """
+    agg = rollup(cube.dropna(subset=[index, columns]), [index, columns])
+    table = agg.pivot(index=index, columns=columns, values=COUNT_COL).fillna(0).astype("int64")
+    table.index = table.index.astype(object)
+    table.columns = table.columns.astype(object)
+    table[margins_name] = table.sum(axis=1)
+    table.loc[margins_name] = table.sum(axis=0)
+    return table
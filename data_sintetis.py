@@ -0,0 +1,216 @@
+"""Generator data rekap kepegawaian sintetis untuk benchmark dan uji coba.
+
+Skema mengikuti README (peg_nip, peg_nama, satuan_kerja_nama, golongan,
+jabatan_nama, jabatan_jenis, eselon). Distribusi dibuat menyerupai data asli:
+- jumlah OPD tumbuh dengan ukuran data (dinas/badan inti + kecamatan, puskesmas,
+  sekolah) dan sebaran pegawai per OPD miring (Zipf; Dinas Pendidikan terbesar);
+- jabatan struktural sedikit dan bertingkat (II/III/IV), sisanya fungsional dan
+  pelaksana dengan ribuan variasi nama;
+- sebagian kecil nilai kosong dan variasi spasi/huruf seperti hasil input manual.
+
+Pemakaian:
+    python data_sintetis.py --rows 100000 --out rekap_sintetis_100k.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1_048_575
+
+OPD_INTI = [
+    "Dinas Pendidikan", "Dinas Kesehatan", "Dinas Pekerjaan Umum dan Penataan Ruang",
+    "Dinas Sosial", "Dinas Perhubungan", "Dinas Lingkungan Hidup",
+    "Dinas Kependudukan dan Pencatatan Sipil", "Dinas Pertanian", "Dinas Perikanan",
+    "Dinas Pariwisata", "Dinas Koperasi dan UKM", "Dinas Perindustrian dan Perdagangan",
+    "Dinas Tenaga Kerja", "Dinas Komunikasi dan Informatika", "Dinas Perumahan dan Kawasan Permukiman",
+    "Dinas Pemuda dan Olahraga", "Dinas Perpustakaan dan Kearsipan", "Dinas Ketahanan Pangan",
+    "Dinas Penanaman Modal dan PTSP", "Dinas Pemberdayaan Masyarakat dan Desa",
+    "Dinas Pengendalian Penduduk dan KB", "Dinas Pemberdayaan Perempuan dan Perlindungan Anak",
+    "Badan Perencanaan Pembangunan Daerah", "Badan Keuangan dan Aset Daerah",
+    "Badan Kepegawaian dan Pengembangan SDM", "Badan Pendapatan Daerah",
+    "Badan Penanggulangan Bencana Daerah", "Badan Kesatuan Bangsa dan Politik",
+    "Sekretariat Daerah", "Sekretariat DPRD", "Inspektorat", "Satuan Polisi Pamong Praja",
+    "RSUD Kabupaten",
+]
+WILAYAH = [
+    "Utara", "Selatan", "Timur", "Barat", "Tengah", "Kota", "Baru", "Lama", "Raya", "Jaya",
+    "Makmur", "Sejahtera", "Indah", "Permai", "Asri", "Mulya", "Sari", "Agung", "Sentosa", "Damai",
+]
+
+BIDANG = [
+    "Umum", "Keuangan", "Perencanaan", "Program", "Pelayanan", "Pengawasan", "Pembinaan",
+    "Pengembangan", "Data dan Informasi", "Sarana dan Prasarana", "Kepegawaian", "Evaluasi",
+    "Pemberdayaan", "Pengendalian", "Penataan", "Kerja Sama", "Hukum", "Infrastruktur",
+]
+
+FUNGSIONAL = [
+    "Guru", "Perawat", "Bidan", "Dokter", "Apoteker", "Analis Kepegawaian", "Pranata Komputer",
+    "Arsiparis", "Pustakawan", "Auditor", "Perencana", "Penyuluh Pertanian", "Penyuluh KB",
+    "Pengawas Sekolah", "Sanitarian", "Nutrisionis", "Pranata Laboratorium Kesehatan",
+    "Radiografer", "Statistisi", "Analis Kebijakan", "Penata Ruang", "Teknik Jalan dan Jembatan",
+    "Pengelola Pengadaan Barang/Jasa", "Pamong Belajar", "Penilik", "Epidemiolog Kesehatan",
+]
+JENJANG_AHLI = ["Ahli Pertama", "Ahli Muda", "Ahli Madya", "Ahli Utama"]
+JENJANG_TERAMPIL = ["Pemula", "Terampil", "Mahir", "Penyelia"]
+GURU_MAPEL = [
+    "Kelas", "Matematika", "Bahasa Indonesia", "Bahasa Inggris", "IPA", "IPS", "PJOK",
+    "Seni Budaya", "Agama Islam", "PPKn", "Prakarya", "Bimbingan Konseling",
+]
+
+PELAKSANA = [
+    "Pengadministrasi Umum", "Pengelola Keuangan", "Pengadministrasi Kepegawaian",
+    "Pengelola Data", "Pengemudi", "Pramu Kantor", "Pengelola Barang Milik Negara",
+    "Pengadministrasi Perkantoran", "Bendahara", "Operator Layanan Operasional",
+    "Penata Layanan Operasional", "Pengolah Data dan Informasi", "Pengelola Layanan Kesehatan",
+    "Pengelola Sarana dan Prasarana", "Pengelola Program dan Kegiatan", "Verifikator Keuangan",
+]
+
+GOLONGAN = ["I/a", "I/b", "I/c", "I/d", "II/a", "II/b", "II/c", "II/d",
+            "III/a", "III/b", "III/c", "III/d", "IV/a", "IV/b", "IV/c", "IV/d", "IV/e"]
+
+NAMA_DEPAN = [
+    "Agus", "Budi", "Siti", "Dewi", "Sri", "Ahmad", "Muhammad", "Nur", "Rina", "Eko", "Dian",
+    "Andi", "Rudi", "Yuni", "Wahyu", "Hendra", "Indah", "Lestari", "Fitri", "Bambang", "Joko",
+    "Ratna", "Teguh", "Putri", "Arif", "Ika", "Hadi", "Nurul", "Rizki", "Wulan", "Fajar", "Maya",
+]
+NAMA_BELAKANG = [
+    "Santoso", "Wijaya", "Saputra", "Hidayat", "Kurniawan", "Pratama", "Setiawan", "Lestari",
+    "Rahmawati", "Susanti", "Nugroho", "Purnomo", "Hartono", "Siregar", "Nasution", "Harahap",
+    "Simanjuntak", "Lubis", "Wibowo", "Gunawan", "Permana", "Maharani", "Utami", "Handayani",
+]
+GELAR = ["", "", "", "S.Pd.", "S.Kep.", "S.E.", "S.H.", "S.T.", "A.Md.", "S.Sos.", "M.Si.", "dr."]
+
+
+def _opd_names(n_rows, rng):
+    """Daftar OPD; jumlah kecamatan/puskesmas/sekolah bertambah mengikuti ukuran data."""
+    n_kec = int(min(40, 10 + n_rows / 25_000))
+    n_pkm = int(min(80, 10 + n_rows / 15_000))
+    n_sek = int(min(900, 20 + n_rows / 2_000))
+    kec = [f"Kecamatan {WILAYAH[i % len(WILAYAH)]}" + (f" {i // len(WILAYAH) + 1}" if i >= len(WILAYAH) else "")
+           for i in range(n_kec)]
+    pkm = [f"Puskesmas {WILAYAH[i % len(WILAYAH)]} {i // len(WILAYAH) + 1}" for i in range(n_pkm)]
+    sek = [f"{'SD' if i % 3 else 'SMP'} Negeri {i + 1}" for i in range(n_sek)]
+    return OPD_INTI + kec + pkm + sek
+
+
+def _zipf_weights(k, s, rng):
+    w = 1.0 / np.arange(1, k + 1) ** s
+    rng.shuffle(w[1:])  # OPD pertama (Dinas Pendidikan) tetap terbesar
+    return w / w.sum()
+
+
+def _pick(rng, values, size, p=None):
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=p)]
+
+
+def _noisy(values, rng, rate):
+    """Tambahkan variasi spasi/huruf besar seperti input manual."""
+    s = pd.Series(values, dtype=object)
+    idx = np.flatnonzero(rng.random(len(s)) < rate)
+    if len(idx):
+        kind = rng.integers(0, 3, len(idx))
+        sub = s.iloc[idx].astype(str)
+        sub = np.where(kind == 0, sub.str.upper(), np.where(kind == 1, "  " + sub + " ", sub.str.replace(" ", "  ", n=1)))
+        s.iloc[idx] = sub
+    return s
+
+
+def generate(n_rows, seed=0, null_rate=0.01, noise_rate=0.02):
+    """DataFrame rekap sintetis dengan `n_rows` baris (deterministik per seed)."""
+    rng = np.random.default_rng(seed)
+    opds = _opd_names(n_rows, rng)
+    opd_idx = rng.choice(len(opds), size=n_rows, p=_zipf_weights(len(opds), 1.05, rng))
+    opd = np.asarray(opds, dtype=object)[opd_idx]
+
+    # Peran: 0 = struktural, 1 = fungsional, 2 = pelaksana
+    role = rng.choice(3, size=n_rows, p=[0.06, 0.52, 0.42])
+    jabatan = np.empty(n_rows, dtype=object)
+    jenis = np.empty(n_rows, dtype=object)
+    eselon = np.full(n_rows, "NON-ESELON", dtype=object)
+
+    s_idx = np.flatnonzero(role == 0)
+    level = rng.choice(3, size=len(s_idx), p=[0.02, 0.28, 0.7])   # II / III / IV
+    opd_s = pd.Series(opd[s_idx], dtype=object)
+    bidang = pd.Series(_pick(rng, BIDANG, len(s_idx)), dtype=object)
+    kepala = np.where(opd_s.str.startswith("Kecamatan"), "Camat " + opd_s.str.replace("Kecamatan ", "", n=1),
+                      "Kepala " + opd_s)
+    lvl3 = np.where(rng.random(len(s_idx)) < 0.7, "Kepala Bidang " + bidang, "Sekretaris " + opd_s)
+    lvl4 = _pick(rng, ["Kepala Seksi ", "Kepala Sub Bagian ", "Kasubbid ", "Kasi "], len(s_idx)) + bidang
+    jabatan[s_idx] = np.select([level == 0, level == 1], [kepala, lvl3], lvl4)
+    eselon[s_idx] = np.select([level == 0, level == 1], ["II", "III"], "IV")
+    jenis[s_idx] = "Struktural"
+
+    f_idx = np.flatnonzero(role == 1)
+    nama_f = _pick(rng, FUNGSIONAL, len(f_idx), p=_zipf_weights(len(FUNGSIONAL), 1.2, rng))
+    ahli = rng.random(len(f_idx)) < 0.7
+    jenjang = np.where(ahli, _pick(rng, JENJANG_AHLI, len(f_idx), p=[0.35, 0.35, 0.27, 0.03]),
+                       _pick(rng, JENJANG_TERAMPIL, len(f_idx)))
+    mapel = np.where(nama_f == "Guru", " " + _pick(rng, GURU_MAPEL, len(f_idx)), "")
+    jabatan[f_idx] = nama_f + mapel + " " + jenjang
+    jenis[f_idx] = _pick(rng, ["Fungsional", "JFT", "Fungsional Tertentu"], len(f_idx), p=[0.6, 0.3, 0.1])
+
+    p_idx = np.flatnonzero(role == 2)
+    jabatan[p_idx] = _pick(rng, PELAKSANA, len(p_idx))
+    jenis[p_idx] = _pick(rng, ["Pelaksana", "JFU", "Fungsional Umum"], len(p_idx), p=[0.5, 0.35, 0.15])
+
+    # Golongan bergantung peran: struktural & fungsional ahli cenderung III/IV
+    gol_p_low = np.array([2, 2, 3, 2, 6, 6, 7, 5, 18, 15, 12, 10, 5, 3, 2, 1, 1], dtype=float)
+    gol_p_high = np.array([0, 0, 0, 0, 0, 0, 1, 1, 8, 12, 16, 18, 20, 12, 7, 4, 1], dtype=float)
+    high = (role == 0) | ((role == 1) & (rng.random(n_rows) < 0.7))
+    golongan = np.where(high, _pick(rng, GOLONGAN, n_rows, p=gol_p_high / gol_p_high.sum()),
+                        _pick(rng, GOLONGAN, n_rows, p=gol_p_low / gol_p_low.sum()))
+
+    # NIP 18 digit: tgl lahir (8) + TMT CPNS (6) + jenis kelamin (1) + urut (3)
+    lahir = pd.to_datetime("1960-01-01") + pd.to_timedelta(rng.integers(0, 40 * 365, n_rows), unit="D")
+    tmt_year = lahir.year.to_numpy() + rng.integers(20, 35, n_rows)
+    prefix = (lahir.strftime("%Y%m%d").to_numpy().astype(np.int64) * 10**7
+              + tmt_year * 10**3 + rng.integers(1, 13, n_rows) * 10
+              + rng.integers(1, 3, n_rows))
+    urut = pd.Series(prefix).groupby(prefix).cumcount().to_numpy() + 1   # NIP unik
+    nip = prefix * 1000 + urut
+
+    nama = (_pick(rng, NAMA_DEPAN, n_rows) + " " + _pick(rng, NAMA_BELAKANG, n_rows))
+    gelar = _pick(rng, GELAR, n_rows)
+    nama = np.where(gelar == "", nama, np.where(gelar == "dr.", "dr. " + nama, nama + ", " + gelar))
+
+    df = pd.DataFrame({
+        "peg_nip": nip,
+        "peg_nama": nama,
+        "satuan_kerja_nama": _noisy(opd, rng, noise_rate),
+        "golongan": golongan,
+        "jabatan_nama": _noisy(jabatan, rng, noise_rate),
+        "jabatan_jenis": jenis,
+        "eselon": eselon,
+    })
+    for col in ["satuan_kerja_nama", "golongan", "jabatan_nama", "jabatan_jenis", "eselon"]:
+        df.loc[rng.random(n_rows) < null_rate, col] = None
+    return df
+
+
+def write(df, path):
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    elif path.endswith(".xlsx"):
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel maksimal {EXCEL_MAX_ROWS:,} baris; pakai .csv/.parquet untuk {len(df):,} baris")
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buat file rekap kepegawaian sintetis.")
+    parser.add_argument("--rows", type=int, default=100_000, help="jumlah baris (10k – 5M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="path output .csv/.xlsx/.parquet (default: rekap_sintetis_<rows>.csv)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    df = generate(args.rows, seed=args.seed)
+    out = write(df, args.out or f"rekap_sintetis_{args.rows}.csv")
+    print(f"{len(df):,} baris | {df['satuan_kerja_nama'].nunique():,} OPD | "
+          f"{df['jabatan_nama'].nunique():,} jabatan -> {out} ({time.perf_counter() - t0:.1f}s)")
@@ -0,0 +1,361 @@
+"""Update inkremental dataset dari file perubahan (delta) berdasarkan `peg_nip`.
+
+File perubahan berisi `peg_nip`, kolom `aksi` (opsional) dan kolom data yang
+berubah:
+- `aksi` = "hapus": baris pegawai dengan NIP itu dibuang;
+- `aksi` kosong / "tambah" / "ubah": upsert — NIP yang sudah ada diperbarui,
+  yang belum ada ditambahkan. Kolom yang tidak ada di file perubahan, dan sel
+  yang kosong, diambil dari baris lama (update parsial, mis. hanya `golongan`).
+
+Hanya baris delta yang dinormalisasi dan, kalau eselon dataset hasil inferensi,
+diklasifikasi ulang. Cube dan indeks filter diperbarui dengan selisih baris
+lama vs baru, bukan dibangun ulang. Baris yang diubah ditimpa di tempat per posisi;
+baris yang dihapus diisi baris tambahan atau baris paling belakang, jadi posisi
+baris lain tidak bergeser dan frame hanya disambung kalau tambahan melebihi hapusan.
+
+Pemakaian CLI (snapshot -> snapshot baru):
+    python delta.py snapshots/rekap-xxxx.arrow perubahan.csv [--out-dir snapshots]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from compact import nip_to_int64
+from cube import COUNT_COL, build_cube, cube_dims
+from instrumentasi import NULL_TRACER
+from pipeline import (
+    COL_ESELON, COL_NIP, UNIT_COLUMNS, _open, ingest_dtypes, missing_columns, order_map, prepare_df,
+    read_headers,
+)
+
+COL_AKSI = "aksi"
+AKSI_HAPUS = "hapus"
+AKSI_UPSERT = ("", "tambah", "ubah")
+
+# kolom turunan yang dihitung ulang oleh prepare_df
+DERIVED_COLUMNS = ["__eselon_ord__", "eselon_reason"]
+
+# overlay NIP -> posisi dibangun ulang kalau sudah sebesar ini relatif terhadap jumlah baris
+NIP_OVERLAY_MAX_FRACTION = 0.1
+
+
+@dataclass
+class DeltaStats:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    not_found: int = 0   # "hapus" untuk NIP yang tidak ada
+    invalid_nip: int = 0
+    rows: int = 0        # jumlah baris sesudah delta
+
+    def summary(self):
+        return (f"{self.added:,} ditambah, {self.updated:,} diubah, {self.removed:,} dihapus"
+                f" | {self.not_found:,} NIP hapus tidak ditemukan, {self.invalid_nip:,} NIP tidak valid"
+                f" | total {self.rows:,} baris")
+
+
+def read_delta(source, file_name):
+    """Baca file perubahan (CSV/Excel, sheet pertama yang punya `peg_nip`); semua kolom sebagai string."""
+    headers = read_headers(source, file_name)
+    sheet, header = next(((sh, h) for sh, h in headers.items() if COL_NIP in h), (None, None))
+    if header is None:
+        raise KeyError(COL_NIP)
+    usecols = list(ingest_dtypes(header)) + [c for c in [COL_AKSI] if c in header]
+    if file_name.endswith(".csv"):
+        changes = pd.read_csv(_open(source), usecols=usecols, dtype="string")
+    else:
+        changes = pd.read_excel(_open(source), sheet_name=sheet, usecols=usecols, dtype="string")
+    if COL_AKSI in changes.columns:
+        changes[COL_AKSI] = changes[COL_AKSI].fillna("").str.strip().str.lower()
+        unknown = sorted(set(changes[COL_AKSI]) - {AKSI_HAPUS, *AKSI_UPSERT})
+        if unknown:
+            raise ValueError(f"Nilai kolom '{COL_AKSI}' tidak dikenal: {unknown} (pakai tambah/ubah/hapus)")
+    return changes
+
+
+class NipPositions:
+    """NIP -> posisi baris: indeks hash dasar + overlay kecil untuk NIP yang berubah posisi."""
+
+    def __init__(self, nips):
+        self.rebuild(nips)
+
+    def rebuild(self, nips):
+        valid = nips.notna().to_numpy()
+        self.base = pd.Index(nips[valid].to_numpy(dtype=np.int64))
+        if not self.base.is_unique:
+            n_dup = int(self.base.duplicated().sum())
+            raise ValueError(f"{COL_NIP} tidak unik ({n_dup:,} duplikat); delta per NIP tidak bisa dipakai")
+        self.base_pos = np.flatnonzero(valid)
+        self.overlay = {}   # nip -> posisi (-1 = sudah tidak ada)
+
+    def lookup(self, nips):
+        """Posisi tiap NIP (int64 array, NA tidak boleh ada); -1 kalau tidak ada."""
+        idx = self.base.get_indexer(nips)
+        pos = np.where(idx >= 0, self.base_pos[idx], -1)
+        for i, nip in enumerate(nips):
+            if nip in self.overlay:
+                pos[i] = self.overlay[nip]
+        return pos
+
+    def move(self, removed, placed):
+        """`removed`/`placed`: {nip: posisi}; yang dilepas dulu, lalu yang ditempatkan."""
+        for nip in removed:
+            self.overlay[nip] = -1
+        self.overlay.update(placed)
+
+
+def _put_rows(df, positions, rows):
+    """Tulis `rows` (kolom sama dengan `df`) ke `positions` di tempat, per kolom."""
+    for j in range(df.shape[1]):
+        df.iloc[positions, j] = rows.iloc[:, j].array
+
+
+def _writable_strings(df):
+    """Kolom string berbasis Arrow -> storage python: setitem Arrow menyalin seluruh kolom."""
+    for c in df.columns:
+        dtype = df[c].dtype
+        if isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow":
+            df[c] = df[c].astype(pd.StringDtype("python", na_value=dtype.na_value))
+    return df
+
+
+def _cast_like(s, ref):
+    """Samakan dtype kolom delta `s` dengan kolom dataset `ref`; return (s, ref) (kategori baru ditambahkan ke ref)."""
+    if isinstance(ref.dtype, pd.CategoricalDtype):
+        values = s.astype(object).where(s.notna(), None)
+        new = pd.Index(values.dropna().unique()).difference(ref.cat.categories)
+        if len(new):
+            ref = ref.cat.add_categories(new)
+        return pd.Series(pd.Categorical(values, dtype=ref.dtype), index=s.index, name=s.name), ref
+    if s.name == COL_NIP and pd.api.types.is_integer_dtype(ref.dtype):
+        return nip_to_int64(s), ref
+    try:
+        return s.astype(ref.dtype), ref
+    except (TypeError, ValueError):
+        return s.astype(object), ref.astype(object)
+
+
+def _labels(s, positions):
+    """Nilai kolom di `positions` sebagai object (NA -> None)."""
+    values = s.iloc[positions].astype(object)
+    return values.where(values.notna(), None).to_numpy()
+
+
+class DeltaDataset:
+    """Dataset ter-prepare + cube + indeks filter yang bisa di-update per NIP.
+
+    `df`, `cube` dan `filter_index` dimiliki objek ini dan diubah di tempat —
+    berikan salinan kalau sumbernya dibagi (cache_resource). Kolom string Arrow
+    di `df` diubah ke storage python sekali di awal supaya bisa ditulis per posisi.
+    `cube`/`filter_index` boleh None (mis. CLI yang hanya menulis snapshot baru).
+    """
+
+    def __init__(self, df, unit_cols_std, cube=None, filter_index=None,
+                 unit_columns=UNIT_COLUMNS, eselon_order=order_map, canonical=False):
+        if COL_NIP not in df.columns:
+            raise KeyError(COL_NIP)
+        self.df = _writable_strings(df.reset_index(drop=True))
+        self.unit_cols_std = list(unit_cols_std)
+        self.cube = cube
+        self.filter_index = filter_index
+        self.unit_columns = list(unit_columns)
+        self.eselon_order = dict(eselon_order)
+        self.canonical = canonical   # dataset dikanonikalisasi: nama di baris delta ikut peta alias
+        self.nips = NipPositions(nip_to_int64(self.df[COL_NIP]))
+        self._cube_pos = None
+        self.history = []
+
+    # ---------- baris delta ----------
+    def _derived(self, changes):
+        derived = [c for c in DERIVED_COLUMNS if c in self.df.columns]
+        derived += [f"unit_l{i+1}" for i, col in enumerate(self.unit_columns) if col in self.df.columns]
+        # eselon hasil inferensi: diklasifikasi ulang kecuali file perubahan membawa eselon sendiri
+        if "eselon_reason" in self.df.columns and COL_ESELON not in changes.columns:
+            derived.append(COL_ESELON)
+        return derived
+
+    def _prepare(self, changes, upd_pos, tracer):
+        """Baris update (baris lama ditimpa kolom dari file) + baris tambahan, sudah di-prepare."""
+        data_cols = [c for c in changes.columns if c != COL_AKSI]
+        derived = self._derived(changes)
+        keep = [c for c in self.df.columns if c not in derived]
+        upd_raw = self.df.iloc[upd_pos][keep].astype(object).reset_index(drop=True)
+        upd_changes = changes.iloc[:len(upd_pos)]
+        for c in data_cols:
+            given = upd_changes[c].to_numpy(dtype=object)
+            filled = pd.notna(given)
+            if c in upd_raw.columns:
+                upd_raw.loc[filled, c] = given[filled]
+            else:
+                upd_raw[c] = given
+        add_raw = changes.iloc[len(upd_pos):][data_cols].astype(object)
+        raw = pd.concat([upd_raw, add_raw], ignore_index=True)
+
+        with tracer.stage("delta_prepare", rows_in=len(raw)) as stage:
+            prep, _ = prepare_df(raw, self.unit_columns, self.eselon_order, canonical=self.canonical)
+            stage.rows_out = len(prep)
+        prep = prep.reindex(columns=self.df.columns)
+        for c in self.df.columns:
+            prep[c], self.df[c] = _cast_like(prep[c], self.df[c])
+        return prep
+
+    def apply(self, changes, tracer=None):
+        """Terapkan file perubahan (lihat `read_delta`); return DeltaStats."""
+        tracer = tracer or NULL_TRACER
+        stats = DeltaStats()
+        changes = changes.reset_index(drop=True)
+        nips = nip_to_int64(changes[COL_NIP])
+        valid = nips.notna().to_numpy()
+        stats.invalid_nip = int((~valid).sum())
+        changes, nips = changes[valid], nips[valid].to_numpy(dtype=np.int64)
+        # NIP yang muncul beberapa kali: baris terakhir menang
+        last = ~pd.Index(nips).duplicated(keep="last")
+        changes, nips = changes[last].reset_index(drop=True), nips[last]
+
+        remove = (changes[COL_AKSI] == AKSI_HAPUS).to_numpy() if COL_AKSI in changes.columns else np.zeros(len(changes), bool)
+        pos = self.nips.lookup(nips)
+        rem_pos = pos[remove & (pos >= 0)]
+        stats.not_found = int((remove & (pos < 0)).sum())
+        upd = ~remove & (pos >= 0)
+        add = ~remove & (pos < 0)
+        upd_pos = pos[upd]
+        stats.updated, stats.added, stats.removed = int(upd.sum()), int(add.sum()), len(rem_pos)
+        if add.any():
+            missing = missing_columns(changes.columns)
+            if missing:
+                raise KeyError(missing[0])
+
+        n0 = len(self.df)
+        if stats.updated or stats.added:
+            prep = self._prepare(pd.concat([changes[upd], changes[add]], ignore_index=True), upd_pos, tracer)
+        else:
+            prep = self.df.iloc[:0]
+
+        with tracer.stage("delta_rows", rows_in=len(prep) + len(rem_pos)) as stage:
+            n_upd, n_add = len(upd_pos), stats.added
+            n1 = n0 - len(rem_pos) + n_add
+            # posisi yang isinya berubah: update, lubang, dan rentang yang tumbuh/menyusut
+            touched = np.unique(np.concatenate([upd_pos, rem_pos, np.arange(min(n0, n1), max(n0, n1))]))
+            old_rows = self.df.iloc[np.concatenate([upd_pos, rem_pos])]
+            before = {c: _labels(self.df[c], touched[touched < n0]) for c in self.df.columns}
+            self._place_rows(prep, upd_pos, rem_pos, n_upd, n_add)
+            stage.rows_out = n1
+
+        if self.cube is not None:
+            with tracer.stage("delta_cube", rows_in=len(prep) + len(old_rows)):
+                self._update_cube(prep, old_rows)
+        if self.filter_index is not None:
+            with tracer.stage("delta_index", rows_in=len(touched)):
+                self._update_index(touched, before, self.df, n0, n1)
+        self._update_nips(touched, before, self.df, n0, n1)
+
+        stats.rows = n1
+        self.history.append(stats)
+        return stats
+
+    def _place_rows(self, prep, upd_pos, rem_pos, n_upd, n_add):
+        """Baris update ditimpa di posisinya; lubang hapusan diisi baris tambahan, sisanya baris paling belakang."""
+        if n_upd:
+            _put_rows(self.df, upd_pos, prep.iloc[:n_upd])
+        holes = np.sort(rem_pos)
+        fill = min(n_add, len(holes))
+        if fill:
+            _put_rows(self.df, holes[:fill], prep.iloc[n_upd:n_upd + fill])
+        if n_add > fill:
+            self.df = pd.concat([self.df, prep.iloc[n_upd + fill:]], ignore_index=True)
+        elif len(holes) > fill:
+            rest = holes[fill:]
+            n1 = len(self.df) - len(rest)
+            low = rest[rest < n1]
+            tail = np.setdiff1d(np.arange(n1, len(self.df)), rest, assume_unique=True)
+            _put_rows(self.df, low, self.df.iloc[tail])
+            self.df = self.df.iloc[:n1]
+
+    # ---------- struktur turunan ----------
+    def _update_nips(self, touched, before, new_df, n0, n1):
+        old_nips = nip_to_int64(pd.Series(before[COL_NIP], dtype=object))
+        new_pos = touched[touched < n1]
+        new_nips = nip_to_int64(new_df[COL_NIP].iloc[new_pos].reset_index(drop=True))
+        removed = {int(n) for n in old_nips.dropna()}
+        placed = {int(n): int(p) for n, p in zip(new_nips, new_pos) if pd.notna(n)}
+        self.nips.move(removed, placed)
+        if len(self.nips.overlay) > NIP_OVERLAY_MAX_FRACTION * max(n1, 1):
+            self.nips.rebuild(nip_to_int64(new_df[COL_NIP]))
+
+    def _update_index(self, touched, before, new_df, n0, n1):
+        columns = list(self.filter_index.bitmaps)
+        old = {c: np.full(len(touched), None, dtype=object) for c in columns}
+        new = {c: np.full(len(touched), None, dtype=object) for c in columns}
+        in_old, in_new = touched < n0, touched < n1
+        for c in columns:
+            old[c][in_old] = before[c]
+            new[c][in_new] = _labels(new_df[c], touched[in_new])
+        self.filter_index.reassign(touched, old, new, n1)
+
+    def _cube_key(self, frame, dims):
+        parts = [frame[d].cat.codes.to_numpy() if isinstance(frame[d].dtype, pd.CategoricalDtype)
+                 else frame[d].astype(object).where(frame[d].notna(), None).to_numpy() for d in dims]
+        return list(zip(*parts))
+
+    def _update_cube(self, new_rows, old_rows):
+        dims = cube_dims(self.unit_cols_std)
+        for d in dims:
+            if isinstance(self.df[d].dtype, pd.CategoricalDtype) and self.cube[d].dtype != self.df[d].dtype:
+                # kategori hanya ditambah di belakang, jadi kode lama tetap sama
+                self.cube[d] = self.cube[d].cat.set_categories(self.df[d].cat.categories)
+        if self._cube_pos is None:
+            self._cube_pos = {k: i for i, k in enumerate(self._cube_key(self.cube, dims))}
+
+        plus, minus = build_cube(new_rows, self.unit_cols_std), build_cube(old_rows, self.unit_cols_std)
+        minus[COUNT_COL] = -minus[COUNT_COL]
+        change = pd.concat([plus, minus], ignore_index=True)
+        change = change.groupby(dims, dropna=False, observed=True)[COUNT_COL].sum().reset_index()
+        change = change[change[COUNT_COL] != 0].reset_index(drop=True)
+
+        counts = self.cube[COUNT_COL].to_numpy().copy()
+        fresh = []
+        for i, key in enumerate(self._cube_key(change, dims)):
+            at = self._cube_pos.get(key)
+            if at is None:
+                fresh.append(i)
+            else:
+                counts[at] += change.at[i, COUNT_COL]
+        self.cube[COUNT_COL] = counts
+        if fresh:
+            start = len(self.cube)
+            added = change.iloc[fresh].astype({d: self.cube[d].dtype for d in dims})
+            self.cube = pd.concat([self.cube, added], ignore_index=True)
+            for j, key in enumerate(self._cube_key(added, dims)):
+                self._cube_pos[key] = start + j
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Terapkan file perubahan (delta per peg_nip) ke snapshot")
+    parser.add_argument("snapshot", help="Snapshot .arrow sumber")
+    parser.add_argument("changes", help="File perubahan CSV/Excel")
+    parser.add_argument("--out-dir", default=None, help="Folder snapshot hasil (default: folder snapshot sumber)")
+    args = parser.parse_args(argv)
+
+    from snapshot import load_snapshot, write_snapshot
+    t0 = time.time()
+    df, info = load_snapshot(args.snapshot)
+    dataset = DeltaDataset(df, info.unit_cols_std)
+    with open(args.changes, "rb") as f:
+        data = f.read()
+    stats = dataset.apply(read_delta(data, args.changes))
+    source_hash = hashlib.sha256((info.source_hash + hashlib.sha256(data).hexdigest()).encode()).hexdigest()
+    out_dir = args.out_dir or os.path.dirname(args.snapshot)
+    path = write_snapshot(dataset.df, info.unit_cols_std, info.source, source_hash, out_dir)
+    print(f"{stats.summary()} -> {path} ({time.time() - t0:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Export data terfilter & pivot: dibuat hanya saat diunduh, di-cache per state filter.
+
+File ditulis ke disk per chunk (`EXPORT_CHUNK_ROWS` baris), jadi export besar tidak
+pernah dibangun sebagai satu string di memori. Nama file = hash dari key (dataset +
+filter + format), sehingga klik ulang dengan filter yang sama langsung memakai file
+yang sudah ada. Hanya `EXPORT_MAX_FILES` file terbaru yang disimpan.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import uuid
+
+EXPORT_DIR = os.environ.get("KEPEGAWAIAN_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "kepegawaian_export"))
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_MAX_FILES = 32
+EXCEL_MAX_ROWS = 1_048_575
+
+# ekstensi -> (label, MIME)
+FORMATS = {
+    "csv.gz": ("CSV (gzip)", "application/gzip"),
+    "csv": ("CSV", "text/csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def export_key(*parts):
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _chunks(frame, chunk_rows):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def _write_csv(frame, f, index, chunk_rows):
+    for start, chunk in _chunks(frame, chunk_rows):
+        chunk.to_csv(f, header=start == 0, index=index)
+
+
+def _write_parquet(frame, path, index, chunk_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for _, chunk in _chunks(frame, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=index)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_xlsx(frame, path, index, chunk_rows):
+    import openpyxl
+    if len(frame) > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel maksimal {EXCEL_MAX_ROWS:,} baris; pilih CSV/Parquet untuk {len(frame):,} baris")
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("data")
+    if index:
+        frame = frame.reset_index()
+    ws.append([str(c) for c in frame.columns])
+    for _, chunk in _chunks(frame, chunk_rows):
+        values = chunk.astype(object)
+        for row in values.where(values.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+def write_export(frame, path, fmt, index=False, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Tulis `frame` ke `path` dalam format `fmt` (lihat FORMATS), per chunk baris."""
+    if fmt == "csv.gz":
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            _write_csv(frame, f, index, chunk_rows)
+    elif fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            _write_csv(frame, f, index, chunk_rows)
+    elif fmt == "parquet":
+        _write_parquet(frame, path, index, chunk_rows)
+    elif fmt == "xlsx":
+        _write_xlsx(frame, path, index, chunk_rows)
+    else:
+        raise ValueError(f"Format export tidak dikenal: {fmt}")
+    return path
+
+
+def cached_export(key, fmt, build, index=False, export_dir=EXPORT_DIR):
+    """Path file export untuk `key`; `build()` (-> DataFrame) hanya dipanggil kalau belum ada."""
+    path = os.path.join(export_dir, f"{key}.{fmt}")
+    if os.path.exists(path):
+        os.utime(path)  # tandai baru dipakai (urutan LRU)
+        return path
+    os.makedirs(export_dir, exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        write_export(build(), tmp, fmt, index)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _prune(export_dir)
+    return path
+
+
+def _prune(export_dir, keep=EXPORT_MAX_FILES):
+    files = [os.path.join(export_dir, f) for f in os.listdir(export_dir) if not f.endswith(".tmp")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def export_opener(key, fmt, build, index=False):
+    """Callable tanpa argumen untuk `st.download_button(data=...)`: file baru dibuat saat diklik."""
+    return lambda: open(cached_export(key, fmt, build, index), "rb")
@@ -0,0 +1,142 @@
+"""Indeks bitmap untuk filter baris (eselon, OPD, golongan, dst).
+
+Dibangun sekali per dataset: untuk tiap nilai unik di kolom filter disimpan
+bitmap baris (np.packbits, 1 bit per baris). Seleksi = OR bitmap nilai yang
+dipilih per dimensi, lalu AND antar dimensi; hasilnya posisi baris, bukan
+salinan DataFrame. Biaya seleksi ~ n/8 byte per bitmap yang disentuh, jadi
+menambah dimensi filter tidak menambah copy data.
+
+Indeks bisa diperbarui per baris (`reassign`, dipakai delta.py) tanpa dibangun
+ulang; bitmap boleh lebih panjang dari n bit (kapasitas cadangan untuk baris
+tambahan), bit di luar n selalu 0.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    def __init__(self, df, columns):
+        self.n = len(df)
+        self.bitmaps = {}   # kolom -> {nilai: bitmap}
+        self.valid = {}     # kolom -> bitmap baris yang tidak NA
+        for col in columns:
+            if col in df.columns:
+                self._index_column(col, df[col])
+
+    def _index_column(self, col, s):
+        if not isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype("category")
+        codes = s.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(s.cat.categories) + 1))
+        maps = {}
+        for i, value in enumerate(s.cat.categories):
+            rows = order[bounds[i]:bounds[i + 1]]
+            if len(rows):
+                maps[value] = self._pack(rows)
+        self.bitmaps[col] = maps
+        self.valid[col] = np.packbits(codes >= 0)
+
+    def _pack(self, rows):
+        bits = np.zeros(self.n, dtype=bool)
+        bits[rows] = True
+        return np.packbits(bits)
+
+    def copy(self):
+        other = FilterIndex.__new__(FilterIndex)
+        other.n = self.n
+        other.bitmaps = {col: {v: b.copy() for v, b in maps.items()} for col, maps in self.bitmaps.items()}
+        other.valid = {col: b.copy() for col, b in self.valid.items()}
+        return other
+
+    def _reserve(self, n):
+        """Pastikan semua bitmap muat n bit (tumbuh 25% supaya penambahan berikutnya tidak realokasi)."""
+        for col, valid in self.valid.items():
+            if len(valid) * 8 >= n:
+                continue
+            size = max((n + 7) // 8, len(valid) + len(valid) // 4 + 1)
+            grow = lambda b: np.concatenate([b, np.zeros(size - len(b), dtype=np.uint8)])
+            self.valid[col] = grow(valid)
+            self.bitmaps[col] = {v: grow(b) for v, b in self.bitmaps[col].items()}
+
+    def reassign(self, positions, old, new, n):
+        """Perbarui bitmap baris `positions` dari nilai lama ke nilai baru; n = jumlah baris sesudahnya.
+
+        `old`/`new`: {kolom: array nilai sejajar `positions`}, NA = baris kosong
+        (baris baru di `old`, baris yang dikosongkan di `new`). Biaya ~ len(positions).
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        self._reserve(n)
+        for col, maps in self.bitmaps.items():
+            emptied = set()
+            for value, rows in _groups(positions, old[col]):
+                _set_bits(maps[value], rows, False)
+                _set_bits(self.valid[col], rows, False)
+                emptied.add(value)
+            for value, rows in _groups(positions, new[col]):
+                if value not in maps:
+                    maps[value] = np.zeros_like(self.valid[col])
+                _set_bits(maps[value], rows, True)
+                _set_bits(self.valid[col], rows, True)
+                emptied.discard(value)
+            for value in emptied:
+                if not maps[value].any():
+                    del maps[value]
+        self.n = n
+
+    def values(self, col):
+        return list(self.bitmaps.get(col, {}))
+
+    def _column_bits(self, col, selected):
+        """OR bitmap nilai terpilih; kalau lebih dari separuh dipilih, pakai komplemen."""
+        maps = self.bitmaps[col]
+        selected = [v for v in dict.fromkeys(selected) if v in maps]
+        if len(selected) * 2 <= len(maps):
+            if not selected:
+                return np.zeros_like(self.valid[col])
+            return np.bitwise_or.reduce([maps[v] for v in selected])
+        chosen = set(selected)
+        rest = [m for v, m in maps.items() if v not in chosen]
+        if not rest:
+            return self.valid[col]
+        return self.valid[col] & ~np.bitwise_or.reduce(rest)
+
+    def mask(self, **selections):
+        """Mask boolean baris; `kolom=nilai` (satu nilai) atau `kolom=[nilai, ...]`.
+
+        Kolom dengan seleksi None/kosong tidak memfilter (sama seperti app.py).
+        """
+        bits = None
+        for col, selected in selections.items():
+            if selected is None or (not isinstance(selected, str) and len(selected) == 0):
+                continue
+            if isinstance(selected, str):
+                selected = [selected]
+            col_bits = self._column_bits(col, selected)
+            bits = col_bits if bits is None else bits & col_bits
+        if bits is None:
+            return np.ones(self.n, dtype=bool)
+        return np.unpackbits(bits, count=self.n).astype(bool)
+
+    def select(self, **selections):
+        """Posisi baris (np.ndarray) yang lolos filter; pakai dengan df.iloc/df.take."""
+        return np.flatnonzero(self.mask(**selections))
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for maps in self.bitmaps.values() for b in maps.values())
+
+
+def _groups(positions, values):
+    """(nilai, posisi) per nilai non-NA."""
+    keys = pd.Series(values, dtype=object).to_numpy()
+    return [(v, rows.to_numpy()) for v, rows in pd.Series(positions).groupby(keys, sort=False, dropna=True)]
+
+
+def _set_bits(bitmap, rows, on):
+    masks = (0x80 >> (rows & 7)).astype(np.uint8)
+    if on:
+        np.bitwise_or.at(bitmap, rows >> 3, masks)
+    else:
+        np.bitwise_and.at(bitmap, rows >> 3, ~masks)
@@ -0,0 +1,165 @@
+"""Instrumentasi ringan per tahap pipeline: waktu, jumlah baris in/out, puncak memori.
+
+Pemakaian:
+    tracer = Tracer("app")
+    with tracer.stage("agg1", rows_in=len(cube_f)) as st_:
+        agg1 = rollup(...)
+        st_.rows_out = len(agg1)
+    tracer.to_frame(); tracer.dump("trace.json")
+
+Memori diukur dengan tracemalloc (alokasi Python + numpy/pandas) hanya kalau
+`track_memory=True`, karena tracemalloc menambah overhead. Nilai yang dicatat
+adalah puncak memori selama tahap dikurangi memori saat tahap dimulai.
+
+Tahap boleh dijalankan dari beberapa thread sekaligus (nesting dicatat per
+thread), tapi puncak memori tracemalloc berlaku untuk seluruh proses — ukur
+memori dengan tahap yang berjalan berurutan. tracemalloc dinyalakan oleh Tracer
+pertama yang butuh dan baru dimatikan setelah Tracer terakhir yang butuh
+ditutup (`close()`) atau dibuang, jadi satu sesi tidak mematikan pelacakan
+sesi lain.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+_tracemalloc_owned = False  # True kalau tracemalloc dinyalakan oleh modul ini
+_tracemalloc_users = 0      # Tracer track_memory yang masih hidup
+_tracemalloc_lock = threading.Lock()
+
+STAGE_COLUMNS = ["run_id", "run", "stage", "started", "seconds", "rows_in", "rows_out", "mem_peak_mb"]
+
+
+@dataclass
+class StageRecord:
+    run_id: str
+    run: str
+    stage: str
+    started: str
+    seconds: float = 0.0
+    rows_in: int = None
+    rows_out: int = None
+    mem_peak_mb: float = None
+    _mem_start: int = field(default=0, repr=False)
+    _mem_peak: int = field(default=0, repr=False)
+
+
+class Tracer:
+    def __init__(self, run="run", track_memory=False, meta=None):
+        self.run = run
+        self.run_id = uuid.uuid4().hex[:12]
+        self.track_memory = track_memory
+        self.meta = dict(meta or {})
+        self.records = []
+        self._local = threading.local()
+        self._release = None
+        if track_memory:
+            _acquire_memory_tracking()
+            self._release = weakref.finalize(self, _release_memory_tracking)
+
+    def close(self):
+        """Lepas pelacakan memori (juga otomatis saat Tracer dibuang)."""
+        if self._release is not None:
+            self._release()
+
+    @property
+    def _stack(self):
+        """Tumpukan tahap yang sedang berjalan di thread ini."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        rec = StageRecord(self.run_id, self.run, name, datetime.now().isoformat(timespec="milliseconds"),
+                          rows_in=rows_in)
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent._mem_peak = max(parent._mem_peak, peak)
+            tracemalloc.reset_peak()
+            rec._mem_start = current
+        self._stack.append(rec)
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec.seconds = round(time.perf_counter() - t0, 6)
+            self._stack.pop()
+            if self.track_memory:
+                peak = max(rec._mem_peak, tracemalloc.get_traced_memory()[1])
+                rec.mem_peak_mb = round((peak - rec._mem_start) / 2**20, 3)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent._mem_peak = max(parent._mem_peak, peak)
+            self.records.append(rec)
+
+    def _rows(self):
+        return [{k: v for k, v in asdict(r).items() if not k.startswith("_")} for r in self.records]
+
+    def to_frame(self):
+        return pd.DataFrame(self._rows(), columns=STAGE_COLUMNS)
+
+    def to_json(self):
+        return json.dumps({
+            "run_id": self.run_id, "run": self.run, "meta": self.meta,
+            "stages": self._rows(),
+        }, default=str, indent=2)
+
+    def dump(self, path):
+        """Simpan trace ke .json atau .csv (CSV di-append supaya bisa dibandingkan antar run)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if path.endswith(".csv"):
+            frame = self.to_frame()
+            frame.to_csv(path, mode="a", index=False, header=not os.path.exists(path))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.to_json())
+        return path
+
+    def summary(self):
+        return self.to_frame()[["stage", "seconds", "rows_in", "rows_out", "mem_peak_mb"]].to_string(index=False)
+
+
+def _acquire_memory_tracking():
+    """Tambah satu pemakai tracemalloc; nyalakan kalau belum menyala."""
+    global _tracemalloc_owned, _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+
+
+def _release_memory_tracking():
+    """Kurangi satu pemakai; matikan hanya kalau tidak ada lagi dan modul ini yang menyalakan."""
+    global _tracemalloc_owned, _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class NullTracer:
+    """Tracer no-op untuk fungsi yang menerima `tracer=None`."""
+
+    records = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        yield StageRecord("", "", name, "")
+
+
+NULL_TRACER = NullTracer()
@@ -0,0 +1,342 @@
+"""Kanonikalisasi nama OPD dan jabatan: varian penulisan digabung ke satu nama.
+
+`norm_space` hanya merapikan spasi, jadi "Dinas Pendidikan", "DINAS PENDIDIKAN
+DAN KEBUDAYAAN " dan "Dinas Pend." tetap jadi node/baris terpisah. Modul ini
+mengelompokkan nama yang mirip per kolom (`satuan_kerja_nama`, `jabatan_nama`):
+
+1. Kunci pencocokan: huruf besar, tanda baca jadi spasi, kata sambung dibuang.
+   Nama dengan kunci sama langsung digabung.
+2. Blocking: indeks prefix token (PREFIX_LEN huruf pertama) -> nama kanonik.
+   Semua token nama yang lebih pendek harus cocok, jadi kandidat hanya kanonik
+   yang memuat semua prefix nama ini (irisan posting, mulai dari yang paling
+   pendek) atau yang semua prefix-nya ada di nama ini (lookup subset) — tanpa
+   perbandingan semua pasangan.
+3. Verifikasi: tiap token nama yang lebih pendek cocok dengan token nama lain
+   (sama, singkatan ≤ MAX_ABBREV_LEN huruf, atau salah ketik kecil setelah
+   huruf ke-3), angka harus identik (SD Negeri 5 ≠ SD Negeri 56), dan rasio
+   jumlah token (nama pendek / nama panjang) minimal sesuai ambang kolom.
+4. Nama diproses dari yang paling sering muncul; nama yang tidak cocok dengan
+   kanonik mana pun menjadi kanonik baru (tanpa rantai A~B~C).
+
+Hanya kecocokan skor 1 (kunci sama, atau jumlah token sama dengan singkatan /
+salah ketik) yang langsung dipakai (`otomatis`). Nama yang memuat token tambahan
+("Kecamatan Kota Barat" vs "Kecamatan Kota", "Dinas Kesehatan Hewan" vs "Dinas
+Kesehatan") sering unit lain, jadi hanya dicatat sebagai `usulan` dan namanya
+tetap terpisah sampai disetujui.
+
+Hasilnya peta alias (CSV, ALIAS_PATH) yang bisa direview: baris `usulan`/`otomatis`
+boleh diubah jadi `disetujui`/`ditolak` atau kanoniknya diganti. Load berikutnya
+hanya memakai peta itu (lookup per nilai unik); hanya nama baru yang
+dikelompokkan. Pasangan `ditolak` tidak diusulkan lagi.
+
+    python kanonik.py rekap.xlsx [--alias alias_nama.csv]
+"""
+
+import argparse
+import functools
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from pipeline import COL_OPD, COL_JAB
+
+ALIAS_PATH = os.environ.get("KEPEGAWAIAN_ALIAS_PATH", "alias_nama.csv")
+ALIAS_COLUMNS = ["kolom", "alias", "kanonik", "skor", "status"]
+STATUS_KANONIK = "kanonik"       # nama sendiri jadi kanonik
+STATUS_OTOMATIS = "otomatis"     # skor 1, langsung dipakai; belum direview
+STATUS_USULAN = "usulan"         # skor < 1, belum dipakai sampai disetujui
+STATUS_DISETUJUI = "disetujui"
+STATUS_DITOLAK = "ditolak"
+ALIAS_STATUSES = [STATUS_USULAN, STATUS_OTOMATIS, STATUS_DISETUJUI, STATUS_DITOLAK, STATUS_KANONIK]
+
+PREFIX_LEN = 3
+MAX_ABBREV_LEN = 5   # PEND., KEPE.; token lebih panjang (PENGAWAS) bukan singkatan PENGAWASAN
+MAX_SUBSET_KEYS = 10   # nama dengan prefix lebih banyak tidak dicari ke arah kanonik yang lebih pendek
+STOPWORDS = {"DAN", "DI", "KE", "DARI", "YANG", "PADA", "UNTUK"}
+
+_PUNCT = re.compile(r"[^\w\s]")
+_NUMBER = re.compile(r"^(\d+|[IVX]+)$")
+
+# ambang rasio token (nama pendek / nama panjang) untuk usulan per kolom; jabatan lebih
+# ketat supaya "Kepala Seksi Pelayanan" vs "... Pelayanan Publik" tidak diusulkan
+THRESHOLDS = {COL_OPD: 0.5, COL_JAB: 0.8}
+
+_FILE_LOCK = threading.Lock()
+
+
+def match_tokens(name):
+    """Token kunci pencocokan (huruf besar, tanpa tanda baca dan kata sambung)."""
+    return tuple(t for t in _PUNCT.sub(" ", str(name).upper()).split() if t not in STOPWORDS)
+
+
+def _bigrams(t):
+    return {t[i:i + 2] for i in range(len(t) - 1)}
+
+
+@functools.lru_cache(maxsize=1 << 18)
+def _token_match(a, b):
+    if a == b:
+        return True
+    if _NUMBER.match(a) or _NUMBER.match(b):
+        return False
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if PREFIX_LEN <= len(short) <= MAX_ABBREV_LEN and long.startswith(short):
+        return True   # singkatan: PEND -> PENDIDIKAN
+    if len(short) >= 5 and len(long) - len(short) <= 2 and short[:PREFIX_LEN] == long[:PREFIX_LEN]:
+        x, y = _bigrams(a), _bigrams(b)
+        return 2 * len(x & y) / (len(x) + len(y)) >= 0.8   # salah ketik (SARANA ≠ PRASARANA)
+    return False
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _numbers(tokens):
+    return tuple(sorted(t for t in tokens if _NUMBER.match(t)))
+
+
+def similarity(a, b):
+    """len(pendek) / len(panjang) dua tuple token kalau semua token yang lebih pendek cocok; selain itu 0.
+
+    Skor 1 = jumlah token sama dan semuanya cocok (sama, singkatan atau salah ketik).
+    """
+    if a == b:
+        return 1.0
+    if _numbers(a) != _numbers(b):
+        return 0.0
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if len(short) < 2:
+        return 0.0   # satu kata (mis. "GURU") hanya digabung kalau kuncinya sama
+    used = set()
+    for t in short:
+        j = next((j for j, u in enumerate(long) if j not in used and _token_match(t, u)), None)
+        if j is None:
+            return 0.0
+        used.add(j)
+    return len(short) / len(long)
+
+
+def _block_keys(tokens):
+    return frozenset(t[:PREFIX_LEN] for t in tokens)
+
+
+class Clusterer:
+    """Indeks blocking atas nama kanonik; `assign` mencari kanonik terdekat untuk nama baru."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.names = []                   # id -> (tuple token, kanonik)
+        self.by_key = {}                  # tuple token -> kanonik
+        self.postings = defaultdict(set)  # prefix token -> {id}
+        self.by_keyset = defaultdict(list)  # frozenset prefix -> [id]
+        self.comparisons = 0
+
+    def add(self, name):
+        tokens = match_tokens(name)
+        if tokens in self.by_key:
+            return
+        self.by_key[tokens] = name
+        i = len(self.names)
+        self.names.append((tokens, name))
+        keys = _block_keys(tokens)
+        for k in keys:
+            self.postings[k].add(i)
+        self.by_keyset[keys].append(i)
+
+    def candidates(self, tokens):
+        keys = _block_keys(tokens)
+        if not keys:
+            return set()
+        # kanonik yang memuat semua prefix nama ini
+        postings = sorted((self.postings.get(k, set()) for k in keys), key=len)
+        found = set(postings[0]).intersection(*postings[1:])
+        # kanonik yang semua prefix-nya ada di nama ini (kanonik lebih pendek)
+        if len(keys) <= MAX_SUBSET_KEYS:
+            for size in range(1, len(keys)):
+                for subset in combinations(keys, size):
+                    found.update(self.by_keyset.get(frozenset(subset), ()))
+        return found
+
+    def assign(self, name, rejected=()):
+        """(kanonik, skor); kanonik = None kalau tidak ada yang cocok."""
+        tokens = match_tokens(name)
+        same = self.by_key.get(tokens)
+        if same is not None and same not in rejected:
+            return same, 1.0
+        best, best_score = None, 0.0
+        for i in self.candidates(tokens):
+            cand_tokens, cand = self.names[i]
+            n, m = sorted((len(tokens), len(cand_tokens)))
+            if n < self.threshold * m or n / m <= best_score or cand in rejected:
+                continue   # skor maksimum = n/m, tidak mungkin lolos/menang
+            self.comparisons += 1
+            score = similarity(tokens, cand_tokens)
+            if score >= self.threshold and score > best_score:
+                best, best_score = cand, score
+        return best, best_score
+
+
+class AliasMap:
+    """Peta alias per kolom (baris: kolom, alias, kanonik, skor, status), disimpan sebagai CSV."""
+
+    def __init__(self, rows=None):
+        self.rows = (pd.DataFrame(rows, columns=ALIAS_COLUMNS) if rows is not None
+                     else pd.DataFrame(columns=ALIAS_COLUMNS))
+        self.added = 0
+        self.comparisons = 0
+
+    @classmethod
+    def load(cls, path=ALIAS_PATH):
+        if not os.path.exists(path):
+            return cls()
+        rows = pd.read_csv(path, dtype={"kolom": str, "alias": str, "kanonik": str, "status": str},
+                           keep_default_na=False)
+        return cls(rows.reindex(columns=ALIAS_COLUMNS))
+
+    def save(self, path=ALIAS_PATH):
+        rows = self.rows.sort_values(["kolom", "kanonik", "alias"], kind="stable")
+        tmp = f"{path}.tmp"
+        rows.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+    def _pending(self):
+        """Baris yang belum dipakai: `usulan`, dan `otomatis` dengan skor < 1 (peta versi lama)."""
+        score = pd.to_numeric(self.rows["skor"], errors="coerce")
+        return ((self.rows["status"] == STATUS_USULAN)
+                | ((self.rows["status"] == STATUS_OTOMATIS) & ~(score >= 1)))
+
+    def mapping(self, column):
+        """alias -> kanonik (baris aktif; rantai alias diikuti sampai kanonik akhir).
+
+        Alias yang masih usulan dipetakan ke dirinya sendiri (dikenal, tapi belum digabung).
+        """
+        in_column = self.rows["kolom"] == column
+        pending = self._pending()
+        rows = self.rows[in_column & (self.rows["status"] != STATUS_DITOLAK) & ~pending]
+        direct = dict(zip(rows["alias"], rows["kanonik"]))
+        resolved = {}
+        for alias in direct:
+            target, hops = direct[alias], 0
+            while target in direct and direct[target] != target and hops < len(direct):
+                target, hops = direct[target], hops + 1
+            resolved[alias] = target
+        for target in set(resolved.values()):
+            resolved.setdefault(target, target)   # kanonik hasil review tetap kanonik
+        for alias in self.rows.loc[in_column & pending, "alias"]:
+            resolved.setdefault(alias, alias)
+        return resolved
+
+    def rejected(self, column):
+        rows = self.rows[(self.rows["kolom"] == column) & (self.rows["status"] == STATUS_DITOLAK)]
+        out = defaultdict(set)
+        for alias, target in zip(rows["alias"], rows["kanonik"]):
+            out[alias].add(target)
+        return out
+
+    def canonicalize(self, names, counts, column):
+        """Kanonik untuk tiap nama; nama yang belum ada di peta dikelompokkan dan ditambahkan (`added`)."""
+        mapping = self.mapping(column)
+        new = [(n, c) for n, c in zip(names, counts) if n not in mapping]
+        if not new:
+            return {n: mapping[n] for n in names}
+        rejected = self.rejected(column)
+        leaders = sorted(set(mapping.values()))
+        clusterer = Clusterer(THRESHOLDS.get(column, THRESHOLDS[COL_OPD]))
+        for leader in leaders:
+            clusterer.add(leader)
+        rows = []
+        # paling sering dulu: varian yang paling umum jadi nama kanonik
+        for name, _ in sorted(new, key=lambda nc: (-nc[1], nc[0])):
+            target, score = clusterer.assign(name, rejected.get(name, ()))
+            if target is None:
+                clusterer.add(name)
+                target, score, status = name, 1.0, STATUS_KANONIK
+            elif score < 1:
+                # superset token: tetap nama sendiri sampai usulan disetujui
+                clusterer.add(name)
+                status = STATUS_USULAN
+            else:
+                status = STATUS_OTOMATIS
+            mapping[name] = target if status != STATUS_USULAN else name
+            rows.append((column, name, target, round(score, 3), status))
+        self.rows = pd.concat([self.rows, pd.DataFrame(rows, columns=ALIAS_COLUMNS)], ignore_index=True)
+        self.added += len(rows)
+        self.comparisons += clusterer.comparisons
+        return {n: mapping[n] for n in names}
+
+    def apply(self, s, column):
+        """Kolom kategori -> kolom kategori dengan nama kanonik (jumlah baris per nama jadi bobot urutan)."""
+        if not isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype("category")
+        names = list(s.cat.categories)
+        counts = np.bincount(s.cat.codes.to_numpy()[s.cat.codes.to_numpy() >= 0], minlength=len(names))
+        mapping = self.canonicalize(names, counts, column)
+        canon = [mapping[n] for n in names]
+        categories = pd.Index(sorted(set(canon)), dtype=object)
+        remap = np.append(categories.get_indexer(canon), -1)
+        return pd.Series(pd.Categorical.from_codes(remap[s.cat.codes.to_numpy()], categories=categories),
+                         index=s.index, name=s.name)
+
+    def aliases(self):
+        """Baris yang benar-benar menggabungkan nama (alias ≠ kanonik), untuk review.
+
+        Urutan: `usulan` lalu `otomatis` dulu, skor terendah (paling meragukan) di atas.
+        """
+        rows = self.rows[self.rows["alias"] != self.rows["kanonik"]]
+        review = rows["status"].map({STATUS_USULAN: 0, STATUS_OTOMATIS: 1}).fillna(2)
+        rows = rows.assign(_review=review).sort_values(["_review", "skor"], kind="stable")
+        return rows.drop(columns="_review").reset_index(drop=True)
+
+
+def canonicalize_frame(df, path=ALIAS_PATH, columns=tuple(THRESHOLDS)):
+    """Kanonikalisasi kolom `columns` df (in place) dengan peta di `path`; peta disimpan kalau bertambah.
+
+    Return jumlah baris peta yang ditambahkan.
+    """
+    with _FILE_LOCK:
+        aliases = AliasMap.load(path)
+        for c in columns:
+            if c in df.columns:
+                df[c] = aliases.apply(df[c], c)
+        if aliases.added:
+            aliases.save(path)
+    return aliases.added
+
+
+def save_review(reviewed, path=ALIAS_PATH):
+    """Simpan hasil review baris alias (alias ≠ kanonik); baris kanonik di file dipertahankan."""
+    with _FILE_LOCK:
+        aliases = AliasMap.load(path)
+        kept = aliases.rows[aliases.rows["alias"] == aliases.rows["kanonik"]]
+        aliases.rows = pd.concat([kept, reviewed.reindex(columns=ALIAS_COLUMNS)], ignore_index=True)
+        aliases.save(path)
+
+
+if __name__ == "__main__":
+    from pipeline import read_table
+    from normalisasi import normalize_column
+
+    parser = argparse.ArgumentParser(description="Susun/perbarui peta alias OPD & jabatan dari file rekap.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--alias", default=ALIAS_PATH, help=f"file peta alias (default {ALIAS_PATH})")
+    args = parser.parse_args()
+
+    aliases = AliasMap.load(args.alias)
+    for src in args.files:
+        df = read_table(src, src)
+        for c in THRESHOLDS:
+            if c not in df.columns:
+                continue
+            s = normalize_column(df[c])
+            t0 = time.perf_counter()
+            before = aliases.added
+            out = aliases.apply(s, c)
+            print(f"{src} [{c}]: {len(s.cat.categories):,} nama -> {len(out.cat.categories):,} kanonik, "
+                  f"{aliases.added - before:,} baris peta baru ({time.perf_counter() - t0:.2f}s)")
+    if aliases.added:
+        aliases.save(args.alias)
+        print(f"Peta alias disimpan: {args.alias} ({len(aliases.aliases()):,} alias untuk direview)")
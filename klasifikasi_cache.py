@@ -0,0 +1,155 @@
+"""Cache klasifikasi eselon persisten (SQLite) per pasangan (jabatan, jenis).
+
+Kunci = (hash ruleset, jabatan ternormalisasi, jenis ternormalisasi), jadi run
+berikutnya hanya mengklasifikasi jabatan yang belum pernah dilihat. Saat ruleset
+berubah, entri ruleset sebelumnya disalin ke ruleset baru kecuali yang jabatannya
+memuat keyword terdampak (ditambah, dihapus, ganti eselon atau ganti urutan
+prioritas) — hanya entri itu yang diklasifikasi ulang. Kalau keyword fungsional
+atau pola ambigu berubah, semua entri dianggap terdampak.
+"""
+
+import json
+import re
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_PATH = "klasifikasi_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ruleset (
+    hash TEXT PRIMARY KEY,
+    version TEXT,
+    config TEXT NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS klasifikasi (
+    ruleset TEXT NOT NULL,
+    jabatan TEXT NOT NULL,
+    jenis TEXT NOT NULL,
+    eselon TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    PRIMARY KEY (ruleset, jabatan, jenis)
+) WITHOUT ROWID;
+"""
+
+
+def _keyword_order(config):
+    """Keyword -> eselon dalam urutan prioritas (kemunculan pertama menang)."""
+    order = {}
+    for rule in config["rules"]:
+        for kw in rule["keywords"]:
+            order.setdefault(kw, rule["eselon"])
+    return order
+
+
+def affected_keywords(old, new):
+    """Keyword yang hasil klasifikasinya bisa berubah dari config `old` ke `new`.
+
+    Jabatan yang tidak memuat satu pun keyword ini pasti hasilnya sama.
+    Return None kalau semua entri terdampak (keyword fungsional/pola ambigu berubah).
+    """
+    if (old["fungsional_keywords"] != new["fungsional_keywords"]
+            or old["ambiguous_pattern"] != new["ambiguous_pattern"]):
+        return None
+    a, b = _keyword_order(old), _keyword_order(new)
+    changed = set(a.keys() ^ b.keys())
+    changed |= {kw for kw in a.keys() & b.keys() if a[kw] != b[kw]}
+    # urutan relatif berubah: tiap keyword yang posisinya bergeser ikut ditandai,
+    # sehingga minimal satu anggota dari setiap pasangan yang terbalik tertangkap
+    common_a = [kw for kw in a if kw in b]
+    common_b = [kw for kw in b if kw in a]
+    changed |= {x for x, y in zip(common_a, common_b) if x != y}
+    return changed
+
+
+def _key(s):
+    """Kunci teks untuk SQLite; NA dan "" sama-sama berarti kosong bagi classifier."""
+    return s.astype(object).where(s.notna(), "").astype(str)
+
+
+class KlasifikasiCache:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.carried = 0
+        self._prepared = set()
+
+    def prepare(self, ruleset):
+        """Daftarkan ruleset; kalau baru, salin entri ruleset terakhir yang tidak terdampak."""
+        if ruleset.hash in self._prepared:
+            return
+        with self.conn:
+            prev = self.conn.execute(
+                "SELECT hash, config FROM ruleset WHERE hash != ? ORDER BY created DESC LIMIT 1",
+                (ruleset.hash,),
+            ).fetchone()
+            inserted = self.conn.execute(
+                "INSERT OR IGNORE INTO ruleset VALUES (?, ?, ?, ?)",
+                (ruleset.hash, ruleset.version, json.dumps(ruleset.to_config(), ensure_ascii=False),
+                 datetime.now().isoformat(timespec="seconds")),
+            ).rowcount
+            if inserted and prev:
+                self._carry_over(prev[0], json.loads(prev[1]), ruleset)
+        self._prepared.add(ruleset.hash)
+
+    def _carry_over(self, prev_hash, prev_config, ruleset):
+        changed = affected_keywords(prev_config, ruleset.to_config())
+        if changed is None:
+            return
+        rows = pd.read_sql_query(
+            "SELECT jabatan, jenis, eselon, reason FROM klasifikasi WHERE ruleset = ?",
+            self.conn, params=(prev_hash,),
+        )
+        if changed and len(rows):
+            pattern = "|".join(re.escape(kw) for kw in sorted(changed))
+            rows = rows[~rows["jabatan"].str.contains(pattern, regex=True)]
+        rows.insert(0, "ruleset", ruleset.hash)
+        self.conn.executemany("INSERT OR IGNORE INTO klasifikasi VALUES (?, ?, ?, ?, ?)",
+                              rows.itertuples(index=False, name=None))
+        self.carried += len(rows)
+
+    def lookup(self, jabatan, jenis, ruleset):
+        """DataFrame eselon/eselon_reason sejajar dengan input; None untuk yang belum ada di cache."""
+        self.prepare(ruleset)
+        keys = pd.DataFrame({"jabatan": _key(jabatan).to_numpy(), "jenis": _key(jenis).to_numpy()})
+        result = pd.DataFrame({"eselon": None, "eselon_reason": None}, index=keys.index, dtype=object)
+        if len(keys):
+            with self.conn:
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _keys (pos INTEGER, jabatan TEXT, jenis TEXT)")
+                self.conn.execute("DELETE FROM _keys")
+                self.conn.executemany("INSERT INTO _keys VALUES (?, ?, ?)", keys.itertuples(name=None))
+            found = pd.read_sql_query(
+                "SELECT k.pos, c.eselon, c.reason FROM _keys k JOIN klasifikasi c"
+                " ON c.ruleset = ? AND c.jabatan = k.jabatan AND c.jenis = k.jenis",
+                self.conn, params=(ruleset.hash,),
+            )
+            result.loc[found["pos"].to_numpy(), "eselon"] = found["eselon"].to_numpy()
+            result.loc[found["pos"].to_numpy(), "eselon_reason"] = found["reason"].to_numpy()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        result.index = jabatan.index
+        return result
+
+    def store(self, jabatan, jenis, eselon, reason, ruleset):
+        self.prepare(ruleset)
+        rows = zip([ruleset.hash] * len(jabatan), _key(jabatan), _key(jenis), eselon, reason)
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO klasifikasi VALUES (?, ?, ?, ?, ?)", rows)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "carried": self.carried}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -11,12 +11,33 @@ Original file is located at
 # Inferensi Eselon dari Jabatan
 # ============================
 
-import pandas as pd, re, os
+import pandas as pd, re, os, sys, glob, time, argparse, json, hashlib, itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from instrumentasi import NULL_TRACER, Tracer
+from klasifikasi_cache import KlasifikasiCache
+from normalisasi import norm_space as _norm_space, normalize_column
 
 # --- SETUP PATH FILE ---
 PATH_XLSX = "rekap_pegawai.xlsx"  # ganti sesuai file Anda
 SHEET_NAME = None                          # None = sheet pertama
 PATH_CSV  = None                           # isi jika pakai CSV
+PATH_SNAPSHOT = None                       # isi path .arrow dari snapshot.py (tanpa parse ulang)
+
+# --- OUTPUT & MODE STREAMING ---
+OUT_PATH   = "rekap_with_eselon.csv"       # .csv atau .parquet
+CHUNK_SIZE = None                          # isi (mis. 100_000) untuk mode streaming per chunk
+SNAPSHOT_CHUNK_SIZE = 100_000              # snapshot .arrow selalu dibaca per chunk dari file memory-mapped
+
+# --- RULESET & CACHE ---
+RULES_PATH = os.environ.get(               # aturan jabatan -> eselon (berversi)
+    "ESELON_RULES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules_eselon.json"))
+CACHE_PATH = "klasifikasi_cache.sqlite"    # None = tanpa cache persisten
+
+# --- INSTRUMENTASI ---
+TRACE_PATH   = None                        # isi (.json/.csv) untuk menyimpan timing per tahap
+TRACK_MEMORY = False                       # True = ukur puncak memori per tahap (tracemalloc)
 
 # --- NAMA KOLOM DI DATA ---
 COL_OPD    = "satuan_kerja_nama"
@@ -25,7 +46,12 @@ COL_JJENIS = "jabatan_jenis"
 
 # --- LOAD DATA ---
 def load_df():
-    if PATH_CSV and os.path.exists(PATH_CSV):
+    if PATH_SNAPSHOT and os.path.exists(PATH_SNAPSHOT):
+        from snapshot import load_snapshot
+        df, info = load_snapshot(PATH_SNAPSHOT)
+        print(f"Loaded snapshot: {PATH_SNAPSHOT} | source={info.source} | rows={len(df)}")
+        return df
+    elif PATH_CSV and os.path.exists(PATH_CSV):
         df = pd.read_csv(PATH_CSV)
         print(f"Loaded CSV: {PATH_CSV} | rows={len(df)}")
         return df
@@ -38,34 +64,56 @@ def load_df():
     else:
         raise FileNotFoundError("Upload file Excel/CSV ke Colab dan sesuaikan PATH_XLSX/PATH_CSV.")
 
-df = load_df()
-
 # ============================
 # Normalisasi teks
 # ============================
 def norm_space(x):
-    if pd.isna(x): return None
-    x = str(x).strip()
-    x = re.sub(r"\s+", " ", x)
-    return x.upper() if x else None
-
-df[COL_JAB] = df[COL_JAB].map(norm_space)
-df[COL_JJENIS] = df[COL_JJENIS].map(norm_space)
+    return _norm_space(x, upper=True)
 
 # ============================
-# RULESET: Jabatan → Eselon
+# RULESET: Jabatan → Eselon (dari rules_eselon.json)
 # ============================
-rules = [
-    # Eselon II
-    (["KEPALA DINAS","KEPALA BADAN","SEKDA","SEKRETARIS DAERAH",
-      "INSPEKTUR","DIREKTUR","STAF AHLI"], "II"),
-    # Eselon III
-    (["KEPALA BIDANG","KABID","CAMAT","KABAG","SEKRETARIS DINAS",
-      "SEKRETARIS BADAN","SEKRETARIS KECAMATAN"], "III"),
-    # Eselon IV
-    (["KEPALA SEKSI","KASI","KEPALA SUB BAGIAN","KASUBAG",
-      "KEPALA SUB BIDANG","KASUBBID","LURAH","KAUR"], "IV"),
-]
+@dataclass
+class Ruleset:
+    version: str
+    rules: list                  # [(keywords, eselon), ...] urut prioritas
+    fungsional_keywords: list
+    ambiguous_pattern: str
+    path: str = None
+
+    def to_config(self):
+        """Isi yang menentukan hasil klasifikasi (tanpa version/description)."""
+        return {
+            "rules": [{"eselon": es, "keywords": list(kws)} for kws, es in self.rules],
+            "fungsional_keywords": list(self.fungsional_keywords),
+            "ambiguous_pattern": self.ambiguous_pattern,
+        }
+
+    @property
+    def hash(self):
+        raw = json.dumps(self.to_config(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def load_ruleset(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    missing = [k for k in ("rules", "fungsional_keywords", "ambiguous_pattern") if k not in config]
+    if missing:
+        raise ValueError(f"{path}: key {missing} tidak ada di file ruleset")
+    return Ruleset(
+        version=str(config.get("version", "")),
+        rules=[(list(r["keywords"]), r["eselon"]) for r in config["rules"]],
+        fungsional_keywords=list(config["fungsional_keywords"]),
+        ambiguous_pattern=config["ambiguous_pattern"],
+        path=path,
+    )
+
+
+RULESET = load_ruleset()
+rules = RULESET.rules
+FUNGSIONAL_KEYWORDS = RULESET.fungsional_keywords
+AMBIGUOUS_PATTERN = RULESET.ambiguous_pattern
 
 
 def infer_eselon(jabatan, jenis):
@@ -73,7 +121,7 @@ def infer_eselon(jabatan, jenis):
         return "Non-Eselon", "no_data"
 
     # Fungsional
-    if jenis and any(k in jenis for k in ["JFU","JFT","FUNGSIONAL"]):
+    if jenis and any(k in jenis for k in FUNGSIONAL_KEYWORDS):
         return "Non-Eselon", "fungsional"
 
     # Cek rules
@@ -83,26 +131,507 @@ def infer_eselon(jabatan, jenis):
                 return es, f"match:{kw}"
 
     # Ambigu: ada kata kepala/sekretaris/kabid/kasi/kasub tanpa detail
-    if jabatan and re.search(r"\b(KEPALA|SEKRETARIS|KABAG|KABID|KASI|KASUB)\b", jabatan):
+    if jabatan and re.search(AMBIGUOUS_PATTERN, jabatan):
         return "III/IV", "ambiguous_structural"
 
     # Default
     return "Non-Eselon", "default"
 
-df[["eselon","eselon_reason"]] = df.apply(
-    lambda r: pd.Series(infer_eselon(r[COL_JAB], r[COL_JJENIS])), axis=1
-)
+# ============================
+# Engine vektor: dedupe dulu, klasifikasi sekali per pasangan unik
+# ============================
+
+
+def compile_rules(rules):
+    """Satu regex multi-pattern untuk semua keyword, urut sesuai prioritas rules.
+
+    Dibungkus lookahead supaya setiap posisi dicek (match boleh tumpang tindih);
+    di satu posisi alternation memilih keyword berprioritas tertinggi, lalu
+    diambil prioritas minimum antar posisi -> sama dengan loop di infer_eselon.
+    """
+    keywords, eselons = [], []
+    for kws, es in rules:
+        for kw in kws:
+            keywords.append(kw)
+            eselons.append(es)
+    pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in keywords) + "))")
+    priority = {kw: i for i, kw in reversed(list(enumerate(keywords)))}
+    return pattern, keywords, eselons, priority
+
+
+def _classify_unique(jabatan, jenis, ruleset):
+    """Klasifikasi vektor untuk pasangan (jabatan, jenis) yang sudah unik."""
+    pattern, keywords, eselons, priority = compile_rules(ruleset.rules)
+    jabatan = jabatan.astype(object)
+    jenis = jenis.astype(object)
+    has_jab = jabatan.notna() & (jabatan != "")
+    has_jenis = jenis.notna() & (jenis != "")
+
+    n = len(jabatan)
+    eselon = pd.Series("Non-Eselon", index=jabatan.index, dtype=object)
+    reason = pd.Series("default", index=jabatan.index, dtype=object)
+
+    # Rules: semua match -> ambil keyword dengan prioritas terkecil per baris
+    matched = pd.Series(False, index=jabatan.index)
+    if n and has_jab.any():
+        hits = jabatan[has_jab].str.extractall(pattern)[0]
+        if len(hits):
+            prio = hits.map(priority).groupby(level=0).min()
+            kw = pd.Series([keywords[p] for p in prio], index=prio.index, dtype=object)
+            eselon.loc[prio.index] = [eselons[p] for p in prio]
+            reason.loc[prio.index] = "match:" + kw
+            matched.loc[prio.index] = True
+
+    ambiguous = has_jab & ~matched & jabatan.where(has_jab, "").str.contains(ruleset.ambiguous_pattern, regex=True)
+    eselon[ambiguous] = "III/IV"
+    reason[ambiguous] = "ambiguous_structural"
+
+    fungsional = has_jenis & jenis.where(has_jenis, "").str.contains(
+        "|".join(map(re.escape, ruleset.fungsional_keywords)), regex=True
+    )
+    eselon[fungsional] = "Non-Eselon"
+    reason[fungsional] = "fungsional"
+
+    no_data = ~has_jab & ~has_jenis
+    eselon[no_data] = "Non-Eselon"
+    reason[no_data] = "no_data"
+    return eselon, reason
+
+
+def classify_eselon(df, col_jab=COL_JAB, col_jjenis=COL_JJENIS, ruleset=RULESET, cache=None):
+    """Kolom eselon/eselon_reason untuk df, hasil identik dengan infer_eselon per baris.
+
+    Hanya pasangan unik (jabatan, jenis) yang diklasifikasi; hasilnya disebar
+    kembali ke tiap baris lewat kode grup. Dengan `cache` (KlasifikasiCache),
+    pasangan yang sudah pernah diklasifikasi dengan ruleset yang sama diambil
+    dari cache dan hanya sisanya yang diklasifikasi lalu disimpan.
+    """
+    codes, uniq = pd.factorize(pd.MultiIndex.from_frame(df[[col_jab, col_jjenis]]))
+    uniq = uniq.to_frame(index=False, name=[col_jab, col_jjenis])
+    if cache is None:
+        eselon, reason = _classify_unique(uniq[col_jab], uniq[col_jjenis], ruleset)
+    else:
+        known = cache.lookup(uniq[col_jab], uniq[col_jjenis], ruleset)
+        miss = known["eselon"].isna()
+        if miss.any():
+            new = uniq[miss]
+            e, r = _classify_unique(new[col_jab], new[col_jjenis], ruleset)
+            known.loc[miss, "eselon"] = e
+            known.loc[miss, "eselon_reason"] = r
+            cache.store(new[col_jab], new[col_jjenis], e, r, ruleset)
+        eselon, reason = known["eselon"], known["eselon_reason"]
+    return pd.DataFrame(
+        {"eselon": eselon.to_numpy()[codes], "eselon_reason": reason.to_numpy()[codes]},
+        index=df.index,
+    )
+
+
+def verify_against_reference(df, col_jab=COL_JAB, col_jjenis=COL_JJENIS):
+    """Bandingkan classify_eselon dengan infer_eselon pada pasangan unik; kembalikan baris yang beda."""
+    uniq = df[[col_jab, col_jjenis]].drop_duplicates().astype(object)
+    uniq = uniq.where(uniq.notna(), None)
+    fast = classify_eselon(uniq, col_jab, col_jjenis)
+    ref = pd.DataFrame(
+        [infer_eselon(j, k) for j, k in zip(uniq[col_jab], uniq[col_jjenis])],
+        columns=["eselon", "eselon_reason"], index=uniq.index,
+    )
+    diff = (fast != ref).any(axis=1)
+    return uniq[diff].join(fast[diff]).join(ref[diff], rsuffix="_ref")
+
+
+# ============================
+# Mode streaming: baca, klasifikasi, tulis per chunk
+# ============================
+def iter_chunks(chunk_size, path=None, sheet=None):
+    """Sumber yang sama dengan load_df (atau `path`/`sheet`), tapi dibaca per `chunk_size` baris.
+
+    Semua kolom dibaca sebagai teks supaya tipe tiap chunk konsisten (NIP tidak
+    berubah jadi float di chunk yang punya nilai kosong).
+    """
+    if path is None:
+        if PATH_SNAPSHOT and os.path.exists(PATH_SNAPSHOT):
+            path = PATH_SNAPSHOT
+        elif PATH_CSV and os.path.exists(PATH_CSV):
+            path = PATH_CSV
+        elif os.path.exists(PATH_XLSX):
+            path, sheet = PATH_XLSX, SHEET_NAME
+        else:
+            raise FileNotFoundError("Upload file Excel/CSV ke Colab dan sesuaikan PATH_XLSX/PATH_CSV.")
+    if path.endswith(".arrow"):
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                for batch in pa.Table.from_batches([reader.get_batch(i)]).to_batches(chunk_size):
+                    yield batch.to_pandas()
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif path.endswith(".csv"):
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str)
+    else:
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet] if sheet else wb.worksheets[0]
+            rows = ws.iter_rows(values_only=True)
+            header = [str(h) for h in next(rows)]
+            batch = []
+            for row in rows:
+                batch.append([None if v is None else str(v) for v in row])
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            wb.close()
+
+
+class ChunkWriter:
+    """Tulis chunk secara append ke CSV atau Parquet (dipilih dari ekstensi path)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self._first = True
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa, pyarrow.parquet as pq
+            chunk = chunk.astype({c: "string" for c in chunk.columns if not pd.api.types.is_numeric_dtype(chunk[c])})
+            if self._writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, schema)
+            self._writer.write_table(pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False))
+        else:
+            chunk.to_csv(self.path, index=False, mode="w" if self._first else "a", header=self._first)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def classify_chunk(chunk, tracer=None, cache=None):
+    tracer = tracer or NULL_TRACER
+    with tracer.stage("normalize", rows_in=len(chunk)):
+        chunk[COL_JAB] = normalize_column(chunk[COL_JAB], upper=True)
+        chunk[COL_JJENIS] = normalize_column(chunk[COL_JJENIS], upper=True)
+    with tracer.stage("classify", rows_in=len(chunk)) as stage:
+        chunk[["eselon","eselon_reason"]] = classify_eselon(chunk, cache=cache)
+        stage.rows_out = len(chunk)
+    return chunk
+
+
+def open_cache(path=CACHE_PATH):
+    return KlasifikasiCache(path) if path else None
+
+
+def print_cache_stats(cache):
+    if cache is not None:
+        s = cache.stats()
+        print(f"Cache klasifikasi ({cache.path}, ruleset {RULESET.version}/{RULESET.hash}): "
+              f"hit={s['hits']} | miss={s['misses']} | disalin dari ruleset lama={s['carried']}")
+
+
+def finish_trace(tracer, path=None):
+    """Cetak ringkasan timing dan simpan trace kalau `path` diisi."""
+    print("\n== Timing per tahap ==")
+    print(tracer.summary())
+    if path:
+        print(f"Trace disimpan ke: {tracer.dump(path)}")
+
+
+def main_streaming(chunk_size=CHUNK_SIZE, out_path=OUT_PATH, tracer=None, cache=None):
+    """Klasifikasi per chunk; memori puncak sebanding chunk_size, bukan ukuran file."""
+    tracer = tracer or NULL_TRACER
+    writer = ChunkWriter(out_path)
+    counts = pd.Series(dtype="int64")
+    sample = None
+    rows = 0
+    chunks = iter_chunks(chunk_size)
+    try:
+        for i in itertools.count(1):
+            with tracer.stage("read") as stage:
+                chunk = next(chunks, None)
+                stage.rows_out = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            chunk = classify_chunk(chunk, tracer, cache)
+            counts = counts.add(chunk["eselon"].value_counts(dropna=False), fill_value=0)
+            if sample is None:
+                sample = chunk[[COL_OPD, COL_JAB, COL_JJENIS, "eselon","eselon_reason"]].head(15)
+            with tracer.stage("write", rows_in=len(chunk)):
+                writer.write(chunk)
+            rows += len(chunk)
+            print(f"chunk {i}: rows={len(chunk)} | total={rows}")
+    finally:
+        writer.close()
+
+    print("== Distribusi Eselon ==")
+    print(counts.astype("int64").sort_values(ascending=False).rename("count"))
+
+    if sample is not None:
+        print("\n== Contoh data ==")
+        print(sample.to_string(index=False))
+    print(f"\nFile hasil disimpan ke: {out_path}")
+
+
+def main():
+    tracer = Tracer("klasifikasi_eselon", track_memory=TRACK_MEMORY)
+    cache = open_cache(CACHE_PATH)
+    snapshot = bool(PATH_SNAPSHOT and os.path.exists(PATH_SNAPSHOT))
+    if CHUNK_SIZE or snapshot:
+        main_streaming(CHUNK_SIZE or SNAPSHOT_CHUNK_SIZE, OUT_PATH, tracer, cache)
+        print_cache_stats(cache)
+        return finish_trace(tracer, TRACE_PATH)
+
+    with tracer.stage("load") as stage:
+        df = load_df()
+        stage.rows_out = len(df)
+    df = classify_chunk(df, tracer, cache)
+
+    # ============================
+    # AUDIT & RINGKASAN
+    # ============================
+    print("== Distribusi Eselon ==")
+    print(df["eselon"].value_counts(dropna=False))
+
+    print("\n== Contoh data ==")
+    print(df[[COL_OPD, COL_JAB, COL_JJENIS, "eselon","eselon_reason"]].head(15).to_string(index=False))
+
+    # Simpan hasil
+    with tracer.stage("write", rows_in=len(df)):
+        writer = ChunkWriter(OUT_PATH)
+        writer.write(df)
+        writer.close()
+    print(f"\nFile hasil disimpan ke: {OUT_PATH}")
+    print_cache_stats(cache)
+    finish_trace(tracer, TRACE_PATH)
+
+
 
 # ============================
-# AUDIT & RINGKASAN
+# CLI batch: banyak file / banyak sheet, paralel
 # ============================
-print("== Distribusi Eselon ==")
-print(df["eselon"].value_counts(dropna=False))
+def missing_inputs(header):
+    """Kolom input klasifikasi yang tidak ada di `header`."""
+    return [c for c in (COL_JAB, COL_JJENIS) if c not in header]
+
+
+def expand_inputs(patterns, all_sheets=False, sheet=None):
+    """Daftar task (path, sheet) dari path/glob; sheet None untuk CSV/snapshot.
+
+    Dengan `all_sheets`, sheet tanpa kolom jabatan (mis. sheet keterangan) dilewati,
+    sama seperti pipeline.read_table.
+    """
+    from pipeline import read_headers
+    tasks = []
+    for pat in patterns:
+        paths = sorted(glob.glob(pat)) or [pat]
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            if path.lower().endswith(".xls"):
+                # openpyxl tidak bisa membuka .xls lama; gagal di sini, bukan di worker pool
+                raise ValueError(f"{path}: format .xls tidak didukung, simpan ulang sebagai .xlsx")
+            if path.endswith((".xlsx", ".xlsm")):
+                if sheet:
+                    sheets = [sheet]
+                elif all_sheets:
+                    headers = read_headers(path, path)
+                    sheets = [sh for sh, h in headers.items() if len(missing_inputs(h)) < 2] or list(headers)[:1]
+                    skipped = [sh for sh in headers if sh not in sheets]
+                    if skipped:
+                        print(f"{path}: sheet tanpa kolom jabatan dilewati: {skipped}")
+                else:
+                    sheets = pd.ExcelFile(path).sheet_names[:1]
+                tasks.extend((path, sh) for sh in sheets)
+            else:
+                tasks.append((path, None))
+    return tasks
+
+
+def read_source(path, sheet=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_excel(path, sheet_name=sheet or 0)
+
+
+def output_path(out_dir, path, sheet, fmt):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if sheet:
+        stem += "__" + re.sub(r"[^\w.-]+", "_", sheet)
+    return os.path.join(out_dir, f"{stem}_with_eselon.{fmt}")
+
+
+def _timed_chunks(chunks, tracer):
+    """Chunk dari iterator `chunks`, dengan waktu baca tiap chunk sebagai tahap "read"."""
+    while True:
+        with tracer.stage("read") as stage:
+            chunk = next(chunks, None)
+            stage.rows_out = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def classify_file(path, sheet, out_path, track_memory=False, cache_path=None, chunk_size=None):
+    """Worker: baca satu (file, sheet), klasifikasi, tulis hasil. Dipanggil di proses pool.
+
+    Tiap worker membuka koneksi cache sendiri (SQLite WAL aman untuk banyak proses).
+    `chunk_size` diisi: dibaca dan ditulis per chunk (iter_chunks), memori sebanding chunk.
+    Snapshot .arrow selalu dibaca per record batch langsung dari file memory-mapped.
+    """
+    if path.endswith(".arrow"):
+        chunk_size = chunk_size or SNAPSHOT_CHUNK_SIZE
+    t0 = time.perf_counter()
+    tracer = Tracer(f"{os.path.basename(path)}[{sheet or '-'}]", track_memory=track_memory)
+    if chunk_size:
+        chunks = _timed_chunks(iter_chunks(chunk_size, path, sheet), tracer)
+    else:
+        with tracer.stage("load") as stage:
+            df = read_source(path, sheet)
+            stage.rows_out = len(df)
+        chunks = [df]
+    cache = open_cache(cache_path)
+    writer = ChunkWriter(out_path)
+    rows, columns, counts = 0, None, pd.Series(dtype="int64")
+    try:
+        for chunk in chunks:
+            if columns is None:
+                missing = missing_inputs(chunk.columns)
+                if missing:
+                    raise KeyError(f"{path}[{sheet}]: kolom {missing} tidak ditemukan")
+                columns = list(chunk.columns) + ["eselon", "eselon_reason"]
+            chunk = classify_chunk(chunk, tracer, cache)
+            counts = counts.add(chunk["eselon"].value_counts(dropna=False), fill_value=0)
+            with tracer.stage("write", rows_in=len(chunk)):
+                writer.write(chunk)
+            rows += len(chunk)
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.close()
+    return {
+        "trace": tracer.records,
+        "file": path, "sheet": sheet, "output": out_path, "rows": rows,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "columns": columns or [],
+        "eselon_counts": counts.astype("int64").to_dict(),
+        "cache": cache.stats() if cache is not None else None,
+    }
+
+
+def _iter_output(path, chunk_size=200_000):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas().astype("string")
+    else:
+        yield from pd.read_csv(path, dtype=str, chunksize=chunk_size)
+
+
+def merge_outputs(results, merged_path):
+    """Gabungkan output per-input (berurutan) ke satu file, dengan kolom sumber."""
+    columns = []
+    for r in results:
+        columns += [c for c in r["columns"] if c not in columns]
+    columns += ["sumber_file", "sumber_sheet"]
+    writer = ChunkWriter(merged_path)
+    try:
+        for r in results:
+            for chunk in _iter_output(r["output"]):
+                chunk["sumber_file"] = os.path.basename(r["file"])
+                chunk["sumber_sheet"] = r["sheet"]
+                writer.write(chunk.reindex(columns=columns).astype("string"))
+    finally:
+        writer.close()
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Klasifikasi eselon batch untuk banyak file/sheet.")
+    parser.add_argument("inputs", nargs="+", help="file atau glob (.xlsx/.xlsm/.csv/.parquet/.arrow; .xls tidak didukung)")
+    parser.add_argument("--all-sheets", action="store_true", help="proses semua sheet tiap workbook")
+    parser.add_argument("--sheet", help="nama sheet tertentu (default: sheet pertama)")
+    parser.add_argument("--out-dir", default="hasil_eselon", help="folder output per-input")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--merged", help="path output gabungan (default: <out-dir>/merged_with_eselon.<format>)")
+    parser.add_argument("--no-merge", action="store_true", help="jangan tulis output gabungan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="jumlah proses (default: jumlah core)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="baca/tulis per N baris per input (memori sebanding chunk, bukan ukuran file)")
+    parser.add_argument("--trace", help="simpan timing per tahap per file ke .json/.csv")
+    parser.add_argument("--track-memory", action="store_true", help="ukur puncak memori per tahap (tracemalloc)")
+    parser.add_argument("--cache", default=CACHE_PATH, help=f"file cache klasifikasi SQLite (default: {CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="klasifikasi ulang semua jabatan tanpa cache")
+    args = parser.parse_args(argv)
+    cache_path = None if args.no_cache else args.cache
+
+    tasks = expand_inputs(args.inputs, args.all_sheets, args.sheet)
+    os.makedirs(args.out_dir, exist_ok=True)
+    print(f"{len(tasks)} task | workers={args.workers}")
+
+    t0 = time.perf_counter()
+    results, failed = {}, []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(classify_file, path, sheet, output_path(args.out_dir, path, sheet, args.format),
+                        args.track_memory, cache_path, args.chunk_size): (path, sheet)
+            for path, sheet in tasks
+        }
+        for fut in as_completed(futures):
+            path, sheet = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed.append((path, sheet, e))
+                print(f"GAGAL {path} [{sheet}]: {e}")
+                continue
+            results[(path, sheet)] = r
+            print(f"{path} [{sheet or '-'}] rows={r['rows']} | {r['seconds']:.2f}s -> {r['output']}")
+
+    ordered = [results[t] for t in tasks if t in results]
+    wall = time.perf_counter() - t0
+    total_rows = sum(r["rows"] for r in ordered)
+
+    print("\n== Ringkasan per file ==")
+    summary = pd.DataFrame(ordered, columns=["file", "sheet", "rows", "seconds", "output"])
+    print(summary.to_string(index=False))
+
+    counts = pd.Series(dtype="int64")
+    for r in ordered:
+        counts = counts.add(pd.Series(r["eselon_counts"], dtype="int64"), fill_value=0)
+    print("\n== Distribusi Eselon (gabungan) ==")
+    print(counts.astype("int64").sort_values(ascending=False))
+
+    tracer = Tracer("klasifikasi_eselon_cli", meta={"inputs": args.inputs, "workers": args.workers})
+    for r in ordered:
+        tracer.records.extend(r["trace"])
+    if ordered and not args.no_merge:
+        merged = args.merged or os.path.join(args.out_dir, f"merged_with_eselon.{args.format}")
+        with tracer.stage("merge", rows_in=total_rows):
+            merge_outputs(ordered, merged)
+        print(f"\nFile gabungan disimpan ke: {merged}")
+    if args.trace:
+        print(f"Trace disimpan ke: {tracer.dump(args.trace)}")
+
+    if cache_path:
+        hits = sum(r["cache"]["hits"] for r in ordered)
+        misses = sum(r["cache"]["misses"] for r in ordered)
+        print(f"Cache klasifikasi ({cache_path}, ruleset {RULESET.version}/{RULESET.hash}): "
+              f"hit={hits} | miss={misses}")
+    print(f"\nTotal rows={total_rows} | {wall:.2f}s | {total_rows / wall if wall else 0:,.0f} rows/s")
+    return 1 if failed else 0
+
 
-print("\n== Contoh data ==")
-print(df[[COL_OPD, COL_JAB, COL_JJENIS, "eselon","eselon_reason"]].head(15).to_string(index=False))
 
-# Simpan hasil
-out_path = "rekap_with_eselon.csv"
-df.to_csv(out_path, index=False)
-print(f"\nFile hasil disimpan ke: {out_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli())
+    main()
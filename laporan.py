@@ -0,0 +1,242 @@
+"""Laporan headless: semua tampilan standar app.py per OPD dan global, sekali jalan.
+
+Data dimuat sekali (snapshot Arrow, atau file rekap lewat pipeline yang sama
+dengan app.py), cube dibangun sekali, lalu semua agregat diturunkan dari dua
+roll-up global:
+- OPD × Eselon × (Unit …) × Jabatan  -> treemap 2 + tabel detail jabatan;
+- OPD × Eselon × Golongan            -> treemap 1, treemap 3, tabel detail, pivot.
+Kedua roll-up dipecah per OPD dalam satu groupby, dan tiap OPD (plus global)
+dirender oleh worker pool (proses terpisah, karena membangun figure plotly
+terikat GIL).
+Agregat, figure dan tabel detail dibentuk `tampilan.py`, modul yang sama
+dengan app.py.
+
+Hasil per cakupan (`global/` dan `opd/<nama>/`):
+- treemap1_opd_eselon, treemap2_opd_eselon_jabatan, treemap3_opd_golongan (.html/.json);
+- detail_opd_eselon, detail_jabatan, detail_golongan, pivot (.csv/.parquet).
+Pivot global = OPD × Golongan (default app.py); per OPD = Eselon × Golongan.
+`index.csv` dan `index.html` di folder output mendaftar semua OPD.
+
+Pemakaian:
+    python laporan.py snapshots/rekap-xxxx.arrow --out laporan/2024-06 [--workers 8]
+    python laporan.py rekap.xlsx --out laporan/2024-06 --figures html --tables csv
+"""
+
+import argparse
+import html
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+from cube import COUNT_COL, build_cube, rollup
+from ekspor import write_export
+from instrumentasi import NULL_TRACER, Tracer
+from pipeline import COL_OPD, COL_ESELON, COL_GOL, UNIT_COLUMNS, order_map, prepare_df, read_table
+from pivot import pivot_from_counts
+from snapshot import SNAPSHOT_EXT, load_snapshot
+import tampilan
+from treemap import MISSING_LABEL, TREEMAP2_MAX_LEAVES, TREEMAP2_TOP_N
+
+REPORT_WORKERS = int(os.environ.get("KEPEGAWAIAN_REPORT_WORKERS", os.cpu_count() or 1))
+FIGURE_FORMATS = ("html", "json")
+TABLE_FORMATS = ("csv", "parquet")
+PLOTLY_JS = "plotly.min.js"   # satu salinan di root output, dirujuk relatif oleh semua HTML
+
+
+# ======================
+# Tampilan standar (tampilan.py, sama dengan app.py)
+# ======================
+def standard_views(r2, r3, path, pivot_index, scope, top_n=TREEMAP2_TOP_N, max_leaves=TREEMAP2_MAX_LEAVES):
+    """Figure dan tabel cakupan `scope` dari roll-up `r2` (path jabatan) dan `r3` (OPD × Eselon × Golongan).
+
+    Return (figures, tables): dict nama file -> go.Figure / DataFrame.
+    """
+    agg1 = tampilan.opd_eselon(rollup(r3, tampilan.DIMS_OPD_ESELON))
+    agg2 = tampilan.opd_eselon_jabatan(r2, path)
+    plot_agg2, plot_path2, _ = tampilan.jabatan_leaves(agg2, path, top_n, max_leaves)
+    agg3 = tampilan.opd_golongan(rollup(r3, tampilan.DIMS_OPD_GOLONGAN))
+
+    figures = {
+        "treemap1_opd_eselon": tampilan.figure_opd_eselon(agg1, scope),
+        "treemap2_opd_eselon_jabatan": tampilan.figure_opd_eselon_jabatan(plot_agg2, plot_path2, scope),
+        "treemap3_opd_golongan": tampilan.figure_opd_golongan(agg3, scope),
+    }
+    tables = {
+        "detail_opd_eselon": tampilan.detail_table(agg1),
+        "detail_jabatan": tampilan.detail_table(agg2, tampilan.unit_labels(path[2:-1])),
+        "detail_golongan": tampilan.detail_table(agg3),
+        "pivot": pivot_from_counts(r3, pivot_index, COL_GOL, margins_name="Total"),
+    }
+    return figures, tables
+
+
+# ======================
+# Worker: render + tulis satu cakupan
+# ======================
+def render_scope(task):
+    """Tulis semua tampilan satu cakupan (global atau satu OPD) ke `task["dir"]`; return baris index."""
+    t0 = time.time()
+    os.makedirs(task["dir"], exist_ok=True)
+    figures, tables = standard_views(task["r2"], task["r3"], task["path"], task["pivot_index"], task["title"],
+                                     task["top_n"], task["max_leaves"])
+    for name, fig in figures.items():
+        base = os.path.join(task["dir"], name)
+        if "html" in task["figures"]:
+            fig.write_html(base + ".html", include_plotlyjs=task["plotlyjs"], full_html=True)
+        if "json" in task["figures"]:
+            with open(base + ".json", "w", encoding="utf-8") as f:
+                f.write(fig.to_json())
+    for name, table in tables.items():
+        for fmt in task["tables"]:
+            write_export(table, os.path.join(task["dir"], f"{name}.{fmt}"), fmt, index=name == "pivot")
+    return {"cakupan": task["title"], "folder": task["folder"], "pegawai": int(task["r3"][COUNT_COL].sum()),
+            "detik": round(time.time() - t0, 3)}
+
+
+# ======================
+# Muat data + agregat sekali
+# ======================
+def load_dataset(path, unit_columns=UNIT_COLUMNS, canonical=False, tracer=None):
+    """Snapshot .arrow atau file CSV/Excel -> (df siap pakai, unit_cols_std)."""
+    tracer = tracer or NULL_TRACER
+    if path.endswith(SNAPSHOT_EXT):
+        with tracer.stage("load") as stage:
+            df, info = load_snapshot(path)
+            stage.rows_out = len(df)
+        if canonical:
+            from kanonik import canonicalize_frame
+            with tracer.stage("canonicalize", rows_in=len(df)):
+                canonicalize_frame(df)
+        return df, info.unit_cols_std
+    with tracer.stage("parse") as stage:
+        raw = read_table(path, path, unit_columns)
+        stage.rows_out = len(raw)
+    return prepare_df(raw, unit_columns, order_map, tracer=tracer, canonical=canonical)
+
+
+def _slug(name, used):
+    base = re.sub(r"[^0-9A-Za-z]+", "_", str(name)).strip("_").lower()[:60] or "opd"
+    slug, i = base, 2
+    while slug in used:
+        slug, i = f"{base}_{i}", i + 1
+    used.add(slug)
+    return slug
+
+
+def _compact(part):
+    """Potongan roll-up untuk dikirim ke worker: tanpa kategori yang tidak dipakai."""
+    part = part.reset_index(drop=True)
+    for col in part.columns:
+        if isinstance(part[col].dtype, pd.CategoricalDtype):
+            part[col] = part[col].cat.remove_unused_categories()
+    return part
+
+
+def plan_tasks(df, unit_cols_std, out_dir, opd=None, figures=FIGURE_FORMATS, tables=TABLE_FORMATS,
+               top_n=TREEMAP2_TOP_N, max_leaves=TREEMAP2_MAX_LEAVES, tracer=None):
+    """Cube + dua roll-up global, dipecah per OPD; return daftar task (global dulu, lalu OPD terbesar)."""
+    tracer = tracer or NULL_TRACER
+    path = tampilan.jabatan_path(unit_cols_std)
+    with tracer.stage("cube", rows_in=len(df)) as stage:
+        cube = build_cube(df, unit_cols_std)
+        stage.rows_out = len(cube)
+    with tracer.stage("rollup", rows_in=len(cube)) as stage:
+        r2 = rollup(cube, path)
+        r3 = rollup(cube, tampilan.DIMS_OPD_ESELON + [COL_GOL])
+        stage.rows_out = len(r2) + len(r3)
+
+    common = dict(path=path, figures=tuple(figures), tables=tuple(tables), top_n=top_n, max_leaves=max_leaves)
+    tasks = [dict(common, title="Semua OPD", folder="global", dir=os.path.join(out_dir, "global"),
+                  plotlyjs=f"../{PLOTLY_JS}", r2=r2, r3=r3, pivot_index=COL_OPD)]
+    with tracer.stage("split", rows_in=len(r2) + len(r3)) as stage:
+        # kode OPD bersama untuk kedua roll-up (-1 = OPD kosong), lalu satu groupby per roll-up
+        names = pd.Index(pd.unique(r3[COL_OPD].dropna()))
+        codes2, codes3 = names.get_indexer(r2[COL_OPD]), names.get_indexer(r3[COL_OPD])
+        parts2 = pd.Series(codes2).groupby(codes2).indices
+        parts3 = pd.Series(codes3).groupby(codes3).indices
+        sizes = r3[COUNT_COL].groupby(codes3).sum().sort_values(ascending=False, kind="stable")
+        used = set()
+        for code in sizes.index:
+            title = MISSING_LABEL if code < 0 else str(names[code])
+            if opd and title not in opd:
+                continue
+            folder = f"opd/{_slug(title, used)}"
+            tasks.append(dict(common, title=title, folder=folder, dir=os.path.join(out_dir, *folder.split("/")),
+                              plotlyjs=f"../../{PLOTLY_JS}", pivot_index=COL_ESELON,
+                              r2=_compact(r2.iloc[parts2.get(code, [])]), r3=_compact(r3.iloc[parts3[code]])))
+        stage.rows_out = len(tasks)
+    return tasks
+
+
+def write_index(rows, out_dir):
+    """index.csv + index.html (tautan ke treemap tiap cakupan)."""
+    index = pd.DataFrame(rows)
+    index.to_csv(os.path.join(out_dir, "index.csv"), index=False)
+    links = "\n".join(
+        f'<tr><td><a href="{r["folder"]}/treemap1_opd_eselon.html">{html.escape(r["cakupan"])}</a></td>'
+        f'<td style="text-align:right">{r["pegawai"]:,}</td></tr>'
+        for r in rows
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Laporan Kepegawaian</title></head>'
+                f"<body><h1>Laporan Kepegawaian</h1><table><tr><th>OPD</th><th>Pegawai</th></tr>\n{links}\n"
+                "</table></body></html>\n")
+    return index
+
+
+def run_report(source, out_dir, workers=REPORT_WORKERS, opd=None, figures=FIGURE_FORMATS, tables=TABLE_FORMATS,
+               top_n=TREEMAP2_TOP_N, max_leaves=TREEMAP2_MAX_LEAVES, canonical=False, tracer=None):
+    """Muat `source` sekali lalu tulis laporan global + per OPD ke `out_dir`; return (index, tracer)."""
+    tracer = tracer or Tracer(run="laporan", meta={"source": os.path.basename(source), "workers": workers})
+    df, unit_cols_std = load_dataset(source, canonical=canonical, tracer=tracer)
+    tasks = plan_tasks(df, unit_cols_std, out_dir, opd, figures, tables, top_n, max_leaves, tracer)
+    del df
+
+    os.makedirs(out_dir, exist_ok=True)
+    if "html" in figures:
+        with open(os.path.join(out_dir, PLOTLY_JS), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+    with tracer.stage("render", rows_in=len(tasks)) as stage:
+        if workers <= 1:
+            rows = [render_scope(t) for t in tasks]
+        else:
+            # spawn: worker tidak mewarisi thread pyarrow/duckdb proses induk
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                rows = list(pool.map(render_scope, tasks))
+        stage.rows_out = len(rows)
+    return write_index(rows, out_dir), tracer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tulis laporan treemap/tabel/pivot standar per OPD dan global")
+    parser.add_argument("source", help="Snapshot .arrow atau file rekap CSV/Excel")
+    parser.add_argument("--out", required=True, help="Folder output")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS,
+                        help=f"Jumlah proses render (default {REPORT_WORKERS}; 1 = tanpa pool)")
+    parser.add_argument("--opd", nargs="*", help="Hanya OPD ini (default: semua)")
+    parser.add_argument("--figures", nargs="*", choices=FIGURE_FORMATS, default=list(FIGURE_FORMATS))
+    parser.add_argument("--tables", nargs="*", choices=TABLE_FORMATS, default=list(TABLE_FORMATS))
+    parser.add_argument("--top-n", type=int, default=TREEMAP2_TOP_N, help="Top-N jabatan per eselon (treemap 2)")
+    parser.add_argument("--max-leaves", type=int, default=TREEMAP2_MAX_LEAVES, help="Batas daun treemap 2")
+    parser.add_argument("--canonical", action="store_true", help="Gabungkan varian nama OPD/jabatan (kanonik.py)")
+    parser.add_argument("--trace", default=None, help="Simpan timing per tahap ke .json/.csv")
+    args = parser.parse_args(argv)
+
+    t0 = time.time()
+    index, tracer = run_report(args.source, args.out, args.workers, args.opd, args.figures, args.tables,
+                               args.top_n, args.max_leaves, args.canonical)
+    print(tracer.summary())
+    if args.trace:
+        tracer.dump(args.trace)
+    print(f"{len(index) - 1} OPD + global -> {args.out} ({time.time() - t0:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
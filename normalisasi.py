@@ -0,0 +1,53 @@
+"""Normalisasi spasi per nilai unik, hasil disimpan sebagai pandas Categorical.
+
+Kolom OPD/eselon/golongan/jabatan hanya punya ratusan-ribuan nilai berbeda,
+jadi `re.sub` cukup dijalankan sekali per nilai unik lalu disebar lewat kode.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+_WS = re.compile(r"\s+")
+
+
+def norm_space(x, upper=False):
+    """Rapikan spasi satu nilai; string kosong/NA -> None."""
+    if pd.isna(x): return None
+    x = str(x).strip()
+    x = _WS.sub(" ", x)
+    if not x:
+        return None
+    return x.upper() if upper else x
+
+
+def normalize_column(s, upper=False, fill=None):
+    """Versi kolom dari `norm_space`: normalisasi tiap nilai unik sekali, kembalikan Categorical.
+
+    `upper=True` untuk varian klasifikasi (huruf besar), `False` untuk varian app
+    (huruf asli dipertahankan). Nilai yang kosong setelah normalisasi jadi NA,
+    atau `fill` kalau diberikan.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    normed = [norm_space(u, upper) for u in uniques]
+    categories = pd.Index(sorted({v for v in normed if v is not None}), dtype=object)
+    if fill is not None and fill not in categories:
+        categories = categories.append(pd.Index([fill], dtype=object))
+
+    # slot terakhir = -1 supaya kode NA dari factorize (-1) tetap NA
+    remap = np.append(categories.get_indexer(normed), -1)
+    new_codes = remap[codes]
+    if fill is not None:
+        new_codes = np.where(new_codes == -1, categories.get_loc(fill), new_codes)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=categories),
+        index=s.index, name=s.name,
+    )
+
+
+def normalize_columns(df, columns, upper=False):
+    """Normalisasi beberapa kolom df sekaligus (in place) dan kembalikan df."""
+    for c in columns:
+        df[c] = normalize_column(df[c], upper=upper)
+    return df
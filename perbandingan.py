@@ -0,0 +1,171 @@
+"""Perbandingan antar snapshot: perpindahan pegawai per `peg_nip`.
+
+Tiap snapshot dimuat hanya kolom NIP + dimensi (OPD, golongan, eselon) sebagai
+kode integer (`load_period`). `Comparison` menyatukan kamus kategori per
+dimensi untuk semua periode, sehingga kode antar snapshot langsung sebanding.
+Join antar periode = hash join pada indeks NIP (pd.Index.get_indexer), dan
+matriks perpindahan = histogram 2-D kode (np.bincount) — tanpa merge DataFrame,
+jadi 12 snapshot bulanan @100k baris tetap interaktif.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from compact import nip_to_int64
+from pipeline import COL_NIP, COL_OPD, COL_ESELON, COL_GOL
+from pivot import _codes, _histogram, dimension_order, golongan_sort_key
+from snapshot import SnapshotInfo, load_snapshot
+from treemap import MISSING_LABEL
+
+DIMENSIONS = {COL_OPD: "OPD", COL_GOL: "Golongan", COL_ESELON: "Eselon"}
+MASUK = "(masuk)"
+KELUAR = "(keluar)"
+SANKEY_TOP_N = 40
+
+
+@dataclass
+class Period:
+    info: SnapshotInfo
+    nip: pd.Index        # int64, unik
+    codes: dict          # dimensi -> kode int (posisi di `categories[dimensi]`, -1 = kosong)
+    categories: dict     # dimensi -> pd.Index
+    dropped: int = 0     # baris tanpa NIP valid atau NIP duplikat (kemunculan pertama dipakai)
+
+    @property
+    def label(self):
+        return self.info.source
+
+
+def load_period(path, dims=tuple(DIMENSIONS), canonical=False):
+    """Snapshot -> Period (hanya kolom NIP + `dims`); `canonical` = nama OPD lewat peta alias (kanonik.py)."""
+    df, info = load_snapshot(path, columns=[COL_NIP, *dims])
+    if canonical:
+        from kanonik import canonicalize_frame
+        canonicalize_frame(df, columns=[c for c in dims if c == COL_OPD])
+    if COL_NIP not in df.columns:
+        raise KeyError(COL_NIP)
+    nips = nip_to_int64(df[COL_NIP])
+    keep = (nips.notna() & ~nips.duplicated(keep="first")).to_numpy()
+    codes, categories = {}, {}
+    for d in dims:
+        if d not in df.columns:
+            continue
+        c, categories[d] = _codes(df[d])
+        codes[d] = c[keep]
+    return Period(info, pd.Index(nips[keep].to_numpy(dtype=np.int64)), codes, categories,
+                  dropped=int((~keep).sum()))
+
+
+class Comparison:
+    """N periode dengan kamus kategori bersama; join dan matriks per pasangan di-cache."""
+
+    def __init__(self, periods):
+        self.periods = list(periods)
+        dims = set.intersection(*(set(p.codes) for p in self.periods)) if self.periods else set()
+        self.dims = [d for d in DIMENSIONS if d in dims]
+        self.categories = {}
+        self._codes = {}
+        for d in self.dims:
+            union = pd.Index(sorted(set().union(*(p.categories[d] for p in self.periods)), key=str))
+            union = union[dimension_order(d, union)]
+            # nilai kosong ikut dihitung sebagai MISSING_LABEL; kalau label itu sudah ada di
+            # data, dipakai slot yang sama supaya label tidak muncul dua kali
+            if MISSING_LABEL in union:
+                missing = union.get_loc(MISSING_LABEL)
+            else:
+                missing, union = len(union), union.append(pd.Index([MISSING_LABEL]))
+            self.categories[d] = union
+            for i, p in enumerate(self.periods):
+                remap = np.append(union.get_indexer(p.categories[d]), missing)
+                self._codes[i, d] = remap[p.codes[d]]
+        self._joins = {}
+
+    def codes(self, i, dim):
+        return self._codes[i, dim]
+
+    def join(self, a, b):
+        """(posisi di a, posisi di b) untuk NIP yang ada di keduanya, + posisi keluar (a) dan masuk (b)."""
+        if (a, b) not in self._joins:
+            idx = self.periods[a].nip.get_indexer(self.periods[b].nip)
+            in_b = np.flatnonzero(idx >= 0)
+            stay_a = idx[in_b]
+            left = np.ones(len(self.periods[a].nip), dtype=bool)
+            left[stay_a] = False
+            self._joins[a, b] = (stay_a, in_b, np.flatnonzero(left), np.flatnonzero(idx < 0))
+        return self._joins[a, b]
+
+    def matrix(self, a, b, dim):
+        """Matriks perpindahan `dim` dari periode a ke b (baris = asal, kolom = tujuan).
+
+        Baris MASUK = pegawai baru di b, kolom KELUAR = pegawai a yang tidak ada lagi di b.
+        """
+        stay_a, stay_b, out_a, in_b = self.join(a, b)
+        ca, cb = self.codes(a, dim), self.codes(b, dim)
+        labels = self.categories[dim]
+        n = len(labels)
+        counts = np.zeros((n + 1, n + 1), dtype=np.int64)
+        counts[:n, :n] = _histogram(ca[stay_a], cb[stay_b], n, n)
+        counts[n, :n] = np.bincount(cb[in_b], minlength=n)
+        counts[:n, n] = np.bincount(ca[out_a], minlength=n)
+        return pd.DataFrame(counts, index=pd.Index(labels.append(pd.Index([MASUK])), name="dari"),
+                            columns=pd.Index(labels.append(pd.Index([KELUAR])), name="ke"))
+
+    def flows(self, a, b, dim, moved_only=True, turnover=False):
+        """Aliran dari -> ke (long format, urut jumlah menurun); opsional masuk/keluar."""
+        m = self.matrix(a, b, dim)
+        if not turnover:
+            m = m.drop(index=MASUK, columns=KELUAR)
+        flows = m.stack().rename("jumlah").reset_index()
+        flows = flows[flows["jumlah"] > 0]
+        if moved_only:
+            flows = flows[flows["dari"] != flows["ke"]]
+        return flows.sort_values("jumlah", ascending=False, kind="stable").reset_index(drop=True)
+
+    def _golongan_rank(self):
+        keys = [golongan_sort_key(v) for v in self.categories[COL_GOL]]
+        return np.array([k[0] * 10 + "abcde".find(k[1]) if k[0] != 99 else -1 for k in keys])
+
+    def summary(self):
+        """Ringkasan per pasangan periode berurutan: masuk, keluar, pindah OPD, naik/turun golongan, ganti eselon."""
+        rows = []
+        rank = self._golongan_rank() if COL_GOL in self.dims else None
+        for a in range(len(self.periods) - 1):
+            b = a + 1
+            stay_a, stay_b, out_a, in_b = self.join(a, b)
+            row = {"dari": self.periods[a].label, "ke": self.periods[b].label,
+                   "pegawai_awal": len(self.periods[a].nip), "pegawai_akhir": len(self.periods[b].nip),
+                   "masuk": len(in_b), "keluar": len(out_a)}
+            if COL_OPD in self.dims:
+                row["pindah_opd"] = int((self.codes(a, COL_OPD)[stay_a] != self.codes(b, COL_OPD)[stay_b]).sum())
+            if rank is not None:
+                ra, rb = rank[self.codes(a, COL_GOL)[stay_a]], rank[self.codes(b, COL_GOL)[stay_b]]
+                known = (ra >= 0) & (rb >= 0)
+                row["naik_golongan"] = int((known & (rb > ra)).sum())
+                row["turun_golongan"] = int((known & (rb < ra)).sum())
+            if COL_ESELON in self.dims:
+                row["ganti_eselon"] = int((self.codes(a, COL_ESELON)[stay_a] != self.codes(b, COL_ESELON)[stay_b]).sum())
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+
+def sankey_figure(flows, title, top_n=SANKEY_TOP_N):
+    """go.Sankey dari `flows` (dari, ke, jumlah); hanya `top_n` aliran terbesar."""
+    shown = flows.head(top_n)
+    left = pd.Index(pd.unique(shown["dari"].astype(str)))
+    right = pd.Index(pd.unique(shown["ke"].astype(str)))
+    labels = list(left) + list(right)
+    fig = go.Figure(go.Sankey(
+        arrangement="snap",
+        node=dict(label=labels, pad=12, thickness=14),
+        link=dict(
+            source=left.get_indexer(shown["dari"].astype(str)),
+            target=len(left) + right.get_indexer(shown["ke"].astype(str)),
+            value=shown["jumlah"].to_numpy(),
+            hovertemplate="%{source.label} → %{target.label}<br>Jumlah: %{value:,}<extra></extra>",
+        ),
+    ))
+    fig.update_layout(title=title, margin=dict(t=40, l=0, r=0, b=0))
+    return fig
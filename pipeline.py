@@ -0,0 +1,172 @@
+"""Tahap ingest bersama: baca file rekap, validasi kolom, normalisasi.
+
+Dipakai app.py (di balik cache Streamlit) dan snapshot.py, supaya data yang
+disimpan sebagai snapshot identik dengan data yang diproses app.
+"""
+
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from instrumentasi import NULL_TRACER
+from normalisasi import normalize_column
+
+logger = logging.getLogger(__name__)
+
+# ======================
+# Konfigurasi kolom
+# ======================
+COL_OPD    = "satuan_kerja_nama"
+COL_ESELON = "eselon"
+COL_JAB    = "jabatan_nama"
+COL_GOL    = "golongan"
+COL_JJENIS = "jabatan_jenis"
+COL_NIP    = "peg_nip"
+COL_NAMA   = "peg_nama"
+
+REQUIRED_COLUMNS = [COL_OPD, COL_ESELON, COL_JAB, COL_GOL]
+
+UNIT_COLUMNS = []  # bisa ditambah kalau ada bidang/seksi
+
+# Ikut dibaca kalau ada (export, inferensi eselon); kolom lain di file tidak dibaca sama sekali
+OPTIONAL_COLUMNS = [COL_NIP, COL_NAMA, COL_JJENIS]
+TEXT_COLUMNS = [COL_NIP, COL_NAMA]   # nilai hampir unik per baris -> string, sisanya category
+
+EXCEL_SHEET_WORKERS = os.cpu_count() or 1
+
+order_map = {"I":1,"II":2,"III":3,"III/IV":3.5,"IV":4,"NON-ESELON":9}
+
+
+def _open(source):
+    """bytes -> BytesIO baru; file-like di-rewind; path dikembalikan apa adanya."""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+
+def read_headers(source, file_name):
+    """Header tiap sheet tanpa membaca isi file ({None: header} untuk CSV)."""
+    if file_name.endswith(".csv"):
+        return {None: list(pd.read_csv(_open(source), nrows=0).columns)}
+    import openpyxl
+    wb = openpyxl.load_workbook(_open(source), read_only=True, data_only=True)
+    try:
+        return {
+            ws.title: [str(v) for v in next(ws.iter_rows(max_row=1, values_only=True), ()) if v is not None]
+            for ws in wb.worksheets
+        }
+    finally:
+        wb.close()
+
+
+def missing_columns(header):
+    """Kolom wajib yang tidak ada; eselon boleh hilang kalau bisa diinferensi dari jabatan."""
+    header = set(header)
+    required = list(REQUIRED_COLUMNS)
+    if COL_ESELON not in header and {COL_JAB, COL_JJENIS} <= header:
+        required.remove(COL_ESELON)
+    return [c for c in required if c not in header]
+
+
+def ingest_dtypes(header, unit_columns=UNIT_COLUMNS):
+    """{kolom: dtype} untuk kolom yang dipakai dan ada di header (urut sesuai konfigurasi)."""
+    wanted = dict.fromkeys(REQUIRED_COLUMNS + OPTIONAL_COLUMNS + list(unit_columns))
+    return {c: "string" if c in TEXT_COLUMNS else "category" for c in wanted if c in set(header)}
+
+
+def _read_sheet(source, sheet, dtypes):
+    return pd.read_excel(_open(source), sheet_name=sheet, usecols=list(dtypes), dtype=dtypes)
+
+
+def read_table(source, file_name, unit_columns=UNIT_COLUMNS, workers=EXCEL_SHEET_WORKERS):
+    """Baca CSV/Excel (path, bytes atau file-like), format ditentukan dari nama file.
+
+    Header divalidasi dulu: KeyError(nama_kolom) untuk kolom wajib yang hilang
+    sebelum isi file di-parse. Hanya kolom wajib, OPTIONAL_COLUMNS dan
+    `unit_columns` yang dibaca, dengan dtype ringkas (category/string).
+    Workbook dengan beberapa sheet data dibaca paralel (satu proses per sheet)
+    lalu digabung; sheet tanpa satu pun kolom wajib (mis. sheet keterangan) dilewati.
+    """
+    headers = read_headers(source, file_name)
+    sheets = {sh: h for sh, h in headers.items() if set(h) & set(REQUIRED_COLUMNS)} or headers
+    for header in sheets.values():
+        missing = missing_columns(header)
+        if missing:
+            raise KeyError(missing[0])
+
+    if file_name.endswith(".csv"):
+        dtypes = ingest_dtypes(sheets[None], unit_columns)
+        return pd.read_csv(_open(source), usecols=list(dtypes), dtype=dtypes)
+
+    tasks = [(sh, ingest_dtypes(h, unit_columns)) for sh, h in sheets.items()]
+    if len(tasks) == 1 or workers <= 1:
+        frames = [_read_sheet(source, sh, dtypes) for sh, dtypes in tasks]
+    else:
+        if not isinstance(source, (str, os.PathLike, bytes)):
+            source = _open(source).read()
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            frames = list(pool.map(_read_sheet, [source] * len(tasks), *zip(*tasks)))
+    if len(frames) == 1:
+        return frames[0]
+    logger.info("Menggabungkan %d sheet: %s", len(frames), [sh for sh, _ in tasks])
+    df = pd.concat(frames, ignore_index=True)
+    # category beda isi antar sheet jadi object saat concat
+    for c, dtype in tasks[0][1].items():
+        if c in df.columns and dtype == "category" and df[c].dtype != "category":
+            df[c] = df[c].astype("category")
+    return df
+
+
+def prepare_df(df, unit_columns=UNIT_COLUMNS, eselon_order=order_map, tracer=None, canonical=False):
+    """Normalisasi kolom wajib + unit dan tambahkan `__eselon_ord__`.
+
+    Kalau kolom eselon tidak ada tapi `jabatan_jenis` ada, eselon diinferensi
+    dengan klasifikasi_eselon (kolom `eselon_reason` ikut ditambahkan).
+    `canonical=True`: varian nama OPD/jabatan digabung lewat peta alias (kanonik.py).
+    Raise KeyError(nama_kolom) untuk kolom wajib yang hilang.
+    `tracer` (instrumentasi.Tracer) opsional untuk mencatat waktu per tahap.
+    Return (df, unit_cols_std).
+    """
+    tracer = tracer or NULL_TRACER
+    if COL_ESELON not in df.columns and {COL_JAB, COL_JJENIS} <= set(df.columns):
+        with tracer.stage("infer_eselon", rows_in=len(df)):
+            from klasifikasi_eselon import classify_eselon
+            keys = pd.DataFrame({
+                COL_JAB: normalize_column(df[COL_JAB], upper=True),
+                COL_JJENIS: normalize_column(df[COL_JJENIS], upper=True),
+            })
+            inferred = classify_eselon(keys, COL_JAB, COL_JJENIS)
+            df[COL_ESELON] = inferred["eselon"]
+            df["eselon_reason"] = inferred["eselon_reason"].astype("category")
+        logger.info("Kolom eselon tidak ada, diinferensi dari jabatan_nama/jabatan_jenis")
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise KeyError(missing[0])
+    with tracer.stage("normalize", rows_in=len(df)):
+        for c in REQUIRED_COLUMNS + [COL_JJENIS]:
+            if c in df.columns:
+                df[c] = normalize_column(df[c])
+
+        unit_cols_std = []
+        for i, col in enumerate(unit_columns):
+            if col in df.columns:
+                std_name = f"unit_l{i+1}"
+                df[std_name] = normalize_column(df[col], fill=f"Unit L{i+1} Tidak Diketahui")
+                unit_cols_std.append(std_name)
+
+    if canonical:
+        with tracer.stage("canonicalize", rows_in=len(df)):
+            from kanonik import canonicalize_frame
+            added = canonicalize_frame(df)
+        if added:
+            logger.info("Peta alias nama: %d nama baru dikelompokkan", added)
+
+    with tracer.stage("eselon_ord", rows_in=len(df)):
+        df["__eselon_ord__"] = df[COL_ESELON].str.upper().map(dict(eselon_order)).fillna(99)
+    return df, unit_cols_std
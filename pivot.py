@@ -0,0 +1,91 @@
+"""Pivot hitungan baris dari kode category (histogram 2-D dengan np.bincount).
+
+Pengganti pd.pivot_table(..., aggfunc="count", margins=True): setiap baris dihitung
+(termasuk yang jabatan_nama-nya kosong), hanya baris dengan nilai index/kolom NA
+yang tidak ikut, sama seperti pivot_table. Golongan diurutkan ordinal (I/a … IV/e),
+eselon mengikuti order_map, dimensi lain alfabetis.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from pipeline import COL_ESELON, COL_GOL, order_map
+
+_ROMAN = {"I": 1, "II": 2, "III": 3, "IV": 4}
+_GOLONGAN = re.compile(r"^\s*(IV|III|II|I)\s*/\s*([A-Ea-e])\s*$")
+
+
+def golongan_sort_key(value):
+    """(ruang, huruf) untuk "III/b" -> (3, "b"); nilai yang tidak dikenali di belakang."""
+    m = _GOLONGAN.match(str(value))
+    if not m:
+        return (99, str(value))
+    return (_ROMAN[m.group(1)], m.group(2).lower())
+
+
+def dimension_order(col, labels):
+    """Posisi urut label dimensi `col` (argsort stabil)."""
+    labels = list(labels)
+    if col == COL_GOL:
+        keys = [golongan_sort_key(v) for v in labels]
+    elif col == COL_ESELON:
+        keys = [(order_map.get(str(v).upper(), 99), str(v)) for v in labels]
+    else:
+        keys = [str(v) for v in labels]
+    return np.array(sorted(range(len(labels)), key=keys.__getitem__), dtype=np.intp)
+
+
+def _codes(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    codes, uniques = pd.factorize(s, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def _histogram(r_codes, c_codes, n_r, n_c, weights=None):
+    ok = (r_codes >= 0) & (c_codes >= 0)
+    flat = r_codes[ok].astype(np.int64) * n_c + c_codes[ok]
+    w = None if weights is None else np.asarray(weights)[ok]
+    counts = np.bincount(flat, weights=w, minlength=n_r * n_c).reshape(n_r, n_c)
+    return counts.astype(np.int64)
+
+
+def _table(counts, r_labels, c_labels, index, columns, margins_name):
+    """DataFrame dari histogram 2-D: label kosong dibuang, urut per dimensi, plus total."""
+    keep_r = np.flatnonzero(counts.sum(axis=1))
+    keep_c = np.flatnonzero(counts.sum(axis=0))
+    keep_r = keep_r[dimension_order(index, r_labels[keep_r])]
+    keep_c = keep_c[dimension_order(columns, c_labels[keep_c])]
+    table = pd.DataFrame(
+        counts[np.ix_(keep_r, keep_c)],
+        index=pd.Index(r_labels[keep_r], dtype=object, name=index),
+        columns=pd.Index(c_labels[keep_c], dtype=object, name=columns),
+    )
+    table[margins_name] = table.sum(axis=1)
+    table.loc[margins_name] = table.sum(axis=0)
+    # seleksi kosong: total dari 0×0 jadi float; dtype tabel tidak boleh bergantung filter
+    return table.astype(counts.dtype)
+
+
+def pivot_codes(df, index, columns, rows=None, margins_name="Total"):
+    """Tabel jumlah baris `index` × `columns` dengan baris/kolom total.
+
+    `rows` = posisi baris terpilih (mis. dari FilterIndex.select); None = semua baris.
+    Hanya kombinasi label yang muncul di baris terpilih yang ditampilkan.
+    """
+    r_codes, r_labels = _codes(df[index])
+    c_codes, c_labels = _codes(df[columns])
+    if rows is not None:
+        r_codes, c_codes = r_codes[rows], c_codes[rows]
+    counts = _histogram(r_codes, c_codes, len(r_labels), len(c_labels))
+    return _table(counts, r_labels, c_labels, index, columns, margins_name)
+
+
+def pivot_from_counts(agg, index, columns, value_col="jumlah", margins_name="Total"):
+    """Sama seperti pivot_codes, tapi dari data yang sudah diagregasi (index, columns, jumlah)."""
+    r_codes, r_labels = _codes(agg[index])
+    c_codes, c_labels = _codes(agg[columns])
+    counts = _histogram(r_codes, c_codes, len(r_labels), len(c_labels), weights=agg[value_col])
+    return _table(counts, r_labels, c_labels, index, columns, margins_name)
@@ -0,0 +1,97 @@
+"""Seksi halaman yang dihitung ulang hanya kalau inputnya berubah.
+
+Setiap seksi punya nama dan daftar input yang menjadi dependensinya (`deps`,
+tuple nilai sederhana: key dataset, state filter, nilai widget). Hasilnya
+disimpan di session_state dan dipakai lagi selama `deps` sama, jadi mengubah
+widget satu seksi tidak menghitung ulang seksi lain.
+
+Dengan `shared` (cache_bersama.SharedCache) hasil disimpan di cache proses dengan
+key (nama, deps) alih-alih di session_state: sesi lain dengan dataset dan state
+filter yang sama langsung memakai hasilnya, dan sesi hanya menyimpan widget.
+
+Komputasi berat bisa dikirim ke thread pool lebih dulu (`submit`) sementara
+seksi ringan dirender; `get` menunggu hasilnya saat seksi tersebut dirender.
+Fungsi yang dijalankan di thread pool hanya boleh berisi pandas/SQL, semua
+pemanggilan st.* tetap di thread script.
+"""
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+SECTION_WORKERS = int(os.environ.get("KEPEGAWAIAN_SECTION_WORKERS", min(4, os.cpu_count() or 1)))
+
+_POOL = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="seksi")
+_MISS = object()
+
+
+class Sections:
+    def __init__(self, state, parallel=True, pool=_POOL, shared=None):
+        """`state` = mapping per sesi (mis. st.session_state); `parallel=False` menghitung berurutan.
+
+        `shared`: SharedCache untuk hasil lintas sesi; `deps` harus hashable dan memuat identitas dataset.
+        """
+        self.shared = shared
+        self.results = {} if shared is not None else state.setdefault("_seksi", {})   # nama -> (deps, hasil)
+        self.parallel = parallel
+        self.pool = pool
+        self.pending = {}   # nama -> (deps, Future) yang dikirim di rerun ini
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, name, deps):
+        if self.shared is not None:
+            return self.shared.get(("seksi", name, deps), _MISS)
+        entry = self.results.get(name)
+        if entry is not None and entry[0] == deps:
+            return entry[1]
+        return _MISS
+
+    def _save(self, name, deps, value):
+        if self.shared is not None:
+            self.shared.put(("seksi", name, deps), value)
+        else:
+            self.results[name] = (deps, value)
+
+    def _store(self, name, deps, future):
+        if not future.cancelled() and future.exception() is None:
+            self._save(name, deps, future.result())
+
+    def submit(self, name, deps, fn):
+        """Mulai hitung seksi `name` di thread pool (kalau belum ada hasil untuk `deps`)."""
+        value = self._cached(name, deps)
+        if value is not _MISS:
+            self.hits += 1
+            future = Future()
+            future.set_result(value)
+        else:
+            self.misses += 1
+            future = self.pool.submit(fn) if self.parallel else _run(fn)
+            future.add_done_callback(lambda f: self._store(name, deps, f))
+        self.pending[name] = (deps, future)
+        return future
+
+    def get(self, name, deps, fn):
+        """Hasil seksi `name`: dari submit sebelumnya, dari rerun sebelumnya, atau dihitung sekarang."""
+        pending = self.pending.get(name)
+        if pending is not None and pending[0] == deps:
+            return pending[1].result()
+        value = self._cached(name, deps)
+        if value is not _MISS:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = fn()
+        self._save(name, deps, value)
+        return value
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _run(fn):
+    future = Future()
+    try:
+        future.set_result(fn())
+    except BaseException as exc:
+        future.set_exception(exc)
+    return future
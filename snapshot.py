@@ -0,0 +1,147 @@
+"""Snapshot kolumnar (Arrow IPC) untuk file rekap yang sudah diproses.
+
+File CSV/Excel di-parse + dinormalisasi sekali lewat pipeline.prepare_df, lalu
+disimpan sebagai Arrow IPC tanpa kompresi. Kolom teks tersimpan sebagai
+dictionary (Categorical) dan file dibuka ulang secara memory-mapped, jadi sesi
+berikutnya tidak perlu parse spreadsheet lagi.
+
+Yang benar-benar tetap di file (tanpa copy): seluruh tabel lewat
+`load_snapshot_table` (backend DuckDB). Di DataFrame `load_snapshot`, kolom
+string (NIP, nama) hanya tetap di file pada pandas ≥3, yang menyimpan string
+sebagai array Arrow; pandas 2 mengubahnya jadi objek Python (disalin, ~50+ byte
+per nilai). Kode kolom category dan kolom numerik selalu disalin ke memori
+pandas (1–2 byte per baris per kolom category, 8 byte untuk `__eselon_ord__`).
+
+Pemakaian CLI:
+    python snapshot.py rekap_pegawai.xlsx [rekap_lain.csv ...]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pipeline import UNIT_COLUMNS, order_map, prepare_df, read_table
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_EXT = ".arrow"
+_META_KEY = b"kepegawaian"
+
+
+@dataclass
+class SnapshotInfo:
+    path: str
+    source: str
+    source_hash: str
+    rows: int
+    created: float
+    unit_cols_std: list
+
+    @property
+    def label(self):
+        ts = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.created))
+        return f"{self.source} | {self.rows:,} baris | {ts}"
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def snapshot_path(source_name, source_hash, snapshot_dir=SNAPSHOT_DIR):
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    return os.path.join(snapshot_dir, f"{stem}-{source_hash[:12]}{SNAPSHOT_EXT}")
+
+
+def write_snapshot(df, unit_cols_std, source_name, source_hash, snapshot_dir=SNAPSHOT_DIR):
+    """Simpan df yang sudah di-prepare sebagai snapshot; kembalikan path-nya."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    meta = {
+        "source": os.path.basename(source_name),
+        "source_hash": source_hash,
+        "rows": len(df),
+        "created": time.time(),
+        "unit_cols_std": list(unit_cols_std),
+    }
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+    path = snapshot_path(source_name, source_hash, snapshot_dir)
+    tmp = path + ".tmp"
+    # tanpa kompresi supaya bisa di-memory-map saat dibaca
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return path
+
+
+def build_snapshot(source_path, snapshot_dir=SNAPSHOT_DIR, unit_columns=UNIT_COLUMNS):
+    """Parse + prepare file CSV/Excel dari disk lalu simpan sebagai snapshot."""
+    with open(source_path, "rb") as f:
+        h = file_hash(f.read())
+    df, unit_cols_std = prepare_df(read_table(source_path, source_path, unit_columns), unit_columns, order_map)
+    return write_snapshot(df, unit_cols_std, source_path, h, snapshot_dir)
+
+
+def _info(path, schema):
+    meta = json.loads((schema.metadata or {}).get(_META_KEY, b"{}"))
+    return SnapshotInfo(
+        path=path,
+        source=meta.get("source", os.path.basename(path)),
+        source_hash=meta.get("source_hash", ""),
+        rows=meta.get("rows", 0),
+        created=meta.get("created", os.path.getmtime(path)),
+        unit_cols_std=meta.get("unit_cols_std", []),
+    )
+
+
+def list_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Daftar snapshot (hanya baca schema, bukan data), terbaru dulu."""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    infos = []
+    for name in os.listdir(snapshot_dir):
+        if not name.endswith(SNAPSHOT_EXT):
+            continue
+        path = os.path.join(snapshot_dir, name)
+        with pa.memory_map(path) as source:
+            infos.append(_info(path, pa.ipc.open_file(source).schema))
+    return sorted(infos, key=lambda i: i.created, reverse=True)
+
+
+def load_snapshot(path, columns=None):
+    """Buka snapshot secara memory-mapped; return (df, SnapshotInfo).
+
+    Kolom string tetap menunjuk ke file di pandas ≥3 (di pandas 2 disalin jadi objek Python);
+    kode category dan kolom numerik disalin.
+    split_blocks: tiap kolom jadi blok sendiri, tanpa copy tambahan untuk menggabungkan blok.
+    """
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        table = reader.read_all()
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        df = table.to_pandas(split_blocks=True)
+        return df, _info(path, reader.schema)
+
+
+def load_snapshot_table(path):
+    """Snapshot sebagai pyarrow.Table memory-mapped (tanpa konversi ke pandas); return (table, SnapshotInfo).
+
+    Map tidak ditutup di sini: buffer tabel menunjuk langsung ke file, jadi halaman
+    data dibaca OS sesuai kebutuhan dan bisa dilepas lagi (out-of-core).
+    """
+    reader = pa.ipc.open_file(pa.memory_map(path))
+    return reader.read_all(), _info(path, reader.schema)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    for src in sys.argv[1:]:
+        t0 = time.time()
+        out = build_snapshot(src)
+        print(f"{src} -> {out} ({time.time() - t0:.1f}s)")
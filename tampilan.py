@@ -0,0 +1,98 @@
+"""Tampilan standar: agregat, figure dan tabel detail treemap 1–3 dari roll-up cube.
+
+Dipakai app.py (roll-up view terfilter) dan laporan.py (roll-up per OPD), jadi
+dashboard dan laporan headless memberi label kosong, urutan eselon dan tabel
+detail yang sama:
+- treemap 1: OPD → Eselon, urut eselon (order_map) lalu OPD;
+- treemap 2: OPD → Eselon → (Unit …) → Jabatan, urut eselon, dengan level-of-detail;
+- treemap 3: OPD → Golongan.
+"""
+
+from cube import COUNT_COL
+from pipeline import COL_OPD, COL_ESELON, COL_JAB, COL_GOL, order_map
+from treemap import MISSING_LABEL, TREEMAP2_MAX_LEAVES, TREEMAP2_TOP_N, level_of_detail, treemap_figure
+
+DIMS_OPD_ESELON = [COL_OPD, COL_ESELON]
+DIMS_OPD_GOLONGAN = [COL_OPD, COL_GOL]
+
+LABELS = {COL_OPD: "OPD", COL_ESELON: "Eselon", COL_JAB: "Jabatan", COL_GOL: "Golongan",
+          COUNT_COL: "Jumlah", "persentase": "Persentase (%)"}
+
+
+def jabatan_path(unit_cols_std=()):
+    return [COL_OPD, COL_ESELON] + list(unit_cols_std) + [COL_JAB]
+
+
+def unit_labels(unit_cols_std):
+    return {col: f"Unit L{i+1}" for i, col in enumerate(unit_cols_std)}
+
+
+def label_missing(agg, cols):
+    """Nilai kosong/NA di `cols` jadi MISSING_LABEL (node treemap butuh label)."""
+    agg = agg.copy()
+    for col in cols:
+        agg[col] = agg[col].astype(object).fillna(MISSING_LABEL).replace("", MISSING_LABEL)
+    return agg
+
+
+def eselon_rank(s):
+    return s.str.upper().map(order_map).fillna(99)
+
+
+def sort_eselon(agg, *cols):
+    """Urut eselon sesuai order_map (lalu `cols`), stabil."""
+    agg = agg.assign(__ord=eselon_rank(agg[COL_ESELON]))
+    return agg.sort_values(["__ord", *cols], kind="stable").drop(columns="__ord")
+
+
+# ======================
+# Agregat (input: roll-up cube ke dimensi tampilan)
+# ======================
+def opd_eselon(agg):
+    """Treemap 1: roll-up OPD × Eselon."""
+    return sort_eselon(label_missing(agg, DIMS_OPD_ESELON), COL_OPD)
+
+
+def opd_eselon_jabatan(agg, path):
+    """Treemap 2: roll-up ke `path` (lihat `jabatan_path`)."""
+    agg = label_missing(agg, path)
+    return sort_eselon(agg) if COL_ESELON in path else agg
+
+
+def opd_golongan(agg):
+    """Treemap 3: roll-up OPD × Golongan."""
+    return label_missing(agg, DIMS_OPD_GOLONGAN)
+
+
+def jabatan_leaves(agg2, path, top_n=TREEMAP2_TOP_N, max_leaves=TREEMAP2_MAX_LEAVES):
+    """Level-of-detail treemap 2; return (agg, path, jabatan_disembunyikan)."""
+    plot_agg, plot_path, hidden = level_of_detail(agg2, path, top_n, max_leaves)
+    if not hidden and COL_ESELON in plot_path:
+        plot_agg = sort_eselon(plot_agg)   # baris "Lainnya" ditambahkan di akhir
+    return plot_agg, plot_path, hidden
+
+
+# ======================
+# Figure & tabel
+# ======================
+def _title(title, scope):
+    return f"{title} — {scope}" if scope else title
+
+
+def figure_opd_eselon(agg1, scope=None):
+    return treemap_figure(agg1, DIMS_OPD_ESELON, _title("Treemap — OPD → Eselon", scope), textfont_size=12)
+
+
+def figure_opd_eselon_jabatan(plot_agg2, plot_path, scope=None):
+    return treemap_figure(plot_agg2, plot_path, _title("Treemap — OPD → Eselon → Jabatan", scope), textfont_size=10)
+
+
+def figure_opd_golongan(agg3, scope=None):
+    return treemap_figure(agg3, DIMS_OPD_GOLONGAN, _title("Treemap — OPD → Golongan", scope), textfont_size=12)
+
+
+def detail_table(agg, labels=None):
+    """Tabel detail: urut jumlah menurun, plus persentase dari total; kolom diberi label tampilan."""
+    table = agg.sort_values(COUNT_COL, ascending=False, kind="stable").reset_index(drop=True)
+    table["persentase"] = (table[COUNT_COL] / table[COUNT_COL].sum() * 100).round(2)
+    return table.rename(columns={**LABELS, **(labels or {})})
@@ -0,0 +1,126 @@
+"""DeltaDataset.apply (tulis di tempat per posisi) harus sama dengan membangun ulang dari hasilnya."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compact import nip_to_int64
+from cube import COUNT_COL, build_cube, cube_dims, rollup
+from data_sintetis import generate
+from delta import DeltaDataset
+from filter_index import FilterIndex
+from pipeline import COL_ESELON, COL_GOL, COL_JJENIS, COL_NIP, COL_OPD, UNIT_COLUMNS, order_map, prepare_df
+
+FILTER_COLUMNS = [COL_ESELON, COL_OPD, COL_GOL, COL_JJENIS]
+
+
+@pytest.fixture
+def base():
+    raw = generate(3000, seed=0)
+    df, unit_cols_std = prepare_df(raw, UNIT_COLUMNS, order_map)
+    return raw, df, unit_cols_std
+
+
+def new_rows(n, seed, prefix):
+    rows = generate(n, seed=seed).astype("string")
+    rows[COL_NIP] = [f"{prefix}{i:010d}" for i in range(n)]
+    return rows
+
+
+def apply(df, unit_cols_std, *deltas):
+    dataset = DeltaDataset(df.copy(), unit_cols_std, build_cube(df, unit_cols_std), FilterIndex(df, FILTER_COLUMNS))
+    for changes in deltas:
+        if "aksi" in changes.columns:
+            changes["aksi"] = changes["aksi"].fillna("")
+        dataset.apply(changes)
+    return dataset
+
+
+def assert_consistent(dataset):
+    """Cube, indeks filter dan posisi NIP sama dengan yang dibangun ulang dari dataset.df."""
+    df, dims = dataset.df, cube_dims(dataset.unit_cols_std)
+    pd.testing.assert_frame_equal(rollup(dataset.cube, dims).astype(object),
+                                  rollup(build_cube(df, dataset.unit_cols_std), dims).astype(object))
+    fresh = FilterIndex(df, FILTER_COLUMNS)
+    assert dataset.filter_index.n == len(df)
+    for col in FILTER_COLUMNS:
+        for value in df[col].dropna().unique():
+            np.testing.assert_array_equal(dataset.filter_index.select(**{col: value}), fresh.select(**{col: value}))
+    nips = nip_to_int64(df[COL_NIP]).to_numpy(dtype=np.int64)
+    np.testing.assert_array_equal(dataset.nips.lookup(nips), np.arange(len(df)))
+
+
+def test_update_writes_in_place(base):
+    _, df, unit_cols_std = base
+    picked = df[COL_NIP].iloc[[5, 700, 2999]].astype(str).to_numpy()
+    dataset = apply(df, unit_cols_std, pd.DataFrame({COL_NIP: picked, COL_GOL: "IV/e"}, dtype="string"))
+    assert len(dataset.df) == len(df)
+    assert list(dataset.df[COL_GOL].iloc[[5, 700, 2999]]) == ["IV/e"] * 3
+    untouched = np.setdiff1d(np.arange(len(df)), [5, 700, 2999])
+    pd.testing.assert_frame_equal(dataset.df.iloc[untouched].astype(object), df.iloc[untouched].astype(object))
+    assert_consistent(dataset)
+
+
+@pytest.mark.parametrize("n_remove,n_add", [(40, 10), (10, 40), (25, 25), (30, 0)])
+def test_remove_and_add(base, n_remove, n_add):
+    raw, df, unit_cols_std = base
+    rng = np.random.default_rng(n_remove + n_add)
+    removed = rng.choice(df[COL_NIP].astype(str).to_numpy(), n_remove, replace=False)
+    changes = pd.concat([pd.DataFrame({COL_NIP: removed, "aksi": "hapus"}, dtype="string"),
+                         new_rows(n_add, 7, "19990101").assign(aksi="tambah")], ignore_index=True)
+    dataset = apply(df, unit_cols_std, changes)
+
+    assert len(dataset.df) == len(df) - n_remove + n_add
+    expected = set(df[COL_NIP]) - set(nip_to_int64(pd.Series(removed)))
+    expected |= set(nip_to_int64(changes[COL_NIP].iloc[n_remove:]))
+    assert set(dataset.df[COL_NIP]) == expected
+    assert_consistent(dataset)
+
+
+def test_repeated_deltas_match_single_rebuild(base):
+    raw, df, unit_cols_std = base
+    rng = np.random.default_rng(3)
+    nips = df[COL_NIP].astype(str).to_numpy()
+    updates = raw.sample(50, random_state=1).astype("string")
+    updates["jabatan_nama"] = "KEPALA SEKSI PELAYANAN"
+    deltas = [
+        pd.DataFrame({COL_NIP: rng.choice(nips, 100, replace=False), COL_GOL: "II/a"}, dtype="string"),
+        pd.concat([pd.DataFrame({COL_NIP: rng.choice(nips, 60, replace=False), "aksi": "hapus"}, dtype="string"),
+                   new_rows(20, 8, "19980101")], ignore_index=True),
+        pd.concat([new_rows(90, 9, "19970101"), updates], ignore_index=True),
+    ]
+    dataset = apply(df, unit_cols_std, *deltas)
+    assert_consistent(dataset)
+
+    # hasil per NIP tidak bergantung pada posisi baris
+    result = dataset.df.set_index(COL_NIP).sort_index()
+    assert (result.loc[nip_to_int64(updates[COL_NIP]).to_numpy(), "jabatan_nama"] == "KEPALA SEKSI PELAYANAN").all()
+    assert result.index.is_unique
+
+
+def test_mixed_delta_matches_fresh_cube_and_index(base):
+    raw, df, unit_cols_std = base
+    rng = np.random.default_rng(11)
+    nips = df[COL_NIP].astype(str).to_numpy()
+    picked = rng.choice(nips, 80, replace=False)
+    updates = raw[raw[COL_NIP].astype(str).isin(picked[40:])].astype("string")
+    updates[COL_GOL] = "IV/e"
+    changes = pd.concat([pd.DataFrame({COL_NIP: picked[:40], "aksi": "hapus"}, dtype="string"),
+                         updates.assign(aksi="ubah"), new_rows(25, 12, "19960101").assign(aksi="tambah")],
+                        ignore_index=True)
+    dataset = apply(df, unit_cols_std, changes)
+    assert len(dataset.df) == len(df) - 40 + 25
+
+    # cube inkremental (tanpa kombinasi yang jumlahnya jadi 0) == build_cube dari frame hasil
+    dims = cube_dims(unit_cols_std)
+    live = dataset.cube[dataset.cube[COUNT_COL] > 0]
+    fresh_cube = build_cube(dataset.df, unit_cols_std)
+    normalize = lambda c: c.astype(object).sort_values(dims).reset_index(drop=True)
+    pd.testing.assert_frame_equal(normalize(live), normalize(fresh_cube))
+
+    # indeks filter inkremental == FilterIndex baru, bitmap per nilai
+    fresh_index = FilterIndex(dataset.df, FILTER_COLUMNS)
+    for col in FILTER_COLUMNS:
+        assert set(dataset.filter_index.values(col)) == set(fresh_index.values(col))
+        for value in fresh_index.values(col):
+            np.testing.assert_array_equal(dataset.filter_index.mask(**{col: value}), fresh_index.mask(**{col: value}))
@@ -0,0 +1,95 @@
+"""Peta alias: hanya kecocokan skor 1 yang langsung menggabungkan nama; superset token menunggu review."""
+
+import pandas as pd
+import pytest
+
+from kanonik import (
+    STATUS_DISETUJUI, STATUS_DITOLAK, STATUS_OTOMATIS, STATUS_USULAN, AliasMap, match_tokens, similarity,
+)
+from pipeline import COL_JAB, COL_OPD
+
+# (kolom, nama lebih umum, nama dengan token tambahan): unit berbeda, tidak boleh digabung otomatis
+SUPERSETS = [
+    (COL_OPD, "Kecamatan Kota", "Kecamatan Kota Barat"),
+    (COL_OPD, "Kecamatan Kota", "Kecamatan Kota Timur"),
+    (COL_OPD, "Dinas Kesehatan", "Dinas Kesehatan Hewan"),
+    (COL_OPD, "Bagian Umum", "Bagian Umum dan Keuangan"),
+    (COL_JAB, "Kepala Sub Bagian Umum", "Kepala Sub Bagian Umum dan Kepegawaian"),
+]
+
+
+def canonicalize(aliases, column, names):
+    """Nama pertama paling sering (jadi kanonik kalau ada yang cocok)."""
+    return aliases.canonicalize(names, list(range(len(names), 0, -1)), column)
+
+
+def row(aliases, alias):
+    return aliases.rows[aliases.rows["alias"] == alias].iloc[-1]
+
+
+@pytest.mark.parametrize("column,general,specific", SUPERSETS)
+def test_superset_is_pending_not_merged(column, general, specific):
+    assert 0 < similarity(match_tokens(general), match_tokens(specific)) < 1
+    aliases = AliasMap()
+    mapping = canonicalize(aliases, column, [general, specific])
+    assert mapping == {general: general, specific: specific}
+    proposal = row(aliases, specific)
+    assert (proposal["kanonik"], proposal["status"]) == (general, STATUS_USULAN)
+    # load berikutnya: nama yang sudah diusulkan dikenal, tidak dikelompokkan ulang
+    assert aliases.mapping(column)[specific] == specific
+    assert canonicalize(aliases, column, [general, specific]) == mapping
+
+
+def test_sibling_units_stay_separate():
+    aliases = AliasMap()
+    names = ["Kecamatan Kota", "Kecamatan Kota Barat", "Kecamatan Kota Timur"]
+    mapping = canonicalize(aliases, COL_OPD, names)
+    assert len(set(mapping.values())) == 3
+
+
+def test_same_token_count_variants_are_merged():
+    aliases = AliasMap()
+    mapping = canonicalize(aliases, COL_OPD, [
+        "Dinas Pendidikan dan Kebudayaan", "Dinas Pend. dan Kebudayaan", "DINAS PENDIDIKAN DAN KEBUDAYAAN ",
+        "Kecamatan Kota Barat", "Kec. Kota Barat",
+    ])
+    assert mapping["Dinas Pend. dan Kebudayaan"] == "Dinas Pendidikan dan Kebudayaan"
+    assert mapping["DINAS PENDIDIKAN DAN KEBUDAYAAN "] == "Dinas Pendidikan dan Kebudayaan"
+    assert mapping["Kec. Kota Barat"] == "Kecamatan Kota Barat"
+    assert row(aliases, "Kec. Kota Barat")["status"] == STATUS_OTOMATIS
+
+
+def test_approved_proposal_is_applied():
+    aliases = AliasMap()
+    canonicalize(aliases, COL_OPD, ["Dinas Kesehatan", "Dinas Kesehatan Hewan"])
+    aliases.rows.loc[aliases.rows["alias"] == "Dinas Kesehatan Hewan", "status"] = STATUS_DISETUJUI
+    assert aliases.mapping(COL_OPD)["Dinas Kesehatan Hewan"] == "Dinas Kesehatan"
+
+
+def test_rejected_proposal_is_not_proposed_again():
+    aliases = AliasMap()
+    canonicalize(aliases, COL_OPD, ["Bagian Umum", "Bagian Umum dan Keuangan"])
+    aliases.rows.loc[aliases.rows["alias"] == "Bagian Umum dan Keuangan", "status"] = STATUS_DITOLAK
+    mapping = canonicalize(aliases, COL_OPD, ["Bagian Umum", "Bagian Umum dan Keuangan"])
+    assert mapping["Bagian Umum dan Keuangan"] == "Bagian Umum dan Keuangan"
+    assert not ((aliases.rows["alias"] == "Bagian Umum dan Keuangan")
+                & (aliases.rows["kanonik"] == "Bagian Umum")
+                & (aliases.rows["status"] != STATUS_DITOLAK)).any()
+
+
+def test_old_map_otomatis_below_one_is_not_applied(tmp_path):
+    path = tmp_path / "alias.csv"
+    pd.DataFrame([
+        (COL_OPD, "Kecamatan Kota", "Kecamatan Kota", 1.0, "kanonik"),
+        (COL_OPD, "Kecamatan Kota Barat", "Kecamatan Kota", 0.667, STATUS_OTOMATIS),
+        (COL_OPD, "Kec. Kota", "Kecamatan Kota", 1.0, STATUS_OTOMATIS),
+    ], columns=["kolom", "alias", "kanonik", "skor", "status"]).to_csv(path, index=False)
+    mapping = AliasMap.load(path).mapping(COL_OPD)
+    assert mapping["Kecamatan Kota Barat"] == "Kecamatan Kota Barat"
+    assert mapping["Kec. Kota"] == "Kecamatan Kota"
+
+
+def test_review_lists_proposals_first():
+    aliases = AliasMap()
+    canonicalize(aliases, COL_OPD, ["Dinas Kesehatan", "Dinas Kesehatan Hewan", "Dinas Kes."])
+    assert list(aliases.aliases()["status"]) == [STATUS_USULAN, STATUS_OTOMATIS]
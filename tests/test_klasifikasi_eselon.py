@@ -0,0 +1,101 @@
+"""classify_eselon (engine vektor + cache) harus identik dengan infer_eselon per baris."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_sintetis import generate
+from klasifikasi_cache import KlasifikasiCache
+from klasifikasi_eselon import COL_JAB, COL_JJENIS, classify_chunk, classify_eselon, expand_inputs, infer_eselon
+
+
+def reference(df):
+    """infer_eselon baris demi baris (NaN -> None, seperti input skrip lama)."""
+    pairs = df[[COL_JAB, COL_JJENIS]].astype(object)
+    pairs = pairs.where(pairs.notna(), None)
+    return pd.DataFrame([infer_eselon(j, k) for j, k in zip(pairs[COL_JAB], pairs[COL_JJENIS])],
+                        columns=["eselon", "eselon_reason"], index=df.index)
+
+
+def assert_same(df, result):
+    expected = reference(df)
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+EDGE_CASES = [
+    # kosong / NaN
+    (None, None),
+    (np.nan, np.nan),
+    ("", ""),
+    ("", None),
+    (np.nan, "STRUKTURAL"),
+    # hanya jenis: fungsional menang atas nama jabatan apa pun
+    (None, "JFT"),
+    ("", "FUNGSIONAL"),
+    ("KEPALA DINAS PENDIDIKAN", "FUNGSIONAL"),
+    ("KEPALA SEKSI", "PELAKSANA JFU"),
+    ("PENGELOLA BARANG", "PELAKSANA"),
+    # keyword tumpang tindih: urutan rules menentukan pemenang
+    ("KEPALA SEKSI PEMERINTAHAN KECAMATAN", "STRUKTURAL"),      # CAMAT (III) sebelum KEPALA SEKSI (IV)
+    ("SEKRETARIS KECAMATAN", "STRUKTURAL"),                     # CAMAT lebih dulu dari SEKRETARIS KECAMATAN
+    ("KEPALA SEKSI PELAYANAN KELURAHAN", "STRUKTURAL"),         # KEPALA SEKSI sebelum LURAH
+    ("KEPALA BIDANG PERENCANAAN DINAS KESEHATAN", "STRUKTURAL"),
+    ("DIREKTUR RSUD SEKALIGUS KEPALA BIDANG", "STRUKTURAL"),
+    ("SEKRETARIS DAERAH", "STRUKTURAL"),
+    ("KASUBBID PEMBERDAYAAN", "STRUKTURAL"),
+    ("KASUBAG UMUM", "STRUKTURAL"),
+    ("INSPEKTUR PEMBANTU WILAYAH I", None),
+    # pola ambigu vs default
+    ("KEPALA", "STRUKTURAL"),
+    ("SEKRETARIS", None),
+    ("KEPALANYA", "STRUKTURAL"),
+    ("ANALIS KEPEGAWAIAN", "STRUKTURAL"),
+]
+
+
+def edge_frame():
+    return pd.DataFrame(EDGE_CASES, columns=[COL_JAB, COL_JJENIS])
+
+
+def test_edge_cases_match_reference():
+    df = edge_frame()
+    assert_same(df, classify_eselon(df))
+
+
+def test_duplicates_and_row_order_preserved():
+    df = edge_frame()
+    df = pd.concat([df, df.iloc[::-1], df], ignore_index=True)
+    df.index = df.index * 7 + 3
+    assert_same(df, classify_eselon(df))
+
+
+def test_categorical_input():
+    df = edge_frame().astype("category")
+    assert_same(df, classify_eselon(df))
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_synthetic_data_matches_reference(seed):
+    df = generate(20_000, seed=seed).drop(columns="eselon")
+    out = classify_chunk(df.copy())
+    assert_same(out, out[["eselon", "eselon_reason"]])
+
+
+def test_cache_matches_reference(tmp_path):
+    df = pd.concat([edge_frame(), classify_chunk(generate(5_000, seed=2))[[COL_JAB, COL_JJENIS]]],
+                   ignore_index=True)
+    cache = KlasifikasiCache(str(tmp_path / "cache.sqlite"))
+    try:
+        first = classify_eselon(df, cache=cache)
+        second = classify_eselon(df, cache=cache)
+        assert cache.stats()["hits"] > 0
+    finally:
+        cache.close()
+    assert_same(df, first)
+    assert_same(df, second)
+
+
+def test_batch_rejects_legacy_xls_before_queueing(tmp_path):
+    (tmp_path / "lama.xls").write_bytes(b"")
+    with pytest.raises(ValueError, match=r"\.xls tidak didukung"):
+        expand_inputs([str(tmp_path / "*.xls")])
@@ -0,0 +1,37 @@
+"""Comparison: nilai kosong dan kategori "Tidak Diketahui" yang sudah ada berbagi satu label."""
+
+import numpy as np
+import pandas as pd
+
+from perbandingan import Comparison, Period
+from pipeline import COL_OPD
+from treemap import MISSING_LABEL
+
+
+def period(nips, opd):
+    codes, categories = pd.factorize(pd.Series(opd, dtype=object), sort=True)
+    return Period(None, pd.Index(np.array(nips, dtype=np.int64)), {COL_OPD: codes}, {COL_OPD: pd.Index(categories)})
+
+
+def test_existing_missing_label_is_not_duplicated():
+    a = period([1, 2, 3, 4], ["Dinas A", MISSING_LABEL, None, "Dinas B"])
+    b = period([1, 2, 3, 4], ["Dinas B", MISSING_LABEL, MISSING_LABEL, None])
+    comparison = Comparison([a, b])
+
+    labels = comparison.categories[COL_OPD]
+    assert labels.is_unique and list(labels).count(MISSING_LABEL) == 1
+
+    m = comparison.matrix(0, 1, COL_OPD)
+    assert m.loc[MISSING_LABEL, MISSING_LABEL] == 2   # label asli + kosong -> label asli
+    assert m.loc["Dinas A", "Dinas B"] == 1
+    assert m.loc["Dinas B", MISSING_LABEL] == 1
+    flows = comparison.flows(0, 1, COL_OPD)
+    assert flows["jumlah"].sum() == 2
+
+
+def test_missing_label_appended_when_absent():
+    a = period([1, 2], ["Dinas A", None])
+    b = period([1, 2], ["Dinas A", "Dinas A"])
+    comparison = Comparison([a, b])
+    assert list(comparison.categories[COL_OPD]) == ["Dinas A", MISSING_LABEL]
+    assert comparison.matrix(0, 1, COL_OPD).loc[MISSING_LABEL, "Dinas A"] == 1
@@ -0,0 +1,33 @@
+"""pivot_codes/pivot_from_counts: dtype hasil tidak bergantung pada isi seleksi."""
+
+import numpy as np
+import pandas as pd
+
+from pivot import pivot_codes, pivot_from_counts
+from pipeline import COL_GOL, COL_OPD
+
+
+def frame():
+    return pd.DataFrame({COL_OPD: pd.Categorical(["Dinas A", "Dinas B", "Dinas A"]),
+                         COL_GOL: pd.Categorical(["III/a", "IV/b", "II/c"])})
+
+
+def test_pivot_counts_are_integers():
+    table = pivot_codes(frame(), COL_OPD, COL_GOL)
+    assert (table.dtypes == np.int64).all()
+    assert table.loc["Total", "Total"] == 3
+    assert list(table.columns) == ["II/c", "III/a", "IV/b", "Total"]
+
+
+def test_empty_selection_gives_integer_total_only():
+    table = pivot_codes(frame(), COL_OPD, COL_GOL, rows=np.array([], dtype=np.intp))
+    assert (table.dtypes == np.int64).all()
+    assert list(table.index) == ["Total"] and list(table.columns) == ["Total"]
+    assert table.loc["Total", "Total"] == 0
+
+
+def test_empty_counts_give_integer_table():
+    agg = pd.DataFrame({COL_OPD: pd.Series([], dtype=object), COL_GOL: pd.Series([], dtype=object),
+                        "jumlah": pd.Series([], dtype=np.int64)})
+    table = pivot_from_counts(agg, COL_OPD, COL_GOL)
+    assert (table.dtypes == np.int64).all()
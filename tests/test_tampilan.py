@@ -0,0 +1,63 @@
+"""Dashboard (view terfilter app.py) dan laporan.py harus menghasilkan tabel tampilan standar yang sama."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tampilan
+from backend import PandasBackend
+from cube import COUNT_COL, build_cube
+from data_sintetis import generate
+from filter_index import FilterIndex
+from laporan import plan_tasks, standard_views
+from pipeline import COL_ESELON, COL_GOL, COL_OPD, UNIT_COLUMNS, order_map, prepare_df
+from treemap import MISSING_LABEL
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    df, unit_cols_std = prepare_df(generate(5000, seed=2), UNIT_COLUMNS, order_map)
+    return df, unit_cols_std
+
+
+def app_tables(df, unit_cols_std, **selections):
+    """Tabel detail seperti app.py: roll-up view terfilter -> tampilan.py."""
+    backend = PandasBackend(df, build_cube(df, unit_cols_std), FilterIndex(df, [COL_ESELON, COL_OPD, COL_GOL]))
+    view = backend.filter(**selections)
+    path = tampilan.jabatan_path(unit_cols_std)
+    return {
+        "detail_opd_eselon": tampilan.detail_table(tampilan.opd_eselon(view.rollup(tampilan.DIMS_OPD_ESELON))),
+        "detail_jabatan": tampilan.detail_table(tampilan.opd_eselon_jabatan(view.rollup(path), path),
+                                                tampilan.unit_labels(unit_cols_std)),
+        "detail_golongan": tampilan.detail_table(tampilan.opd_golongan(view.rollup(tampilan.DIMS_OPD_GOLONGAN))),
+    }
+
+
+def report_tables(task):
+    _, tables = standard_views(task["r2"], task["r3"], task["path"], task["pivot_index"], task["title"])
+    return tables
+
+
+def assert_same_tables(app, report):
+    for name, table in app.items():
+        pd.testing.assert_frame_equal(table.astype(object), report[name].astype(object), obj=name)
+
+
+def test_global_report_matches_unfiltered_dashboard(dataset, tmp_path):
+    df, unit_cols_std = dataset
+    tasks = plan_tasks(df, unit_cols_std, str(tmp_path))
+    assert_same_tables(app_tables(df, unit_cols_std), report_tables(tasks[0]))
+
+
+def test_opd_report_matches_dashboard_filtered_to_opd(dataset, tmp_path):
+    df, unit_cols_std = dataset
+    task = plan_tasks(df, unit_cols_std, str(tmp_path))[1]
+    assert_same_tables(app_tables(df, unit_cols_std, **{COL_OPD: [task["title"]]}), report_tables(task))
+
+
+def test_missing_labels_and_eselon_order():
+    agg = pd.DataFrame({COL_OPD: ["B", "A", None, "A"], COL_ESELON: ["IV", "II", "III", None], COUNT_COL: [1, 2, 3, 4]})
+    agg1 = tampilan.opd_eselon(agg)
+    assert list(agg1[COL_ESELON]) == ["II", "III", "IV", MISSING_LABEL]
+    assert agg1[COL_OPD].tolist() == ["A", MISSING_LABEL, "B", "A"]
+    assert np.array_equal(tampilan.detail_table(agg1)["Jumlah"], [4, 3, 2, 1])
@@ -0,0 +1,124 @@
+"""Helper treemap: builder ids/parents untuk go.Treemap dan level-of-detail (top-N + "Lainnya")."""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+OTHER_LABEL = "Lainnya"
+
+# Level-of-detail Treemap 2 (default widget app.py dan laporan.py)
+TREEMAP2_TOP_N = 10
+TREEMAP2_MAX_LEAVES = 500
+
+
+def collapse_top_n(agg, parent_cols, leaf_col, n, value_col="jumlah", other_label=OTHER_LABEL):
+    """Pertahankan `n` daun terbesar per node induk, sisanya dilipat jadi satu daun "Lainnya".
+
+    Label daun lipatan memuat jumlah daun yang digabung, mis. "Lainnya (42 jabatan)".
+    Urutan baris hasil mengikuti `agg` (daun "Lainnya" di akhir).
+    """
+    if n is None or agg.empty:
+        return agg
+    ranked = agg.sort_values(value_col, ascending=False, kind="stable")
+    groups = ranked.groupby(parent_cols, dropna=False, sort=False)
+    rank = groups.cumcount()
+    # melipat satu daun saja tidak menghemat apa-apa
+    kept = (rank < n) | (groups[value_col].transform("size") <= n + 1)
+    keep = agg[kept.reindex(agg.index)]
+    rest = ranked[~kept]
+    if rest.empty:
+        return agg
+
+    other = (rest.groupby(parent_cols, dropna=False, sort=False)
+                 .agg(**{value_col: (value_col, "sum"), "__n": (value_col, "size")})
+                 .reset_index())
+    other[leaf_col] = other_label + " (" + other["__n"].astype(str) + " jabatan)"
+    return pd.concat([keep, other.drop(columns="__n")], ignore_index=True)[agg.columns]
+
+
+def level_of_detail(agg, path, top_n=TREEMAP2_TOP_N, max_leaves=TREEMAP2_MAX_LEAVES, value_col="jumlah"):
+    """Batasi daun treemap sekitar `max_leaves`: top-N daun per induk (sisanya "Lainnya").
+
+    Kalau node induk saja sudah terlalu banyak, berhenti di level induk.
+    Return (agg, path, daun_disembunyikan).
+    """
+    path = list(path)
+    parent_path = path[:-1]
+    n_parents = len(agg.drop_duplicates(subset=parent_path))
+    if n_parents * 2 > max_leaves:
+        return agg.groupby(parent_path, sort=False)[value_col].sum().reset_index(), parent_path, True
+    leaf_n = min(int(top_n), max_leaves // max(n_parents, 1) - 1)
+    return collapse_top_n(agg, parent_path, path[-1], leaf_n, value_col), path, False
+
+
+def count_leaves(agg, path):
+    """Jumlah daun treemap (baris unik pada level terdalam path)."""
+    return len(agg.drop_duplicates(subset=list(path)))
+
+
+def figure_payload_bytes(fig):
+    """Ukuran JSON figure yang dikirim ke browser."""
+    return len(fig.to_json())
+
+
+# ============================
+# Builder ids/parents langsung untuk go.Treemap
+# ============================
+MISSING_LABEL = "Tidak Diketahui"
+ID_SEP = "||"
+
+HOVERTEMPLATE = (
+    "<b>%{label}</b><br>Jumlah: %{customdata[0]:,}"
+    "<br>%{customdata[1]:.2f}% dari total<extra></extra>"
+)
+
+
+def treemap_nodes(agg, path, value_col="jumlah", missing_label=MISSING_LABEL):
+    """Node treemap (id, label, parent, value) dari data agregat, level demi level.
+
+    Tiap level = groupby(path[:k+1], sort=False), jadi urutan node mengikuti
+    urutan baris `agg` (mis. sudah diurutkan berdasarkan order_map eselon).
+    """
+    path = list(path)
+    data = agg[path + [value_col]].copy()
+    for col in path:
+        data[col] = data[col].astype(object).fillna(missing_label).replace("", missing_label).astype(str)
+
+    frames = []
+    for depth in range(len(path)):
+        level = data.groupby(path[:depth + 1], sort=False)[value_col].sum().reset_index()
+        labels = level[path[depth]]
+        if depth == 0:
+            parents = pd.Series("", index=level.index)
+            ids = labels
+        else:
+            parents = level[path[0]]
+            for col in path[1:depth]:
+                parents = parents + ID_SEP + level[col]
+            ids = parents + ID_SEP + labels
+        frames.append(pd.DataFrame({
+            "id": ids.to_numpy(), "label": labels.to_numpy(),
+            "parent": parents.to_numpy(), "value": level[value_col].to_numpy(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def treemap_figure(agg, path, title, value_col="jumlah", textfont_size=12):
+    """go.Treemap dari data agregat dengan customdata (jumlah, % total) yang sejajar per node."""
+    nodes = treemap_nodes(agg, path, value_col)
+    values = nodes["value"].to_numpy()
+    total = values[(nodes["parent"] == "").to_numpy()].sum()
+    pct = values / total * 100 if total else np.zeros(len(values))
+    fig = go.Figure(go.Treemap(
+        ids=nodes["id"], labels=nodes["label"], parents=nodes["parent"], values=values,
+        branchvalues="total",
+        sort=False,  # pertahankan urutan data (eselon sesuai order_map)
+        customdata=np.column_stack([values, pct]),
+        textinfo="label+value",
+        texttemplate="%{label}<br>%{value}",
+        textfont_size=textfont_size,
+        textposition="middle center",
+        hovertemplate=HOVERTEMPLATE,
+    ))
+    fig.update_layout(title=title, margin=dict(t=40,l=0,r=0,b=0))
+    return fig